@@ -0,0 +1,200 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+import unicodedata
+from typing import Iterable, Optional, Tuple
+
+import pandas as pd
+from rapidfuzz import process
+from rapidfuzz.distance import Levenshtein
+
+
+# Farthest an OCR'd name may be from a known name of another event and still be
+# snapped to it, for scorecards whose event date has no fights in the stats.
+MAX_UNDATED_DISTANCE = 3
+# Farthest an OCR'd name may be from a fighter of its event date, as a fraction
+# of its length. Farther names are more likely of a fight missing from the stats.
+MAX_DATED_DISTANCE_RATIO = 0.3
+NAME_COLUMNS = ("red_fighter_name", "blue_fighter_name")
+
+# A BK-tree node: its word and its children keyed by their distance to it
+BKNode = Tuple[str, dict]
+
+
+def normalize_name(name: object) -> str:
+    """Uppercase ASCII form of a fighter name with single spaces, as scorecards print it."""
+
+    text = unicodedata.normalize("NFKD", str(name)).encode("ascii", "ignore").decode("ascii")
+    return " ".join(text.upper().split())
+
+
+class BKTree:
+    """Burkhard-Keller tree of strings under the Levenshtein distance.
+
+    Every child sits at its distance from its parent, so by the triangle
+    inequality a lookup only descends into children whose distance to the
+    parent is within range of the query's, and skips most of the tree.
+    """
+
+    def __init__(self, words: Iterable[str] = ()) -> None:
+        self.root: Optional[BKNode] = None
+        for word in words:
+            self.add(word)
+
+    def add(self, word: str) -> None:
+        if self.root is None:
+            self.root = (word, {})
+            return
+
+        node = self.root
+        while True:
+            node_word, children = node
+            distance = Levenshtein.distance(word, node_word)
+            if distance == 0:
+                return
+            if distance not in children:
+                children[distance] = (word, {})
+                return
+            node = children[distance]
+
+    def search(self, query: str, max_distance: int) -> list[tuple[int, str]]:
+        """Every word within `max_distance` of the query, as `(distance, word)`, nearest first."""
+
+        matches = []
+        stack = [self.root] if self.root is not None else []
+        while stack:
+            word, children = stack.pop()
+            distance = Levenshtein.distance(query, word)
+            if distance <= max_distance:
+                matches.append((distance, word))
+            stack.extend(
+                child for edge, child in children.items() if abs(edge - distance) <= max_distance
+            )
+        return sorted(matches)
+
+    def nearest(self, query: str, max_distance: int) -> Optional[tuple[int, str]]:
+        """The nearest word within `max_distance` as `(distance, word)`, or None if there is none."""
+
+        best = None
+        stack = [self.root] if self.root is not None else []
+        while stack:
+            word, children = stack.pop()
+            distance = Levenshtein.distance(query, word)
+            if distance <= max_distance and (best is None or (distance, word) < best):
+                best = (distance, word)
+                # Only nearer words are of interest from now on
+                max_distance = distance
+            stack.extend(
+                child for edge, child in children.items() if abs(edge - distance) <= max_distance
+            )
+        return best
+
+
+@dataclass(frozen=True)
+class NameMatch:
+    """Canonical name an OCR'd name was snapped to, and its edit distance to it."""
+
+    name: str
+    # None when no known name was close enough and the OCR'd name was kept
+    distance: Optional[int]
+
+
+class FighterRoster:
+    """Known fighter names from the stats, indexed by event date and as a whole.
+
+    An OCR'd name is snapped to the nearest name among the fighters of its
+    event date, a card of a few dozen names, if it is within
+    ``MAX_DATED_DISTANCE_RATIO`` of its length. Scorecards dated outside the
+    stats fall back to every known name, through a BK-tree.
+    """
+
+    def __init__(self, fights_stats: pd.DataFrame) -> None:
+        self.canonical: dict[str, str] = {}
+        self.by_date: dict[str, list[str]] = {}
+        for column in NAME_COLUMNS:
+            for name, event_date in zip(fights_stats[column], fights_stats["event_date"]):
+                if pd.isna(name):
+                    continue
+                normalized = normalize_name(name)
+                self.canonical.setdefault(normalized, name)
+                fighters = self.by_date.setdefault(event_date, [])
+                if normalized not in fighters:
+                    fighters.append(normalized)
+        self.tree = BKTree(self.canonical)
+
+    def match(self, name: object, event_date: object = None) -> NameMatch:
+        """Snap an OCR'd name to the nearest known name, among the fighters of `event_date` if known."""
+
+        query = normalize_name(name) if not pd.isna(name) else ""
+        # Unread names, like the "-" placeholder, are no fighter's
+        if not any(character.isalpha() for character in query):
+            return NameMatch(name, None)
+
+        fighters = self.by_date.get(event_date)
+        if fighters:
+            max_distance = max(1, int(MAX_DATED_DISTANCE_RATIO * len(query)))
+            found = process.extractOne(
+                query, fighters, scorer=Levenshtein.distance, score_cutoff=max_distance
+            )
+            if found is None:
+                return NameMatch(name, None)
+            nearest, distance, _ = found
+            return NameMatch(self.canonical[nearest], int(distance))
+
+        found = self.tree.nearest(query, MAX_UNDATED_DISTANCE)
+        if found is None:
+            return NameMatch(name, None)
+        distance, nearest = found
+        return NameMatch(self.canonical[nearest], distance)
+
+
+def correct_scorecard_names(scorecards: pd.DataFrame, roster: FighterRoster) -> pd.DataFrame:
+    """Snap the OCR'd fighter names of the scorecards to the roster's names.
+
+    The edit distance of every correction is kept in a `<column>_distance`
+    column next to the name, empty where the OCR'd name was kept. Corrections
+    that would give both corners the same fighter, or give a fight a second
+    scorecard, are refused: the farther name keeps its OCR'd spelling.
+    """
+
+    scorecards = scorecards.copy()
+    matches = {
+        column: [
+            roster.match(name, event_date)
+            for name, event_date in zip(scorecards[column], scorecards["event_date"])
+        ]
+        for column in NAME_COLUMNS
+    }
+
+    def kept(row: int, column: str) -> NameMatch:
+        return NameMatch(scorecards[column].iloc[row], None)
+
+    def total_distance(row: int) -> int:
+        return sum(matches[column][row].distance or 0 for column in NAME_COLUMNS)
+
+    # Both corners on one fighter: only the nearer correction stands, neither on a tie
+    red_column, blue_column = NAME_COLUMNS
+    for row, (red, blue) in enumerate(zip(matches[red_column], matches[blue_column])):
+        if red.distance is None or blue.distance is None or red.name != blue.name:
+            continue
+        if red.distance >= blue.distance:
+            matches[red_column][row] = kept(row, red_column)
+        if blue.distance >= red.distance:
+            matches[blue_column][row] = kept(row, blue_column)
+
+    # Several scorecards on one fight: the nearest keeps its corrections, the others are undone
+    fights: dict[tuple, list[int]] = {}
+    for row in range(len(scorecards)):
+        names = tuple(matches[column][row].name for column in NAME_COLUMNS)
+        fights.setdefault(names + (scorecards["event_date"].iloc[row],), []).append(row)
+    for rows in fights.values():
+        for row in sorted(rows, key=total_distance)[1:]:
+            for column in NAME_COLUMNS:
+                if matches[column][row].distance:
+                    matches[column][row] = kept(row, column)
+
+    for column in NAME_COLUMNS:
+        scorecards[column] = [match.name for match in matches[column]]
+        distances = pd.array([match.distance for match in matches[column]], dtype="Int64")
+        scorecards.insert(scorecards.columns.get_loc(column) + 1, f"{column}_distance", distances)
+    return scorecards
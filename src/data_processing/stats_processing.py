@@ -9,6 +9,8 @@ import numpy as np
 import pandas as pd
 from pandas.api.types import is_numeric_dtype
 
+from .name_matching import FighterRoster, correct_scorecard_names
+
 
 DECISIVE_OUTCOMES = {"red_win", "blue_win"}
 NAN_PLACEHOLDERS = ["-", "--", "---"]
@@ -586,9 +588,15 @@ def build_processed_decisive_only(all_bouts_stats: pd.DataFrame) -> pd.DataFrame
 def build_merged_stats_scorecards(
     fights_stats: pd.DataFrame, scorecards: pd.DataFrame
 ) -> pd.DataFrame:
-    """Build the raw all-bouts stats plus scorecards export."""
+    """Build the raw all-bouts stats plus scorecards export.
+
+    OCR'd fighter names are snapped to the names of the fights on the
+    scorecard's event date first, so a misread character doesn't drop the
+    scorecard from the merge.
+    """
 
     fights_stats = ensure_fight_outcome(fights_stats)
+    scorecards = correct_scorecard_names(scorecards, FighterRoster(fights_stats))
     return pd.merge(
         fights_stats,
         scorecards,
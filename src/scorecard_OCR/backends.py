@@ -0,0 +1,128 @@
+from typing import (
+    Any,
+    Callable,
+    Collection,
+    ContextManager,
+    Dict,
+    List,
+    NamedTuple,
+    Optional,
+    Protocol,
+    Sequence,
+    Tuple,
+)
+
+import numpy as np
+
+
+# Times part of a backend call: ``stage(name, request_indices)``, None for every request
+StageCallback = Callable[[str, Optional[List[int]]], ContextManager]
+
+
+class OCRRequest(NamedTuple):
+    """A page or template region to OCR: its image file, its pixels and its offset on the page.
+
+    ``scale`` takes the page's pixels to those of the full-resolution image,
+    above 1 when preprocessing downscaled it.
+    """
+
+    image_path: str
+    image: np.ndarray
+    offset: Tuple[int, int]
+    scale: float = 1.0
+
+
+class OCRBackend(Protocol):
+    """An OCR engine the pipeline can run on.
+
+    ``ocr`` reads every request and returns one result per request, in the
+    shape PaddleOCR's ``ocr`` returns for a single image::
+
+        [[[box, (text, confidence)], ...]]
+
+    with the four box corners in the coordinates of the request's image.
+    ``name`` identifies the engine in logs.
+    """
+
+    name: str
+
+    def ocr(self, requests: List[OCRRequest], stage: Optional[StageCallback] = None) -> List[List]:
+        ...
+
+
+def result_from_tokens(
+    tokens: Sequence[Any], offset: Tuple[float, float] = (0, 0), scale: float = 1.0
+) -> List:
+    """Raw OCR result of one image from tokens, e.g. token_store.OCRToken, their boxes scaled then moved."""
+
+    dx, dy = offset
+    return [
+        [
+            [[[x * scale + dx, y * scale + dy] for x, y in token.box], (token.text, token.confidence)]
+            for token in tokens
+        ]
+    ]
+
+
+class ReplayBackend:
+    """Replays tokens stored by an earlier run, e.g. loaded with ``token_store.load_token_store``.
+
+    Every image's tokens are what the engine read on the image's template
+    regions, or on its full page for the images that got no templated pass,
+    with their boxes moved onto the full-resolution page. They can't be split
+    back into regions, so all of them are returned with the first of the
+    image's requests in a call, in its coordinates, and none with the others,
+    whatever regions or preprocessing the pipeline now uses.
+    """
+
+    name = "replay"
+
+    def __init__(self, tokens_by_image: Dict[str, Sequence[Any]]) -> None:
+        self.tokens_by_image = tokens_by_image
+
+    def tokens_for(self, image_path: str) -> Sequence[Any]:
+        tokens = self.tokens_by_image.get(image_path)
+        if tokens is None:
+            raise ValueError(f"No stored tokens for {image_path}")
+        return tokens
+
+    def ocr(self, requests: List[OCRRequest], stage: Optional[StageCallback] = None) -> List[List]:
+        results = []
+        replayed = set()
+        for request in requests:
+            tokens = self.tokens_for(request.image_path)
+            if request.image_path in replayed:
+                results.append([[]])
+                continue
+            replayed.add(request.image_path)
+            # The pipeline moves the boxes back onto the page by the request's offset and scale
+            offset = (-request.offset[0], -request.offset[1])
+            results.append(result_from_tokens(tokens, offset, 1 / request.scale))
+        return results
+
+
+class FakeBackend(ReplayBackend):
+    """In-memory backend for tests: reads the same tokens on every image, and records its calls.
+
+    A call fails when it holds an image listed in ``fail``, like a batch
+    with a broken image would.
+    """
+
+    name = "fake"
+
+    def __init__(self, tokens: Sequence[Any] = (), fail: Collection[str] = ()) -> None:
+        super().__init__({})
+        self.tokens = list(tokens)
+        self.fail = set(fail)
+        # Image paths of every call's requests
+        self.calls: List[List[str]] = []
+
+    def tokens_for(self, image_path: str) -> Sequence[Any]:
+        return self.tokens
+
+    def ocr(self, requests: List[OCRRequest], stage: Optional[StageCallback] = None) -> List[List]:
+        self.calls.append([request.image_path for request in requests])
+        failing = [request.image_path for request in requests if request.image_path in self.fail]
+        if failing:
+            raise RuntimeError(f"Fake OCR failed on {failing[0]}")
+        return super().ocr(requests, stage)
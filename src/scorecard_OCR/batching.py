@@ -0,0 +1,46 @@
+from itertools import islice
+from typing import Iterable, Iterator, List, TypeVar
+
+import cv2
+import numpy as np
+
+
+# Upper bound on images per batch, keeps a worker's decoded images and crops small
+MAX_BATCH_SIZE = 16
+# Batches handed to every worker, so a slow batch doesn't leave the others idle at the end
+BATCHES_PER_WORKER = 4
+
+T = TypeVar("T")
+
+
+def auto_batch_size(num_images: int, num_workers: int) -> int:
+    """Pick a batch size for the CPU pool.
+
+    Batches are as large as possible while still giving every worker several
+    of them, and never larger than ``MAX_BATCH_SIZE``.
+    """
+
+    return max(1, min(MAX_BATCH_SIZE, num_images // (max(num_workers, 1) * BATCHES_PER_WORKER)))
+
+
+def make_batches(image_paths: List[str], batch_size: int) -> List[List[str]]:
+    """Split image paths into consecutive batches."""
+
+    return [image_paths[i : i + batch_size] for i in range(0, len(image_paths), batch_size)]
+
+
+def make_chunks(items: Iterable[T], chunksize: int) -> Iterator[List[T]]:
+    """Group items into consecutive lists of ``chunksize``, lazily, e.g. batches into worker dispatches."""
+
+    items = iter(items)
+    while chunk := list(islice(items, chunksize)):
+        yield chunk
+
+
+def load_image(image_path: str) -> np.ndarray:
+    """Decode an image into the BGR array the OCR engine expects."""
+
+    image = cv2.imread(image_path)
+    if image is None:
+        raise ValueError(f"Could not read image: {image_path}")
+    return image
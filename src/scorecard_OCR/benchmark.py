@@ -0,0 +1,282 @@
+import argparse
+import logging
+import multiprocessing
+import random
+import sys
+import time
+from collections import defaultdict
+from multiprocessing import Pool
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+
+from batching import make_batches
+from config import OCR_MODES, OCRConfig, PathConfig
+from golden import (
+    compare_to_baseline,
+    field_accuracy,
+    field_matches,
+    latency_summary,
+    load_baseline,
+    load_golden_set,
+    save_baseline,
+)
+from layouts import classify_layout
+from ocr import get_engine, init_warm_worker, init_worker, ocr_images, read_images, wait_for_workers
+from preprocess import PREPROCESS_PRESETS
+from profiling import peak_rss_mb
+from thread_budget import ThreadBudget, candidate_budgets, save_thread_budget
+
+
+BENCHMARK_COLUMNS = ["preset", "layout", "images", "seconds", "images_per_sec", "pass_rate"]
+CALIBRATION_COLUMNS = ["num_workers", "threads_per_worker", "seconds", "images_per_sec"]
+
+
+def sample_by_layout(image_paths: List[str], per_layout: int, seed: int = 0) -> Dict[str, List[str]]:
+    """Classify the images and draw up to ``per_layout`` of each layout."""
+
+    by_layout: Dict[str, List[str]] = defaultdict(list)
+    for image_path in image_paths:
+        by_layout[classify_layout(image_path)].append(image_path)
+
+    rng = random.Random(seed)
+    return {
+        layout: sorted(rng.sample(paths, min(per_layout, len(paths))))
+        for layout, paths in sorted(by_layout.items())
+    }
+
+
+def benchmark_preset(preset: str, samples: Dict[str, List[str]], batch_size: int) -> List[List]:
+    """OCR the sampled images with one preset, uncached, and measure speed and validation pass rate."""
+
+    # Without the cascade, so every image is OCR'd with the preset under test
+    init_worker(OCRConfig(preprocess=preset, fast_preset=None))
+    # Model loading isn't part of the per-image cost
+    get_engine()
+
+    rows = []
+    for layout, image_paths in samples.items():
+        passed = 0
+        start = time.perf_counter()
+        for batch in make_batches(image_paths, batch_size):
+            for result in ocr_images(batch):
+                passed += result.ok and result.fight_data.validate()
+        seconds = time.perf_counter() - start
+
+        rows.append(
+            [
+                preset,
+                layout,
+                len(image_paths),
+                round(seconds, 2),
+                round(len(image_paths) / seconds, 2) if seconds else None,
+                round(passed / len(image_paths), 3) if image_paths else None,
+            ]
+        )
+        logging.info(f"{preset} / {layout}: {rows[-1][4]} images/sec, {rows[-1][5]:.1%} valid")
+
+    return rows
+
+
+def run_benchmark(
+    input_path: Path,
+    presets: List[str],
+    per_layout: int = 20,
+    batch_size: int = 8,
+    seed: int = 0,
+    output_path: Optional[Path] = None,
+) -> pd.DataFrame:
+    """Compare preprocessing presets on the same sample of scorecards.
+
+    Reports images/sec and the share of images whose parsed ``FightData``
+    validates, per preset and layout, so the cheapest preset that keeps
+    accuracy can be picked.
+    """
+
+    for preset in presets:
+        if preset not in PREPROCESS_PRESETS:
+            raise ValueError(f"Unknown preprocessing preset: {preset}")
+
+    samples = sample_by_layout(read_images(input_path), per_layout, seed)
+    logging.info("Sampled " + ", ".join(f"{len(paths)} {layout}" for layout, paths in samples.items()))
+
+    rows = [row for preset in presets for row in benchmark_preset(preset, samples, batch_size)]
+    report = pd.DataFrame(rows, columns=BENCHMARK_COLUMNS)
+
+    if output_path is not None:
+        Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+        report.to_csv(output_path, index=False)
+        logging.info(f"Benchmark saved to {output_path}")
+
+    return report
+
+
+def run_golden_benchmark(
+    input_path: Path,
+    labels_path: Path,
+    ocr_config: OCRConfig = OCRConfig(),
+) -> Dict[str, Any]:
+    """OCR the labeled golden set with the current pipeline, uncached, one image at a time.
+
+    Reports throughput, p50/p95 per-image latency, the peak RSS of the process
+    and the share of images with each field right.
+    """
+
+    labels = load_golden_set(labels_path, input_path)
+    logging.info(f"Loaded {len(labels)} golden-set labels from {labels_path}")
+
+    init_worker(ocr_config)
+    # Model loading isn't part of the per-image cost
+    get_engine()
+
+    latencies: List[float] = []
+    matches = []
+    for label in labels:
+        start = time.perf_counter()
+        result = ocr_images([label.image_path])[0]
+        latencies.append(time.perf_counter() - start)
+
+        matches.append(field_matches(label, result.fight_data if result.ok else None))
+        if not all(matches[-1].values()):
+            logging.info(f"Mismatch on {label.image_path}: {result.fight_data or result.error}")
+
+    report: Dict[str, Any] = latency_summary(latencies)
+    report["peak_rss_mb"] = peak_rss_mb()
+    report["accuracy"] = field_accuracy(matches)
+    return report
+
+
+def time_thread_budget(budget: ThreadBudget, image_paths: List[str], batch_size: int) -> float:
+    """Seconds a pool split as ``budget`` takes to OCR the images, uncached."""
+
+    ready = multiprocessing.Semaphore(0)
+    ocr_config = OCRConfig(cpu_threads=budget.threads_per_worker)
+    # Model loading isn't timed: every engine is loaded before the clock starts
+    with Pool(budget.num_workers, initializer=init_warm_worker, initargs=(ocr_config, ready)) as pool:
+        wait_for_workers(ready, budget.num_workers)
+        start = time.perf_counter()
+        for _ in pool.imap_unordered(ocr_images, make_batches(image_paths, batch_size)):
+            pass
+        return time.perf_counter() - start
+
+
+def calibrate_thread_budget(
+    input_path: Path,
+    sample_size: int = 64,
+    batch_size: int = 4,
+    seed: int = 0,
+    budgets: Optional[List[ThreadBudget]] = None,
+) -> pd.DataFrame:
+    """Time every way of splitting the cores between workers and inference threads on the same sample.
+
+    The sample is drawn across layouts, and every split OCRs it with a warm
+    engine. Returns the splits sorted fastest first.
+    """
+
+    image_paths = read_images(input_path)
+    sample = sorted(random.Random(seed).sample(image_paths, min(sample_size, len(image_paths))))
+
+    rows = []
+    for budget in budgets or candidate_budgets():
+        seconds = time_thread_budget(budget, sample, batch_size)
+        rows.append([*budget, round(seconds, 2), round(len(sample) / seconds, 2) if seconds else None])
+        logging.info(
+            f"{budget.num_workers} workers x {budget.threads_per_worker} threads: {rows[-1][3]} images/sec"
+        )
+
+    report = pd.DataFrame(rows, columns=CALIBRATION_COLUMNS)
+    return report.sort_values("images_per_sec", ascending=False, ignore_index=True)
+
+
+def print_golden_report(report: Dict[str, Any], baseline: Optional[Dict[str, Any]]) -> None:
+    """Print the report next to the baseline, metric by metric."""
+
+    metrics = ["images", "images_per_sec", "p50_latency_s", "p95_latency_s", "peak_rss_mb"]
+    rows = [[metric, report[metric], baseline.get(metric) if baseline else None] for metric in metrics]
+    rows += [
+        [f"accuracy.{name}", value, baseline.get("accuracy", {}).get(name) if baseline else None]
+        for name, value in report["accuracy"].items()
+    ]
+    print(pd.DataFrame(rows, columns=["metric", "current", "baseline"]).to_string(index=False))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark scorecard OCR.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    presets_parser = subparsers.add_parser("presets", help="Compare image preprocessing presets")
+    presets_parser.add_argument(
+        "--presets",
+        nargs="+",
+        default=list(PREPROCESS_PRESETS),
+        choices=list(PREPROCESS_PRESETS),
+        help="Presets to compare (default: all)",
+    )
+    presets_parser.add_argument("--per-layout", type=int, default=20, help="Images sampled from each layout")
+    presets_parser.add_argument("--batch-size", type=int, default=8, help="Images per OCR batch")
+    presets_parser.add_argument("--seed", type=int, default=0, help="Seed of the image sample")
+    presets_parser.add_argument("--output", type=Path, default=None, help="Also save the report as CSV")
+
+    golden_parser = subparsers.add_parser(
+        "golden", help="Measure speed and field accuracy on the labeled golden set"
+    )
+    golden_parser.add_argument(
+        "--mode",
+        default="accurate",
+        choices=list(OCR_MODES),
+        help="OCR models to measure. Accuracy is compared to the same baseline whatever the mode",
+    )
+    golden_parser.add_argument(
+        "--save-baseline",
+        action="store_true",
+        help="Store this run as the baseline later runs are compared against",
+    )
+
+    threads_parser = subparsers.add_parser(
+        "threads", help="Find the fastest split of the cores between workers and inference threads"
+    )
+    threads_parser.add_argument("--sample-size", type=int, default=64, help="Images OCR'd by every split")
+    threads_parser.add_argument("--batch-size", type=int, default=4, help="Images per OCR batch")
+    threads_parser.add_argument("--seed", type=int, default=0, help="Seed of the image sample")
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    path_config = PathConfig()
+
+    if args.command == "presets":
+        report = run_benchmark(
+            path_config.INPUT_PATH,
+            args.presets,
+            per_layout=args.per_layout,
+            batch_size=args.batch_size,
+            seed=args.seed,
+            output_path=args.output,
+        )
+        print(report.to_string(index=False))
+
+    elif args.command == "threads":
+        report = calibrate_thread_budget(
+            path_config.INPUT_PATH, sample_size=args.sample_size, batch_size=args.batch_size, seed=args.seed
+        )
+        print(report.to_string(index=False))
+
+        best = ThreadBudget(int(report.loc[0, "num_workers"]), int(report.loc[0, "threads_per_worker"]))
+        save_thread_budget(best, path_config.THREAD_BUDGET_PATH)
+        logging.info(f"Saved {best} to {path_config.THREAD_BUDGET_PATH}, ocr.py uses it by default")
+
+    else:
+        report = run_golden_benchmark(
+            path_config.INPUT_PATH, path_config.GOLDEN_LABELS_PATH, OCRConfig(mode=args.mode)
+        )
+        baseline = load_baseline(path_config.GOLDEN_BASELINE_PATH)
+        print_golden_report(report, baseline)
+
+        if args.save_baseline:
+            save_baseline(report, path_config.GOLDEN_BASELINE_PATH)
+            logging.info(f"Baseline saved to {path_config.GOLDEN_BASELINE_PATH}")
+        elif baseline is not None:
+            regressions = compare_to_baseline(report, baseline)
+            for regression in regressions:
+                logging.error(f"Regression against the baseline: {regression}")
+            sys.exit(1 if regressions else 0)
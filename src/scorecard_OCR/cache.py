@@ -0,0 +1,102 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+from importlib.metadata import PackageNotFoundError, version
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+
+def image_digest(image_path: str) -> str:
+    """SHA-256 of the image file contents."""
+
+    digest = hashlib.sha256()
+    with open(image_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def engine_fingerprint(engine_kwargs: Dict[str, Any]) -> str:
+    """Identify the OCR engine, its installed version and its parameters.
+
+    Any change to one of them yields a new fingerprint, so results produced
+    by a different engine setup are never served from the cache.
+    """
+
+    try:
+        engine_version = version("paddleocr")
+    except PackageNotFoundError:
+        engine_version = "unknown"
+
+    payload = json.dumps(
+        {"engine": "paddleocr", "version": engine_version, "params": engine_kwargs},
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+class OCRCache:
+    """Persistent on-disk cache of raw OCR results.
+
+    Entries are keyed by the SHA-256 of the image and stored under a directory
+    named after the engine fingerprint::
+
+        <cache_dir>/<fingerprint>/<digest[:2]>/<digest>.json
+    """
+
+    def __init__(self, cache_dir: Path, fingerprint: str) -> None:
+        self.cache_dir = Path(cache_dir)
+        self.fingerprint = fingerprint
+        self.root = self.cache_dir / fingerprint
+
+    def _entry_path(self, digest: str) -> Path:
+        return self.root / digest[:2] / f"{digest}.json"
+
+    def get(self, digest: str) -> Optional[Any]:
+        """Return the stored OCR result for the image digest, or None on a miss."""
+
+        entry_path = self._entry_path(digest)
+        try:
+            with open(entry_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logging.warning(f"Dropping unreadable cache entry {entry_path}: {e}")
+            entry_path.unlink(missing_ok=True)
+            return None
+
+    def put(self, digest: str, result: Any) -> None:
+        """Store an OCR result. The write is atomic so concurrent workers never see partial entries."""
+
+        entry_path = self._entry_path(digest)
+        entry_path.parent.mkdir(parents=True, exist_ok=True)
+
+        fd, tmp_path = tempfile.mkstemp(dir=entry_path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(result, f, default=float)
+            os.replace(tmp_path, entry_path)
+        except BaseException:
+            Path(tmp_path).unlink(missing_ok=True)
+            raise
+
+    def evict_stale(self) -> int:
+        """Remove entries written under any other engine fingerprint. Returns the number of evicted sets."""
+
+        if not self.cache_dir.exists():
+            return 0
+
+        evicted = 0
+        for entry in self.cache_dir.iterdir():
+            if entry.is_dir() and entry.name != self.fingerprint:
+                shutil.rmtree(entry, ignore_errors=True)
+                evicted += 1
+
+        if evicted:
+            logging.info(f"Evicted {evicted} stale OCR cache set(s) from {self.cache_dir}")
+        return evicted
@@ -0,0 +1,69 @@
+import csv
+import os
+from pathlib import Path
+from typing import Iterable, List
+
+
+class CheckpointLedger:
+    """Append-only record of the images whose results are already in the output.
+
+    One image path per line, flushed to disk after every checkpoint so a killed
+    run loses at most the batch that was in flight.
+    """
+
+    def __init__(self, ledger_path: Path) -> None:
+        self.ledger_path = Path(ledger_path)
+
+    def completed(self) -> List[str]:
+        """Image paths recorded so far, in the order their results were written."""
+
+        if not self.ledger_path.exists():
+            return []
+        with open(self.ledger_path, "r", encoding="utf-8") as f:
+            # A crash mid-write can leave a partial last line without its newline
+            return [line[:-1] for line in f if line.endswith("\n")]
+
+    def record(self, image_paths: Iterable[str]) -> None:
+        """Mark images as done once their results are safely written."""
+
+        self.ledger_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.ledger_path, "a", encoding="utf-8") as f:
+            f.writelines(f"{image_path}\n" for image_path in image_paths)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def reset(self) -> None:
+        """Forget all completed images."""
+
+        self.ledger_path.unlink(missing_ok=True)
+
+
+def ledger_path_for(output_path: Path) -> Path:
+    """Ledger kept next to the output file it checkpoints."""
+
+    output_path = Path(output_path)
+    return output_path.with_name(f"{output_path.name}.done")
+
+
+def partial_path_for(output_path: Path) -> Path:
+    """Working file a run streams into, moved over the output once the run completes."""
+
+    output_path = Path(output_path)
+    return output_path.with_name(f"{output_path.name}.partial")
+
+
+def truncate_rows(csv_path: Path, num_rows: int) -> None:
+    """Keep the header and the first ``num_rows`` rows of a CSV file.
+
+    Rows written after the last ledger update belong to images that will be
+    processed again on resume, so they are dropped to avoid duplicates.
+    """
+
+    with open(csv_path, "r", newline="", encoding="utf-8") as f:
+        rows = list(csv.reader(f))
+
+    if len(rows) - 1 <= num_rows:
+        return
+
+    with open(csv_path, "w", newline="", encoding="utf-8") as f:
+        csv.writer(f, lineterminator="\n").writerows(rows[: num_rows + 1])
@@ -0,0 +1,102 @@
+import argparse
+import csv
+import json
+import socket
+import sys
+from pathlib import Path
+from typing import IO, Any, Dict, List
+
+from config import PathConfig
+
+
+# Longest the client waits for the daemon to answer a job
+DEFAULT_TIMEOUT = 600
+
+
+def send_message(stream: IO[bytes], message: Dict[str, Any]) -> None:
+    """Write one message, a JSON object on its own line."""
+
+    stream.write((json.dumps(message) + "\n").encode("utf-8"))
+    stream.flush()
+
+
+def receive_message(stream: IO[bytes]) -> Dict[str, Any]:
+    """Read one message written by ``send_message``."""
+
+    line = stream.readline()
+    if not line:
+        raise ConnectionError("Connection closed before a message arrived")
+    return json.loads(line)
+
+
+def request(
+    message: Dict[str, Any],
+    socket_path: Path = PathConfig.DAEMON_SOCKET_PATH,
+    timeout: float = DEFAULT_TIMEOUT,
+) -> Dict[str, Any]:
+    """Send a request to the OCR daemon and return its response."""
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        try:
+            sock.connect(str(socket_path))
+        except (FileNotFoundError, ConnectionRefusedError):
+            raise ConnectionError(f"No OCR daemon listening on {socket_path}, start it with daemon.py")
+
+        with sock.makefile("rwb") as stream:
+            send_message(stream, message)
+            response = receive_message(stream)
+
+    if "error" in response:
+        raise RuntimeError(f"OCR daemon failed: {response['error']}")
+    return response
+
+
+def ocr_remote(image_paths: List[str], socket_path: Path = PathConfig.DAEMON_SOCKET_PATH) -> Dict[str, Any]:
+    """OCR images on the daemon. Returns the result columns and one record per image, in order."""
+
+    # The daemon may run from another directory
+    image_paths = [str(Path(image_path).resolve()) for image_path in image_paths]
+    return request({"command": "ocr", "image_paths": image_paths}, socket_path)
+
+
+def write_results(response: Dict[str, Any], output: IO[str]) -> None:
+    """Write the parsed images as CSV rows, with the columns of ocr.py's output plus the image path."""
+
+    writer = csv.writer(output)
+    writer.writerow(["image_path"] + response["columns"])
+    for record in response["results"]:
+        if record["ok"]:
+            writer.writerow([record["image_path"]] + record["row"])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="OCR scorecard images on a running OCR daemon.")
+    parser.add_argument("images", nargs="*", help="Scorecard images to OCR")
+    parser.add_argument("--output", type=Path, default=None, help="Write the CSV here instead of stdout")
+    parser.add_argument("--socket", type=Path, default=PathConfig.DAEMON_SOCKET_PATH, help="Daemon socket")
+    parser.add_argument("--status", action="store_true", help="Check that the daemon is up")
+    parser.add_argument("--shutdown", action="store_true", help="Stop the daemon")
+    args = parser.parse_args()
+
+    try:
+        if args.status or args.shutdown:
+            response = request({"command": "shutdown" if args.shutdown else "status"}, args.socket)
+            print(json.dumps(response))
+            sys.exit(0)
+
+        response = ocr_remote(args.images, args.socket)
+        if args.output is not None:
+            with open(args.output, "w", newline="", encoding="utf-8") as f:
+                write_results(response, f)
+        else:
+            write_results(response, sys.stdout)
+
+        failed = [record for record in response["results"] if not record["ok"]]
+        for record in failed:
+            print(f"{record['image_path']}: {record['stage']} failed: {record['error']}", file=sys.stderr)
+        sys.exit(1 if failed else 0)
+
+    except (ConnectionError, RuntimeError, socket.timeout) as e:
+        print(e, file=sys.stderr)
+        sys.exit(2)
@@ -1,4 +1,7 @@
+import tempfile
+from dataclasses import dataclass
 from pathlib import Path
+from typing import Any, Dict, NamedTuple, Optional
 
 
 class PathConfig:
@@ -6,16 +9,100 @@ class PathConfig:
 
     PROJECT_ROOT: Path = Path(__file__).resolve().parents[2]
 
-    INPUT_PATH: Path = (
-        PROJECT_ROOT / "data/scorecards/scraped_scorecard_images/new_version_scorecards_v1/"
-    )
+    # Every scorecard generation is read from its subfolder and routed by layout
+    INPUT_PATH: Path = PROJECT_ROOT / "data/scorecards/scraped_scorecard_images/"
     OUTPUT_PATH: Path = (
-        PROJECT_ROOT / "data/scorecards/OCR_parsed_scorecards/parsed_scorecards_new_version.csv"
+        PROJECT_ROOT / "data/scorecards/OCR_parsed_scorecards/parsed_scorecards.csv"
     )
+    CACHE_PATH: Path = PROJECT_ROOT / "data/scorecards/OCR_cache/"
+    TOKENS_PATH: Path = PROJECT_ROOT / "data/scorecards/OCR_tokens/tokens.npz"
+    # Decoded and preprocessed images, memory-mapped by later runs, see image_cache.py
+    IMAGE_CACHE_PATH: Path = PROJECT_ROOT / "data/scorecards/image_cache/"
+    # Workers and threads per worker calibrated for this host, see benchmark.py threads
+    THREAD_BUDGET_PATH: Path = PROJECT_ROOT / "data/scorecards/OCR_cache/thread_budget.json"
+    # Unix socket of the OCR daemon, see daemon.py
+    DAEMON_SOCKET_PATH: Path = Path(tempfile.gettempdir()) / "scorecard_ocr.sock"
+
+    # Hand-labeled sample of every layout, and the benchmark results to compare against
+    GOLDEN_LABELS_PATH: Path = PROJECT_ROOT / "data/scorecards/golden_set/labels.csv"
+    GOLDEN_BASELINE_PATH: Path = PROJECT_ROOT / "data/scorecards/golden_set/baseline.json"
 
     def validate_paths(self) -> None:
         """Validate for path existence"""
 
         if not self.INPUT_PATH.exists():
             raise ValueError(f"Input path does not exist: {self.INPUT_PATH}")
-        self.OUTPUT_PATH.parent.mkdir(parents=True, exist_ok=True)
\ No newline at end of file
+        self.OUTPUT_PATH.parent.mkdir(parents=True, exist_ok=True)
+
+
+class OCRMode(NamedTuple):
+    """Models and inference settings of an OCR mode. None keeps PaddleOCR's default."""
+
+    ocr_version: Optional[str] = None
+    # Download URLs of the detection and recognition models
+    det_model_url: Optional[str] = None
+    rec_model_url: Optional[str] = None
+    # oneDNN kernels, needed for the quantized models to run fast on CPU
+    enable_mkldnn: bool = False
+
+
+# Scorecards only hold names, digits, dates and a few labels, so the small
+# int8-quantized PP-OCRv3 models hold up on them. Check with benchmark.py golden --mode fast
+OCR_MODES: Dict[str, OCRMode] = {
+    "accurate": OCRMode(),
+    "fast": OCRMode(
+        ocr_version="PP-OCRv3",
+        det_model_url="https://paddleocr.bj.bcebos.com/PP-OCRv3/english/en_PP-OCRv3_det_slim_infer.tar",
+        rec_model_url="https://paddleocr.bj.bcebos.com/PP-OCRv3/english/en_PP-OCRv3_rec_slim_infer.tar",
+        enable_mkldnn=True,
+    ),
+}
+
+
+@dataclass(frozen=True)
+class OCRConfig:
+    """OCR settings, handed to every worker at pool start-up."""
+
+    # PaddleOCR engine
+    use_angle_cls: bool = False
+    lang: str = "en"
+    # Models the engine runs, see OCR_MODES
+    mode: str = "accurate"
+    # Inference threads of every worker's engine, None for PaddleOCR's default.
+    # Left out of engine_kwargs, since it doesn't change the results
+    cpu_threads: Optional[int] = None
+
+    # Recognize only the template regions of known layouts, full page as fallback
+    use_templates: bool = True
+
+    # Per-layout image preprocessing preset, see preprocess.PREPROCESS_PRESETS
+    preprocess: str = "none"
+
+    # Cascade: a cheap pass with this preprocessing preset first, the full pass
+    # only for images it can't parse with every field at least ``min_confidence``
+    fast_preset: Optional[str] = "fastest"
+    min_confidence: float = 0.85
+
+    def engine_kwargs(self) -> Dict[str, Any]:
+        """Keyword arguments for the PaddleOCR constructor that change its results.
+
+        Models of the mode are given by URL, ``models.model_dir_kwargs``
+        resolves them to the downloaded model directories.
+        """
+
+        kwargs: Dict[str, Any] = {"use_angle_cls": self.use_angle_cls, "lang": self.lang}
+        mode = OCR_MODES[self.mode]
+        if mode.ocr_version is not None:
+            kwargs["ocr_version"] = mode.ocr_version
+        if mode.det_model_url is not None:
+            kwargs["det_model_url"] = mode.det_model_url
+        if mode.rec_model_url is not None:
+            kwargs["rec_model_url"] = mode.rec_model_url
+        if mode.enable_mkldnn:
+            kwargs["enable_mkldnn"] = True
+        return kwargs
+
+    def runtime_kwargs(self) -> Dict[str, Any]:
+        """PaddleOCR constructor arguments that only affect speed, not results."""
+
+        return {"cpu_threads": self.cpu_threads} if self.cpu_threads is not None else {}
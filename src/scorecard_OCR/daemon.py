@@ -0,0 +1,182 @@
+import argparse
+import logging
+import multiprocessing
+import os
+import socket
+import socketserver
+import threading
+from dataclasses import replace
+from multiprocessing import Pool
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from backends import OCRBackend
+from batching import auto_batch_size, make_batches, make_chunks
+from client import receive_message, send_message
+from config import OCR_MODES, OCRConfig, PathConfig
+from ocr import (
+    RESULT_COLUMNS,
+    ImageResult,
+    abandoned_batch,
+    init_warm_worker,
+    ocr_batches,
+    ocr_images,
+    wait_for_workers,
+)
+from thread_budget import load_thread_budget, plan_thread_budget
+from watchdog import TaskTracker, WorkerWatchdog, watch_results
+
+
+def result_record(result: ImageResult) -> Dict[str, Any]:
+    """JSON form of an image's result. ``row`` follows ``RESULT_COLUMNS``, like ocr.py's output."""
+
+    return {
+        "image_path": result.image_path,
+        "layout": result.layout,
+        "ok": result.ok,
+        "row": result.fight_data.to_list() if result.ok else None,
+        "stage": result.stage,
+        "error": result.error,
+    }
+
+
+def socket_in_use(socket_path: Path) -> bool:
+    """Whether a daemon is listening on the socket, rather than it being left over from a crashed one."""
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        try:
+            sock.connect(str(socket_path))
+            return True
+        except (FileNotFoundError, ConnectionRefusedError):
+            return False
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    def handle(self) -> None:
+        try:
+            response = self.server.respond(receive_message(self.rfile))
+        except Exception as e:
+            logging.error(f"Request failed: {e}")
+            response = {"error": str(e)}
+        send_message(self.wfile, response)
+
+
+class OCRDaemon(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Serves OCR jobs over a Unix socket, one JSON request and response per connection.
+
+    Requests are ``{"command": "ocr", "image_paths": [...]}``, ``{"command": "status"}``
+    or ``{"command": "shutdown"}``. Jobs of concurrent clients share ``run_ocr``.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, socket_path: Path, run_ocr: Callable[[List[str]], List[ImageResult]]) -> None:
+        self.socket_path = Path(socket_path)
+        self.run_ocr = run_ocr
+
+        if self.socket_path.exists():
+            if socket_in_use(self.socket_path):
+                raise RuntimeError(f"An OCR daemon is already listening on {self.socket_path}")
+            self.socket_path.unlink()
+        super().__init__(str(self.socket_path), _RequestHandler)
+
+    def respond(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        command = request.get("command")
+        if command == "ocr":
+            results = self.run_ocr(request["image_paths"])
+            logging.info(f"OCR'd {len(results)} images, {sum(not result.ok for result in results)} failed")
+            return {"columns": RESULT_COLUMNS, "results": [result_record(result) for result in results]}
+        if command == "status":
+            return {"pid": os.getpid(), "socket": str(self.socket_path)}
+        if command == "shutdown":
+            # shutdown() waits for serve_forever to return, which can't happen from a request
+            threading.Thread(target=self.shutdown).start()
+            return {"stopping": True}
+        return {"error": f"Unknown command: {command}"}
+
+    def server_close(self) -> None:
+        super().server_close()
+        self.socket_path.unlink(missing_ok=True)
+
+
+def serve(
+    socket_path: Path,
+    ocr_config: OCRConfig = OCRConfig(),
+    cache_dir: Optional[Path] = None,
+    num_workers: Optional[int] = None,
+    threads_per_worker: Optional[int] = None,
+    backend: Optional[OCRBackend] = None,
+) -> None:
+    """Start warm OCR workers and serve jobs on ``socket_path`` until told to shut down.
+
+    Every worker loads its engine before the socket opens, so a job only
+    pays for OCR itself. A job's images are spread over the workers in small
+    batches, so even a handful of images is OCR'd in parallel.
+
+    Workers are watched like those of ``process_scorecards``: a batch whose
+    worker dies is run again, and one that keeps killing its worker comes
+    back as failed. The workers report to one queue, so jobs run one at a
+    time, each on all the workers.
+
+    ``backend`` replaces PaddleOCR in every worker, as in ``process_scorecards``.
+    """
+
+    budget = plan_thread_budget(num_workers, threads_per_worker or ocr_config.cpu_threads)
+    ocr_config = replace(ocr_config, cpu_threads=budget.threads_per_worker)
+    ready = multiprocessing.Semaphore(0)
+    reports = multiprocessing.SimpleQueue()
+    job_lock = threading.Lock()
+
+    initargs = (ocr_config, ready, cache_dir, backend, WorkerWatchdog(reports))
+    with Pool(budget.num_workers, initializer=init_warm_worker, initargs=initargs) as pool:
+        logging.info(f"Loading {budget.num_workers} OCR engines")
+        wait_for_workers(ready, budget.num_workers)
+
+        def run_ocr(image_paths: List[str]) -> List[ImageResult]:
+            # Batches are known by their first image, so every image is OCR'd once
+            unique_paths = list(dict.fromkeys(image_paths))
+            batches = make_batches(unique_paths, auto_batch_size(len(unique_paths), budget.num_workers))
+            batches_by_key = {batch[0]: batch for batch in batches}
+            with job_lock:
+                results = watch_results(
+                    pool.imap_unordered(ocr_batches, make_chunks(batches, 1)),
+                    TaskTracker(reports),
+                    list(make_chunks(batches_by_key, 1)),
+                    key_of=lambda batch_results: batch_results[0].image_path,
+                    rerun=lambda key: pool.apply_async(ocr_images, (batches_by_key[key],)),
+                    abandon=lambda key: abandoned_batch(batches_by_key[key]),
+                )
+                results_by_path = {result.image_path: result for batch in results for result in batch}
+            return [results_by_path[image_path] for image_path in image_paths]
+
+        with OCRDaemon(socket_path, run_ocr) as daemon:
+            logging.info(f"OCR daemon listening on {socket_path}")
+            try:
+                daemon.serve_forever()
+            except KeyboardInterrupt:
+                pass
+    logging.info("OCR daemon stopped")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Keep OCR engines warm and serve jobs from client.py.")
+    parser.add_argument(
+        "--socket", type=Path, default=PathConfig.DAEMON_SOCKET_PATH, help="Socket to listen on"
+    )
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: derived)")
+    parser.add_argument("--threads-per-worker", type=int, default=None, help="Inference threads per worker")
+    parser.add_argument("--mode", default="accurate", choices=list(OCR_MODES), help="OCR models")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    num_workers, threads_per_worker = args.workers, args.threads_per_worker
+    calibrated = load_thread_budget(PathConfig.THREAD_BUDGET_PATH)
+    if calibrated is not None and num_workers is None and threads_per_worker is None:
+        num_workers, threads_per_worker = calibrated
+    serve(
+        args.socket,
+        OCRConfig(mode=args.mode),
+        cache_dir=PathConfig.CACHE_PATH,
+        num_workers=num_workers,
+        threads_per_worker=threads_per_worker,
+    )
@@ -0,0 +1,103 @@
+import logging
+from typing import Dict, List, Optional
+
+import cv2
+import numpy as np
+
+
+# Side of the difference hash grid, the hash has HASH_SIZE ** 2 bits
+HASH_SIZE = 16
+# Hashes at most this many bits apart make a candidate pair. JPEG re-encodes of a
+# scorecard stay within 7 bits, but different fights on the same layout can be 2 bits apart
+MAX_HASH_DISTANCE = 10
+# Candidates are confirmed on the quarter-scale grayscale pixels: at most this share may
+# differ by more than PIXEL_TOLERANCE. Re-encodes differ on none, different fights on 0.5% or more
+MAX_DIFFERING_PIXELS = 0.002
+PIXEL_TOLERANCE = 48
+
+# Bits set in every byte value
+_POPCOUNT = np.array([bin(value).count("1") for value in range(256)], dtype=np.uint16)
+
+
+def perceptual_hash(image_path: str) -> Optional[np.ndarray]:
+    """Difference hash of the image, packed into bytes. None if the image can't be read.
+
+    Computed on the 1/8 scale JPEG decode, so it costs a few milliseconds.
+    """
+
+    thumbnail = cv2.imread(image_path, cv2.IMREAD_REDUCED_GRAYSCALE_8)
+    if thumbnail is None:
+        return None
+
+    pixels = cv2.resize(thumbnail, (HASH_SIZE + 1, HASH_SIZE), interpolation=cv2.INTER_AREA)
+    return np.packbits(pixels[:, 1:] > pixels[:, :-1])
+
+
+def hash_distances(hashes: np.ndarray, idx: int) -> np.ndarray:
+    """Hamming distance from hash ``idx`` to every hash."""
+
+    return _POPCOUNT[np.bitwise_xor(hashes, hashes[idx])].sum(axis=1)
+
+
+class _PixelComparer:
+    """Confirms candidate pairs on their pixels, decoding each image at most once."""
+
+    def __init__(self) -> None:
+        self._pixels: Dict[str, Optional[np.ndarray]] = {}
+
+    def _load(self, image_path: str) -> Optional[np.ndarray]:
+        if image_path not in self._pixels:
+            pixels = cv2.imread(image_path, cv2.IMREAD_REDUCED_GRAYSCALE_4)
+            self._pixels[image_path] = None if pixels is None else pixels.astype(np.int16)
+        return self._pixels[image_path]
+
+    def same(self, image_path: str, other_path: str) -> bool:
+        pixels, other = self._load(image_path), self._load(other_path)
+        if pixels is None or other is None or pixels.shape != other.shape:
+            return False
+        return (np.abs(pixels - other) > PIXEL_TOLERANCE).mean() <= MAX_DIFFERING_PIXELS
+
+
+def find_duplicates(image_paths: List[str]) -> Dict[str, str]:
+    """Group near-identical images and map every duplicate to its group's representative.
+
+    Perceptual hashes propose candidate pairs and a pixel comparison confirms
+    them, since scorecards of different fights only differ in their text. The
+    representative of a group is its first image in ``image_paths`` order.
+    Images that can't be read are left out, their errors surface during OCR.
+    """
+
+    readable: List[str] = []
+    hashes: List[np.ndarray] = []
+    for image_path in image_paths:
+        image_hash = perceptual_hash(image_path)
+        if image_hash is not None:
+            readable.append(image_path)
+            hashes.append(image_hash)
+
+    if not readable:
+        return {}
+
+    hash_matrix = np.stack(hashes)
+    comparer = _PixelComparer()
+    # Union-find over the confirmed pairs, every root is the earliest image of its group
+    parents = list(range(len(readable)))
+
+    def root(idx: int) -> int:
+        while parents[idx] != idx:
+            parents[idx] = parents[parents[idx]]
+            idx = parents[idx]
+        return idx
+
+    for idx in range(len(readable)):
+        distances = hash_distances(hash_matrix, idx)
+        for other in np.flatnonzero(distances[idx + 1 :] <= MAX_HASH_DISTANCE) + idx + 1:
+            group, other_group = root(idx), root(other)
+            if group != other_group and comparer.same(readable[idx], readable[other]):
+                parents[max(group, other_group)] = min(group, other_group)
+
+    duplicates = {
+        readable[idx]: readable[root(idx)] for idx in range(len(readable)) if root(idx) != idx
+    }
+    logging.info(f"Found {len(duplicates)} duplicate images among {len(image_paths)}")
+    return duplicates
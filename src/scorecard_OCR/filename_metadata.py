@@ -0,0 +1,127 @@
+import re
+import unicodedata
+from pathlib import Path
+from typing import List, NamedTuple, Optional, Tuple
+
+from rapidfuzz.distance import Levenshtein
+
+
+# Where the names were taken from, recorded with every result
+NAME_SOURCE_OCR = "ocr"
+NAME_SOURCE_FILENAME = "filename"
+# OCR'd names kept because the file name disagrees with them
+NAME_SOURCE_CONFLICT = "conflict"
+
+# Edit distance, as a fraction of a word's length, within which an OCR'd word agrees with the file name's
+MAX_NAME_DISTANCE_RATIO = 0.34
+
+# Scraped commission cards: "alexander-volkanovski-max-holloway-ufc-251-scorecard.jpg"
+SLUG_PATTERN = re.compile(
+    r"^(?P<fighters>[a-z0-9-]+?)-(?P<event>ufc(?:-[a-z]+)*-\d+)-scorecard[a-z]*(?:[-_]\d+)?$"
+)
+# Downloaded UFC cards: "UFC 270 Ngannou vs. Gane - Scorecards - Moreno vs. Figueiredo_0.jpg", surnames only
+TITLE_PATTERN = re.compile(
+    r"^(?:\d+-)?(?P<event>.+?) - Scorecards - (?P<red>.+?) vs\.? (?P<blue>.+?)(?:_\d+)?$", re.IGNORECASE
+)
+
+
+class FilenameMetadata(NamedTuple):
+    """Fight details encoded in a scorecard's file name."""
+
+    # E.g. "UFC 251" or "UFC 270 Ngannou vs. Gane"
+    event: str
+    # Red and blue names the file name can be read as, uppercase. A slug doesn't
+    # mark where the red name ends, so it gives one pair per split of its words
+    fighters: List[Tuple[str, str]]
+    # Full names, or only the surnames
+    full_names: bool
+
+
+def parse_filename(image_path: str) -> Optional[FilenameMetadata]:
+    """Names and event from the file name, None for file names that don't encode them, like "645.jpg"."""
+
+    stem = Path(image_path).stem
+    slug = SLUG_PATTERN.match(stem)
+    if slug is not None:
+        words = slug["fighters"].upper().split("-")
+        fighters = [(" ".join(words[:split]), " ".join(words[split:])) for split in range(1, len(words))]
+        event = slug["event"].upper().replace("-", " ")
+        return FilenameMetadata(event, fighters, full_names=True) if fighters else None
+
+    title = TITLE_PATTERN.match(stem)
+    if title is not None:
+        fighters = [(title["red"].strip().upper(), title["blue"].strip().upper())]
+        return FilenameMetadata(title["event"].strip(), fighters, full_names=False)
+    return None
+
+
+def letters(name: str) -> str:
+    """A name reduced to its letters and spaces, without accents, for comparing spellings.
+
+    Hyphens separate words, as in slugs.
+    """
+
+    text = unicodedata.normalize("NFKD", name).encode("ascii", "ignore").decode("ascii").upper()
+    return " ".join(re.sub(r"[^A-Z ]", "", text.replace("-", " ")).split())
+
+
+def names_agree(ocr_name: str, filename_name: str) -> bool:
+    """Whether an OCR'd name reads as the file name's word for word, up to a few misread characters.
+
+    A different form of the name, like "ALEX" for "ALEXANDER", doesn't agree.
+    """
+
+    ocr_words, expected_words = letters(ocr_name).split(), letters(filename_name).split()
+    if len(ocr_words) != len(expected_words):
+        return False
+    for ocr_word, expected in zip(ocr_words, expected_words):
+        max_distance = int(MAX_NAME_DISTANCE_RATIO * len(expected))
+        if Levenshtein.distance(ocr_word, expected, score_cutoff=max_distance) > max_distance:
+            return False
+    return True
+
+
+def with_surname(ocr_name: str, surname: str) -> Optional[str]:
+    """The OCR'd full name with its surname spelled as in the file name, None if it doesn't end with it."""
+
+    words = ocr_name.split()
+    count = len(surname.split())
+    if len(words) <= count or not names_agree(" ".join(words[-count:]), surname):
+        return None
+    return " ".join(words[:-count] + [surname])
+
+
+def reconcile_names(metadata: FilenameMetadata, red_ocr: str, blue_ocr: str) -> Tuple[str, str, str]:
+    """Red and blue names from the file name, cross-checked with the OCR'd names ("-" if unread).
+
+    Full names come from the file name; of a slug's word splits, the one the
+    OCR'd names agree with the most is used. An OCR'd name spelled the same
+    but for punctuation and accents, which slugs drop, is kept as read.
+    Surnames only correct the end of the OCR'd full names. When an OCR'd
+    name disagrees with the file name, both OCR'd names are kept and only
+    the conflict is recorded. Returns the names and where they came from.
+    """
+
+    ocr_names = (red_ocr, blue_ocr)
+    if metadata.full_names:
+
+        def disagreement(pair: Tuple[str, str]) -> Tuple[int, int]:
+            agreeing = sum(names_agree(ocr, name) for ocr, name in zip(ocr_names, pair) if ocr != "-")
+            # Without OCR'd names to go by, two names of similar length are the likeliest split
+            return -agreeing, abs(len(pair[0].split()) - len(pair[1].split()))
+
+        pair = min(metadata.fighters, key=disagreement)
+        if any(not names_agree(ocr, name) for ocr, name in zip(ocr_names, pair) if ocr != "-"):
+            return red_ocr, blue_ocr, NAME_SOURCE_CONFLICT
+        red, blue = [
+            ocr if ocr != "-" and letters(ocr) == letters(name) else name
+            for ocr, name in zip(ocr_names, pair)
+        ]
+        return red, blue, NAME_SOURCE_FILENAME
+
+    red_surname, blue_surname = metadata.fighters[0]
+    red = with_surname(red_ocr, red_surname) if red_ocr != "-" else red_surname
+    blue = with_surname(blue_ocr, blue_surname) if blue_ocr != "-" else blue_surname
+    if red is None or blue is None:
+        return red_ocr, blue_ocr, NAME_SOURCE_CONFLICT
+    return red, blue, NAME_SOURCE_FILENAME
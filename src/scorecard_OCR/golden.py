@@ -0,0 +1,143 @@
+import csv
+import json
+import re
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional
+
+import numpy as np
+
+
+# Fields scored against the labels, same names as the FightData attributes
+SCORED_FIELDS = [
+    "red_fighter_name",
+    "blue_fighter_name",
+    "date",
+    "red_fighter_total_pts",
+    "blue_fighter_total_pts",
+]
+
+# Allowed slack before a benchmark result counts as a regression against the baseline
+MAX_THROUGHPUT_DROP = 0.10
+MAX_LATENCY_INCREASE = 0.10
+MAX_RSS_INCREASE = 0.10
+MAX_ACCURACY_DROP = 0.0
+
+
+class GoldenLabel(NamedTuple):
+    """Expected parse of one golden-set scorecard."""
+
+    image_path: str
+    layout: str
+    red_fighter_name: str
+    blue_fighter_name: str
+    date: str
+    # One total per judge, "-" for a judge without a total (fight stopped early)
+    red_fighter_total_pts: List[str]
+    blue_fighter_total_pts: List[str]
+
+
+def load_golden_set(labels_path: Path, images_root: Path) -> List[GoldenLabel]:
+    """Read the golden-set labels. Image paths are stored relative to ``images_root``."""
+
+    with open(labels_path, "r", newline="", encoding="utf-8") as f:
+        return [
+            GoldenLabel(
+                image_path=str(Path(images_root) / row["image_path"]),
+                layout=row["layout"],
+                red_fighter_name=row["red_fighter_name"],
+                blue_fighter_name=row["blue_fighter_name"],
+                date=row["date"],
+                red_fighter_total_pts=row["red_fighter_total_pts"].split(),
+                blue_fighter_total_pts=row["blue_fighter_total_pts"].split(),
+            )
+            for row in csv.DictReader(f)
+        ]
+
+
+def normalize_field(name: str, value: Any) -> Any:
+    """Make a field comparable: names ignore case and spacing, dates leading zeros."""
+
+    if name == "date":
+        return tuple(int(part) for part in re.findall(r"\d+", str(value)))
+    if name.endswith("_pts"):
+        return [str(points).strip() for points in value]
+    return " ".join(str(value).upper().split())
+
+
+def field_matches(label: GoldenLabel, fight_data: Optional[Any]) -> Dict[str, bool]:
+    """Which fields of a parsed scorecard match its label. Every field of a failed image is wrong."""
+
+    return {
+        name: fight_data is not None
+        and normalize_field(name, getattr(fight_data, name)) == normalize_field(name, getattr(label, name))
+        for name in SCORED_FIELDS
+    }
+
+
+def field_accuracy(matches: List[Dict[str, bool]]) -> Dict[str, float]:
+    """Share of images with each field right, and with all of them right."""
+
+    if not matches:
+        return {}
+    accuracy = {name: float(np.mean([match[name] for match in matches])) for name in SCORED_FIELDS}
+    accuracy["all_fields"] = float(np.mean([all(match.values()) for match in matches]))
+    return accuracy
+
+
+def latency_summary(latencies: List[float]) -> Dict[str, float]:
+    """Throughput and per-image latency percentiles, in seconds."""
+
+    total = float(np.sum(latencies))
+    return {
+        "images": len(latencies),
+        "images_per_sec": len(latencies) / total if total else 0.0,
+        "p50_latency_s": float(np.percentile(latencies, 50)) if latencies else 0.0,
+        "p95_latency_s": float(np.percentile(latencies, 95)) if latencies else 0.0,
+    }
+
+
+def compare_to_baseline(report: Dict[str, Any], baseline: Dict[str, Any]) -> List[str]:
+    """List what got worse than the baseline beyond the allowed slack. Empty if nothing did."""
+
+    regressions = []
+
+    def worse(metric: str, current: float, previous: float, slack: float, higher_is_better: bool) -> None:
+        if not previous:
+            return
+        change = (current - previous) / previous
+        if (higher_is_better and change < -slack) or (not higher_is_better and change > slack):
+            regressions.append(f"{metric}: {previous:.4g} -> {current:.4g} ({change:+.1%})")
+
+    for metric, slack, higher_is_better in [
+        ("images_per_sec", MAX_THROUGHPUT_DROP, True),
+        ("p95_latency_s", MAX_LATENCY_INCREASE, False),
+        ("peak_rss_mb", MAX_RSS_INCREASE, False),
+    ]:
+        worse(metric, report[metric], baseline.get(metric), slack, higher_is_better)
+
+    for name, previous in baseline.get("accuracy", {}).items():
+        current = report["accuracy"].get(name, 0.0)
+        if previous - current > MAX_ACCURACY_DROP:
+            regressions.append(f"accuracy.{name}: {previous:.3f} -> {current:.3f}")
+
+    return regressions
+
+
+def load_baseline(baseline_path: Path) -> Optional[Dict[str, Any]]:
+    """Stored benchmark report, or None if there is none yet."""
+
+    baseline_path = Path(baseline_path)
+    if not baseline_path.exists():
+        return None
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_baseline(report: Dict[str, Any], baseline_path: Path) -> None:
+    """Store a benchmark report as the new baseline."""
+
+    baseline_path = Path(baseline_path)
+    baseline_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(baseline_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+        f.write("\n")
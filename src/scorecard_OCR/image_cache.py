@@ -0,0 +1,137 @@
+import json
+import logging
+import os
+import shutil
+from pathlib import Path
+from typing import Dict, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+
+# A writer starts a new shard once its current one reaches this size
+SHARD_SIZE_BYTES = 256 << 20
+# Every image starts at a multiple of this many bytes within its shard
+ALIGNMENT = 64
+
+INDEX_NAME = "index.jsonl"
+
+
+class ShardEntry(NamedTuple):
+    """Where an image's pixels sit: shard file, byte offset, array shape and dtype."""
+
+    shard: str
+    offset: int
+    shape: Tuple[int, ...]
+    dtype: str
+
+
+class DecodedImageCache:
+    """Decoded, preprocessed images stored as raw pixels in memory-mapped shard files.
+
+    Keys identify the source file and its preprocessing, e.g. the image's
+    content hash and preset fingerprint, so a changed file or preset simply
+    misses. Hits are views into the memory-mapped shards: no decoding and no
+    copy, the OS page cache serves the pixels. They are read-only.
+
+    Every process appends to shards of its own, so workers can fill the cache
+    concurrently. Pixels are written before the index line pointing at them,
+    and the index is append-only, so readers never see a half-written image.
+    """
+
+    def __init__(self, cache_dir: Path) -> None:
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.index_path = self.cache_dir / INDEX_NAME
+
+        self._entries: Dict[str, ShardEntry] = {}
+        self._index_position = 0
+        self._maps: Dict[str, np.memmap] = {}
+        self._writer_pid: Optional[int] = None
+        self._shard_number = 0
+        self._refresh()
+
+    def _refresh(self) -> None:
+        """Read index lines appended since the last refresh, by this or other processes."""
+
+        if not self.index_path.exists():
+            return
+        with open(self.index_path, "rb") as f:
+            f.seek(self._index_position)
+            for line in f:
+                # A line still being appended has no newline yet
+                if not line.endswith(b"\n"):
+                    break
+                record = json.loads(line)
+                self._entries[record["key"]] = ShardEntry(
+                    record["shard"], record["offset"], tuple(record["shape"]), record["dtype"]
+                )
+                self._index_position += len(line)
+
+    def _map(self, shard: str) -> np.memmap:
+        # Remapped when the shard has grown past the mapped size
+        shard_path = self.cache_dir / shard
+        mapped = self._maps.get(shard)
+        if mapped is None or mapped.size < shard_path.stat().st_size:
+            mapped = np.memmap(shard_path, dtype=np.uint8, mode="r")
+            self._maps[shard] = mapped
+        return mapped
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        """The cached image, memory-mapped, or None on a miss."""
+
+        entry = self._entries.get(key)
+        if entry is None:
+            self._refresh()
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+        dtype = np.dtype(entry.dtype)
+        nbytes = int(np.prod(entry.shape)) * dtype.itemsize
+        pixels = self._map(entry.shard)[entry.offset : entry.offset + nbytes]
+        return pixels.view(dtype).reshape(entry.shape)
+
+    def _shard_path(self) -> Path:
+        # Forked workers inherit the parent's cache object, but must not share its shards
+        if self._writer_pid != os.getpid():
+            self._writer_pid = os.getpid()
+            self._shard_number = 0
+        return self.cache_dir / f"shard-{self._writer_pid}-{self._shard_number:04d}.bin"
+
+    def put(self, key: str, image: np.ndarray) -> None:
+        """Append an image to this process's current shard and index it."""
+
+        shard_path = self._shard_path()
+        if shard_path.exists() and shard_path.stat().st_size >= SHARD_SIZE_BYTES:
+            self._shard_number += 1
+            shard_path = self._shard_path()
+
+        image = np.ascontiguousarray(image)
+        with open(shard_path, "ab") as f:
+            offset = f.tell()
+            padding = -offset % ALIGNMENT
+            f.write(b"\0" * padding)
+            f.write(image.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+
+        record = {
+            "key": key,
+            "shard": shard_path.name,
+            "offset": offset + padding,
+            "shape": list(image.shape),
+            "dtype": image.dtype.str,
+        }
+        # One short line per append, written in a single call so concurrent writers don't interleave
+        with open(self.index_path, "ab") as f:
+            f.write((json.dumps(record) + "\n").encode("utf-8"))
+
+    def clear(self) -> None:
+        """Remove every cached image."""
+
+        self._maps.clear()
+        self._entries.clear()
+        self._index_position = 0
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        logging.info(f"Cleared the decoded image cache at {self.cache_dir}")
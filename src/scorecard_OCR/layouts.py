@@ -0,0 +1,117 @@
+import hashlib
+import json
+from typing import Collection, Dict, List, NamedTuple, Tuple
+
+import cv2
+import numpy as np
+
+
+# Scorecard layouts, one per generation of scraped scorecards
+LAYOUT_V1 = "new_version_v1"
+LAYOUT_V2 = "new_version_v2"
+LAYOUT_OLD = "old_version"
+
+# Size of the grayscale thumbnail the layout is classified from
+THUMBNAIL_SIZE = (64, 48)
+# UFC-branded v2 cards are mostly blank white paper
+V2_MIN_WHITE_FRACTION = 0.48
+# Typed v1 commission cards are high-contrast, old handwritten ones are flat gray photos
+V1_MIN_CONTRAST = 0.12
+
+
+def classify_layout(image_path: str) -> str:
+    """Classify a scorecard's layout from a tiny grayscale thumbnail, before any OCR.
+
+    The JPEG is decoded at 1/8 scale, so classification costs a few milliseconds.
+    Thresholds separate all scraped v1, v2 and old_version scorecards.
+    """
+
+    thumbnail = cv2.imread(image_path, cv2.IMREAD_REDUCED_GRAYSCALE_8)
+    if thumbnail is None:
+        raise ValueError(f"Could not read image: {image_path}")
+
+    pixels = cv2.resize(thumbnail, THUMBNAIL_SIZE, interpolation=cv2.INTER_AREA).astype(np.float32) / 255
+    if (pixels > 0.9).mean() > V2_MIN_WHITE_FRACTION:
+        return LAYOUT_V2
+    if pixels.std() > V1_MIN_CONTRAST:
+        return LAYOUT_V1
+    return LAYOUT_OLD
+
+
+class Region(NamedTuple):
+    """Part of a scorecard, as fractions of the image width and height."""
+
+    name: str
+    left: float
+    top: float
+    right: float
+    bottom: float
+
+
+# Region of the names alone, left out when the file name already gives them
+NAMES_REGION = "names"
+
+# Regions holding the names, the date and the judges' scores. Bands are generous
+# because the page height (v2) and framing (v1 photos) vary between scorecards.
+LAYOUT_TEMPLATES: Dict[str, List[Region]] = {
+    # UFC-branded cards: "RED vs. BLUE" top right, date under the event title,
+    # each judge's round table with a "<red> TOTAL <blue>" row under it
+    LAYOUT_V2: [
+        Region(NAMES_REGION, 0.40, 0.00, 1.00, 0.17),
+        Region("date", 0.00, 0.11, 0.42, 0.27),
+        Region("scores", 0.00, 0.38, 1.00, 0.76),
+    ],
+    # Commission cards: date and "RED vs. BLUE" in the header, final scores near the bottom
+    LAYOUT_V1: [
+        Region("header", 0.00, 0.08, 1.00, 0.32),
+        Region("totals", 0.00, 0.55, 1.00, 0.82),
+    ],
+    # Handwritten commission cards: date and names on top, cumulative totals in the table
+    LAYOUT_OLD: [
+        Region("header", 0.00, 0.10, 1.00, 0.34),
+        Region("totals", 0.00, 0.34, 1.00, 0.86),
+    ],
+}
+
+
+def template_fingerprint(layout: str) -> str:
+    """Short hash of a layout's regions, so results of an edited template aren't reused."""
+
+    payload = json.dumps([layout, LAYOUT_TEMPLATES[layout]])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:8]
+
+
+def crop_regions(
+    image: np.ndarray, layout: str, skip: Collection[str] = ()
+) -> List[Tuple[np.ndarray, Tuple[int, int]]]:
+    """Cut the template regions out of an image, but those named in ``skip``.
+
+    Returns each crop together with the pixel offset of its top-left corner.
+    """
+
+    height, width = image.shape[:2]
+    crops = []
+    for region in LAYOUT_TEMPLATES[layout]:
+        if region.name in skip:
+            continue
+        left, right = int(region.left * width), int(region.right * width)
+        top, bottom = int(region.top * height), int(region.bottom * height)
+        crops.append((image[top:bottom, left:right], (left, top)))
+    return crops
+
+
+def shift_result(result: List, offset: Tuple[int, int]) -> List:
+    """Move the boxes of an OCR result on a crop back into page coordinates."""
+
+    dx, dy = offset
+    return [
+        [[[x + dx, y + dy] for x, y in box], rec] for page in result for box, rec in page or []
+    ]
+
+
+def scale_result(page: List, scale: float) -> List:
+    """Scale the boxes of a page's OCR result, e.g. from a downscaled page back to full resolution."""
+
+    if scale == 1:
+        return page
+    return [[[[x * scale, y * scale] for x, y in box], rec] for box, rec in page]
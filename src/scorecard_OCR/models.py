@@ -0,0 +1,36 @@
+import os
+from typing import Any, Dict
+
+from paddleocr.paddleocr import BASE_DIR
+
+# Importing paddleocr puts its bundled ``ppocr`` package on the path
+from ppocr.utils.network import maybe_download
+
+
+# Downloaded models of the OCR modes, next to PaddleOCR's own
+MODELS_DIR = os.path.join(BASE_DIR, "whl", "modes")
+
+# Engine keyword arguments naming a model by URL, and the PaddleOCR argument taking its directory
+MODEL_URL_KWARGS = {"det_model_url": "det_model_dir", "rec_model_url": "rec_model_dir"}
+
+
+def model_dir(url: str) -> str:
+    """Directory of the model at ``url``, downloaded and unpacked on first use."""
+
+    directory = os.path.join(MODELS_DIR, url.split("/")[-1][: -len(".tar")])
+    maybe_download(directory, url)
+    return directory
+
+
+def model_dir_kwargs(engine_kwargs: Dict[str, Any]) -> Dict[str, Any]:
+    """Replace the model URLs of the engine arguments by local model directories, for PaddleOCR.
+
+    PaddleOCR only downloads its default models, and would fill a custom
+    model directory with them, so models of a mode are fetched here first.
+    """
+
+    kwargs = dict(engine_kwargs)
+    for url_kwarg, dir_kwarg in MODEL_URL_KWARGS.items():
+        if url_kwarg in kwargs:
+            kwargs[dir_kwarg] = model_dir(kwargs.pop(url_kwarg))
+    return kwargs
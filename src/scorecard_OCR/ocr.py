@@ -1,17 +1,108 @@
+import argparse
+import os
 import re
+import shutil
 import logging
-from typing import List, Optional
-from dataclasses import dataclass
+import time
+from typing import Any, Callable, Dict, List, Optional, Set, Union
+from contextlib import ExitStack
+from dataclasses import dataclass, replace
 from pathlib import Path
+import numpy as np
 import pandas as pd
-from paddleocr import PaddleOCR
+from PIL import Image
 from tqdm import tqdm
+import multiprocessing
 from multiprocessing import Pool
-from config import PathConfig
+from multiprocessing.synchronize import Semaphore
+from backends import OCRBackend, OCRRequest, ReplayBackend
+from batching import auto_batch_size, load_image, make_batches, make_chunks
+from cache import OCRCache, engine_fingerprint, image_digest
+from checkpoint import CheckpointLedger, ledger_path_for, partial_path_for, truncate_rows
+from config import OCR_MODES, OCRConfig, PathConfig
+from dedupe import find_duplicates
+from filename_metadata import (
+    NAME_SOURCE_FILENAME,
+    NAME_SOURCE_OCR,
+    FilenameMetadata,
+    parse_filename,
+    reconcile_names,
+)
+from image_cache import DecodedImageCache
+from layouts import (
+    LAYOUT_OLD,
+    LAYOUT_TEMPLATES,
+    LAYOUT_V1,
+    LAYOUT_V2,
+    NAMES_REGION,
+    classify_layout,
+    crop_regions,
+    scale_result,
+    shift_result,
+    template_fingerprint,
+)
+from prefetch import ImagePrefetcher, PrefetchedBatch, read_shared_image
+from preprocess import (
+    PREPROCESS_PRESETS,
+    PreprocessConfig,
+    preprocess_config_for,
+    preprocess_fingerprint,
+    preprocess_image,
+)
+from profiling import NO_STAGE, StageTracer, TraceWriter, summarize_trace, trace_record
+from sharding import (
+    load_shard_manifest,
+    relative_image_path,
+    save_shard_manifest,
+    select_shard,
+    shard_manifest_path_for,
+    shard_of,
+    shard_output_path,
+)
+from spatial import SpatialIndex, extract_round_grid, panel_bounds
+from thread_budget import limit_threads, load_thread_budget, plan_thread_budget
+from token_store import (
+    OCRToken,
+    list_token_parts,
+    load_token_layouts,
+    load_token_store,
+    merge_token_parts,
+    save_token_store,
+    token_part_path,
+    tokens_from_result,
+)
+from watchdog import TaskTracker, WorkerWatchdog, watch_results
 from dataclasses import field
 
 
-DEFAULT_NUM_WORKERS = 8
+# Longest a worker may take to load its engine when warmed up front
+ENGINE_LOAD_TIMEOUT = 300
+
+# OCR tiers of the cascade, recorded with every result
+TIER_FAST = "fast"
+TIER_FULL = "full"
+
+# OCR state owned by the current worker process, set up by init_worker
+_ocr_config: OCRConfig = OCRConfig()
+_engine: Optional[OCRBackend] = None
+_cache: Optional[OCRCache] = None
+_image_cache: Optional[DecodedImageCache] = None
+# Images of the current task already decoded by the parent process
+_prefetched: Dict[str, np.ndarray] = {}
+# Per-image stage timings, only when tracing is on
+_tracer: Optional[StageTracer] = None
+# Reports the worker's tasks and memory to the parent, and recycles the worker past its memory limit
+_watchdog: Optional[WorkerWatchdog] = None
+
+
+# Fields read from a scorecard, each given a confidence
+FIELD_NAMES = [
+    "red_fighter_name",
+    "blue_fighter_name",
+    "date",
+    "red_fighter_total_pts",
+    "blue_fighter_total_pts",
+]
 
 
 @dataclass
@@ -23,6 +114,16 @@ class FightData:
     date: str = "-"
     red_fighter_total_pts: List[str] = field(default_factory=list)
     blue_fighter_total_pts: List[str] = field(default_factory=list)
+    # Score of every round, one list per judge in the order of the totals. Only read from v2 cards
+    red_fighter_round_pts: List[List[str]] = field(default_factory=list)
+    blue_fighter_round_pts: List[List[str]] = field(default_factory=list)
+    # Only known from the file name
+    event: str = "-"
+
+    # How the data was read: where the names come from, the OCR tier and the confidence of every field above
+    name_source: str = field(default=NAME_SOURCE_OCR, compare=False)
+    ocr_tier: str = field(default="-", compare=False)
+    confidences: Dict[str, float] = field(default_factory=dict, compare=False)
 
     def to_list(self) -> List:
         """Converts the data class to a list format."""
@@ -33,7 +134,12 @@ class FightData:
             self.date,
             self.red_fighter_total_pts,
             self.blue_fighter_total_pts,
-        ]
+            self.red_fighter_round_pts,
+            self.blue_fighter_round_pts,
+            self.event,
+            self.name_source,
+            self.ocr_tier,
+        ] + [self.confidences.get(name) for name in FIELD_NAMES]
 
     def validate(self) -> bool:
         """Validates fight data
@@ -58,57 +164,645 @@ class FightData:
             return False
 
 
+@dataclass
+class ImageResult:
+    """Outcome of OCR-parsing one scorecard image.
+
+    A failed image keeps whatever was produced before the failing stage, so
+    its tokens can still be stored and re-parsed later.
+    """
+
+    image_path: str
+    layout: Optional[str] = None
+    tokens: List[OCRToken] = field(default_factory=list)
+    fight_data: Optional[FightData] = None
+    # Stage that failed ("classify", "ocr" or "parse", "worker" if it kept killing its worker) and why
+    stage: Optional[str] = None
+    error: Optional[str] = None
+    # Stage durations and worker memory, when tracing
+    trace: Optional[Dict[str, Any]] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def init_worker(
+    ocr_config: OCRConfig,
+    cache_dir: Optional[Path] = None,
+    trace: bool = False,
+    image_cache_dir: Optional[Path] = None,
+    backend: Optional[OCRBackend] = None,
+    watchdog: Optional[WorkerWatchdog] = None,
+) -> None:
+    """Pool initializer. Configures the worker's OCR engine, caches, tracing and memory watchdog.
+
+    The engine is PaddleOCR unless another ``backend`` is given, loaded on
+    first use and then kept warm for every task in the worker, so a run
+    served entirely from the cache never loads the models. The result cache
+    only holds PaddleOCR's results, and is off with another backend.
+    """
+
+    global _ocr_config, _engine, _cache, _image_cache, _tracer, _watchdog
+    if ocr_config.cpu_threads is not None:
+        limit_threads(ocr_config.cpu_threads)
+    _ocr_config = ocr_config
+    _engine = backend
+    _cache = open_cache(cache_dir, ocr_config) if cache_dir is not None and backend is None else None
+    _image_cache = DecodedImageCache(image_cache_dir) if image_cache_dir is not None else None
+    _tracer = StageTracer() if trace else None
+    _watchdog = watchdog
+
+
+def init_warm_worker(
+    ocr_config: OCRConfig,
+    ready: Semaphore,
+    cache_dir: Optional[Path] = None,
+    backend: Optional[OCRBackend] = None,
+    watchdog: Optional[WorkerWatchdog] = None,
+) -> None:
+    """Pool initializer that loads the engine right away, then releases ``ready``.
+
+    The parent waits for a release per worker (see ``wait_for_workers``), so
+    it knows every engine is warm. Workers don't wait for each other, so one
+    the pool starts in place of a dead worker warms up on its own. A worker
+    whose engine fails to load releases ``ready`` all the same, rather than
+    leaving the parent waiting: it tries again on its first task, whose
+    images fail with the error if it still can't.
+    """
+
+    init_worker(ocr_config, cache_dir, backend=backend, watchdog=watchdog)
+    try:
+        get_engine()
+    except Exception as e:
+        logging.error(f"Worker {os.getpid()} could not load its OCR engine: {e}")
+    ready.release()
+
+
+def wait_for_workers(ready: Semaphore, num_workers: int, timeout: float = ENGINE_LOAD_TIMEOUT) -> None:
+    """Wait until ``num_workers`` warm workers released ``ready``, for at most ``timeout`` seconds."""
+
+    deadline = time.monotonic() + timeout
+    for loaded in range(num_workers):
+        if not ready.acquire(timeout=max(0.0, deadline - time.monotonic())):
+            raise TimeoutError(f"Only {loaded} of {num_workers} OCR engines loaded within {timeout:.0f}s")
+
+
+def stage(name: str, image_paths: Optional[List[str]] = None):
+    """Time a stage of the current task's images. A shared no-op when tracing is off."""
+
+    return _tracer.stage(name, image_paths) if _tracer is not None else NO_STAGE
+
+
+def open_cache(cache_dir: Path, ocr_config: OCRConfig) -> OCRCache:
+    """Open the OCR result cache for the given engine configuration."""
+
+    return OCRCache(cache_dir, engine_fingerprint(ocr_config.engine_kwargs()))
+
+
+def get_engine() -> OCRBackend:
+    """Return the worker's OCR engine, loading PaddleOCR on first use when no other backend is set."""
+
+    global _engine
+    if _engine is None:
+        # Imported here, so that runs on other backends never load paddle
+        from models import model_dir_kwargs
+        from paddle_backend import PaddleBackend
+
+        with stage("engine_init"):
+            engine_kwargs = model_dir_kwargs(_ocr_config.engine_kwargs())
+            _engine = PaddleBackend(**engine_kwargs, **_ocr_config.runtime_kwargs())
+    return _engine
+
+
+def get_image(image_path: str) -> np.ndarray:
+    """The decoded image, prefetched by the parent process when available."""
+
+    image = _prefetched.get(image_path)
+    return image if image is not None else load_image(image_path)
+
+
+def decoded_image_key(image_path: str, preprocess: PreprocessConfig, allow_crop: bool) -> str:
+    """Decoded image cache key: the file's contents and the preprocessing applied to them."""
+
+    key = f"{image_digest(image_path)}-{preprocess_fingerprint(preprocess)}"
+    return f"{key}-cropped" if allow_crop and preprocess.crop_border else key
+
+
+def get_preprocessed_image(image_path: str, preprocess: PreprocessConfig, allow_crop: bool) -> np.ndarray:
+    """The image decoded and preprocessed, memory-mapped from the decoded image cache when it's there."""
+
+    if _image_cache is not None:
+        with stage("image_cache", [image_path]):
+            key = decoded_image_key(image_path, preprocess, allow_crop)
+            image = _image_cache.get(key)
+        if image is not None:
+            return image
+
+    with stage("decode", [image_path]):
+        image = get_image(image_path)
+    with stage("preprocess", [image_path]):
+        image = preprocess_image(image, preprocess, allow_crop=allow_crop)
+
+    if _image_cache is not None:
+        with stage("image_cache", [image_path]):
+            _image_cache.put(key, image)
+    return image
+
+
+def page_scale(image_path: str, preprocess: PreprocessConfig, image: np.ndarray) -> float:
+    """Factor from the preprocessed image's pixels to those of the full-resolution image."""
+
+    if preprocess.max_side is None:
+        return 1.0
+    # Only the file's header is read
+    with Image.open(image_path) as source:
+        return max(source.size) / max(image.shape[:2])
+
+
+def skipped_regions(image_path: str, layout: str) -> List[str]:
+    """Template regions of the layout that aren't OCR'd: the names, when the file name gives both."""
+
+    metadata = parse_filename(image_path)
+    if metadata is None or len(metadata.fighters) != 1:
+        return []
+    return [region.name for region in LAYOUT_TEMPLATES[layout] if region.name == NAMES_REGION]
+
+
+def cache_key(
+    image_path: str, layout: Optional[str], full_page: bool = False, preset: Optional[str] = None
+) -> str:
+    """Cache key of an image's OCR result, full page or restricted to a layout's template regions."""
+
+    key = image_digest(image_path)
+    if layout is not None and not full_page:
+        key = f"{key}-{layout}-{template_fingerprint(layout)}"
+        skipped = skipped_regions(image_path, layout)
+        if skipped:
+            key = f"{key}-without-{'-'.join(skipped)}"
+
+    preprocess = preprocess_config_for(preset or _ocr_config.preprocess, layout)
+    if not preprocess.is_identity():
+        key = f"{key}-{'page' if full_page else 'regions'}-{preprocess_fingerprint(preprocess)}"
+        if preprocess.max_side is not None:
+            # Boxes are cached at full resolution, unlike the downscaled ones of older entries
+            key = f"{key}-fullres"
+    return key
+
+
+def run_ocr_batch(
+    image_paths: List[str],
+    layouts: Optional[List[Optional[str]]] = None,
+    full_page: bool = False,
+    preset: Optional[str] = None,
+) -> List[List[OCRToken]]:
+    """Run OCR on several images, recognizing every cache miss in one batched call.
+
+    Images are preprocessed as configured for their layout by ``preset``,
+    the configured preprocessing preset by default. Images with a layout
+    are only OCR'd within that layout's template regions, unless ``full_page``
+    is set; without one (the default) the full page is OCR'd. A region the
+    file name makes redundant is left out, see ``skipped_regions``. Boxes are
+    returned, and cached, in the full-resolution page's coordinates, however
+    far preprocessing downscaled it.
+    """
+
+    if layouts is None:
+        layouts = [None] * len(image_paths)
+
+    results: Dict[int, List] = {}
+    keys: Dict[int, str] = {}
+    if _cache is not None:
+        for idx, (image_path, layout) in enumerate(zip(image_paths, layouts)):
+            with stage("cache", [image_path]):
+                keys[idx] = cache_key(image_path, layout, full_page, preset)
+                cached = _cache.get(keys[idx])
+            if cached is not None:
+                results[idx] = cached
+
+    misses = [idx for idx in range(len(image_paths)) if idx not in results]
+    if misses:
+        # Every page or template region is its own image in the batch
+        requests, owners = [], []
+        for idx in misses:
+            templated = layouts[idx] is not None and not full_page
+            preprocess = preprocess_config_for(preset or _ocr_config.preprocess, layouts[idx])
+            # Template regions are fractions of the page, so the border stays for them
+            image = get_preprocessed_image(image_paths[idx], preprocess, allow_crop=not templated)
+            if templated:
+                crops = crop_regions(image, layouts[idx], skipped_regions(image_paths[idx], layouts[idx]))
+            else:
+                crops = [(image, (0, 0))]
+            scale = page_scale(image_paths[idx], preprocess, image)
+            for crop, offset in crops:
+                requests.append(OCRRequest(image_paths[idx], crop, offset, scale))
+                owners.append(idx)
+
+        def batch_stage(name: str, image_indices: Optional[List[int]]):
+            # Map the batch's crops back to the images they come from
+            owned = owners if image_indices is None else [owners[i] for i in image_indices]
+            return stage(name, [image_paths[idx] for idx in dict.fromkeys(owned)])
+
+        pages: Dict[int, List] = {idx: [] for idx in misses}
+        engine = get_engine()
+        for owner, request, result in zip(owners, requests, engine.ocr(requests, batch_stage)):
+            pages[owner].extend(scale_result(shift_result(result, request.offset), request.scale))
+
+        for idx in misses:
+            results[idx] = [pages[idx]]
+            if _cache is not None:
+                with stage("cache", [image_paths[idx]]):
+                    _cache.put(keys[idx], results[idx])
+
+    return [tokens_from_result(results[idx]) for idx in range(len(image_paths))]
+
+
+def apply_filename_metadata(
+    fight_data: FightData, metadata: Optional[FilenameMetadata], use_names: bool = True
+) -> None:
+    """Take the names and event from the scorecard's file name, the OCR'd names only cross-check them.
+
+    Names a v2 card's file name gives both of aren't OCR'd at all (see
+    ``skipped_regions``). With ``use_names`` off, only the event is taken.
+    """
+
+    if metadata is None:
+        return
+    fight_data.event = metadata.event
+    if not use_names:
+        return
+    red, blue, name_source = reconcile_names(
+        metadata, fight_data.red_fighter_name, fight_data.blue_fighter_name
+    )
+    fight_data.red_fighter_name = red
+    fight_data.blue_fighter_name = blue
+    fight_data.name_source = name_source
+
+
+def parse_tokens(tokens: List[OCRToken], metadata: Optional[FilenameMetadata] = None) -> FightData:
+    """Extract names, date of the fight and scores from the OCR tokens of one scorecard.
+
+    Generic parser, used for the UFC-branded v2 cards. Tokens are located by
+    their boxes rather than their order: the names sit on either side of
+    "vs." in the same row, every judge's totals on either side of a "TOTAL"
+    label, and the judge's round table right above it. Names and event found
+    in the file name's ``metadata`` take precedence over the OCR'd names.
+    """
+
+    if not tokens:
+        raise ValueError("No OCR results")
+
+    # Fight data object
+    fight_data = FightData()
+    index = SpatialIndex(tokens)
+
+    # Extract fighter names
+    for idx in index.find(lambda text: text.lower() == "vs."):
+        red, blue = index.nearest_in_row(idx, -1), index.nearest_in_row(idx, 1)
+        if red is not None and blue is not None:
+            fight_data.red_fighter_name = index.text(red)
+            fight_data.blue_fighter_name = index.text(blue)
+
+    # Extract date
+    for idx in index.find(lambda text: extract_date(text) is not None):
+        fight_data.date = extract_date(index.text(idx))
+
+    # Extract total points, judges from left to right. A judge without totals
+    # (fight stopped early) leaves nothing but the "TOTAL" label in its panel
+    total_labels = sorted(index.find(is_total_text), key=lambda idx: index.centers[idx, 0])
+    bounds = panel_bounds(index, total_labels)
+    for idx in total_labels:
+        red = index.nearest_in_row(idx, -1, bounds=bounds[idx])
+        blue = index.nearest_in_row(idx, 1, bounds=bounds[idx])
+        fight_data.red_fighter_total_pts.append(index.text(red) if red is not None else "-")
+        fight_data.blue_fighter_total_pts.append(index.text(blue) if blue is not None else "-")
+
+    # Round scores, from the same tokens
+    grid = extract_round_grid(index, total_labels)
+    fight_data.red_fighter_round_pts = grid.red
+    fight_data.blue_fighter_round_pts = grid.blue
+
+    apply_filename_metadata(fight_data, metadata)
+    if not fight_data.validate():
+        raise ValueError("Fight data validation failed.")
+
+    return fight_data
+
+
+def parse_v1_tokens(tokens: List[OCRToken], metadata: Optional[FilenameMetadata] = None) -> FightData:
+    """Parse a v1 commission scorecard, where every judge's totals follow a "FINAL SCORE" label."""
+
+    if not tokens:
+        raise ValueError("No OCR results")
+
+    fight_data = FightData()
+
+    for idx, token in enumerate(tokens):
+        text = token.text
+        # Extract fighter names
+        if text.lower() == "vs.":
+            fight_data.red_fighter_name = tokens[idx - 1].text
+            fight_data.blue_fighter_name = tokens[idx + 1].text
+
+        # Extract date
+        elif date := extract_date(text):
+            fight_data.date = date
+
+        # Extract total points, the closing "FINAL SCORE" of a judge isn't followed by scores
+        elif is_final_score_text(text) and idx + 2 < len(tokens):
+            total_points_red = tokens[idx + 1].text
+            total_points_blue = tokens[idx + 2].text
+
+            if total_points_red.isdigit() and total_points_blue.isdigit():
+                fight_data.red_fighter_total_pts.append(total_points_red)
+                fight_data.blue_fighter_total_pts.append(total_points_blue)
+
+    apply_filename_metadata(fight_data, metadata)
+    if not fight_data.validate():
+        raise ValueError("Fight data validation failed.")
+
+    return fight_data
+
+
+def parse_old_tokens(tokens: List[OCRToken], metadata: Optional[FilenameMetadata] = None) -> FightData:
+    """Parse an old handwritten commission scorecard.
+
+    The blue corner is written on the left of "vs.", and each judge's columns
+    hold running totals on either side of the "(n)" round markers, so the
+    totals are read from the last round every judge scored. Only the event
+    is taken from the file name: the cards print surnames, and the file name
+    doesn't list the corners in their order.
+    """
+
+    if not tokens:
+        raise ValueError("No OCR results")
+
+    fight_data = FightData()
+    totals_by_round: Dict[int, List[List[str]]] = {}
+
+    for idx, token in enumerate(tokens):
+        text = token.text
+        # Extract fighter names
+        if text.lower() == "vs.":
+            fight_data.blue_fighter_name = tokens[idx - 1].text
+            fight_data.red_fighter_name = tokens[idx + 1].text
+
+        # Extract date
+        elif date := extract_date(text):
+            fight_data.date = date
+
+        # Collect running totals: "<blue total> <blue points> (n) <red points> <red total>"
+        elif (round_number := extract_round_marker(text)) is not None and 2 <= idx < len(tokens) - 2:
+            total_points_blue = tokens[idx - 2].text
+            total_points_red = tokens[idx + 2].text
+
+            if total_points_blue.isdigit() and total_points_red.isdigit():
+                totals_by_round.setdefault(round_number, []).append([total_points_red, total_points_blue])
+
+    scored_rounds = [round_number for round_number, totals in totals_by_round.items() if len(totals) == 3]
+    if scored_rounds:
+        for total_points_red, total_points_blue in totals_by_round[max(scored_rounds)]:
+            fight_data.red_fighter_total_pts.append(total_points_red)
+            fight_data.blue_fighter_total_pts.append(total_points_blue)
+
+    apply_filename_metadata(fight_data, metadata, use_names=False)
+    if not fight_data.validate():
+        raise ValueError("Fight data validation failed.")
+
+    return fight_data
+
+
+# Layout-specific parsers, picked by the layout classifier
+LAYOUT_PARSERS: Dict[str, Callable[[List[OCRToken], Optional[FilenameMetadata]], FightData]] = {
+    LAYOUT_V1: parse_v1_tokens,
+    LAYOUT_V2: parse_tokens,
+    LAYOUT_OLD: parse_old_tokens,
+}
+
+
 def parse_image(image_path: str) -> FightData:
     """Parse the image. Extract names, date of the fight, scores from the scorecard."""
 
-    try:
-        # Defining ocr engine object
-        ocr = PaddleOCR(use_angle_cls=False, lang="en")
-        result = ocr.ocr(image_path, cls=False)
+    result = ocr_images([image_path])[0]
+    if not result.ok:
+        raise ValueError(f"Error processing {image_path}: {result.error}")
+    return result.fight_data
 
-        # Fight data object
-        fight_data = FightData()
 
-        if not result:
-            raise ValueError(f"No OCR results for image: {image_path}")
+def run_ocr_isolated(
+    image_paths: List[str],
+    layouts: Optional[List[Optional[str]]] = None,
+    full_page: bool = False,
+    preset: Optional[str] = None,
+) -> Dict[str, Union[List[OCRToken], Exception]]:
+    """Batched OCR that doesn't let one bad image fail its whole batch.
 
-        for res in result:
-            for idx, item in enumerate(res):
-                text = item[1][0]
-                # Extract fighter names
-                if text.lower() == "vs.":
-                    fight_data.red_fighter_name = res[idx - 1][1][0]
-                    fight_data.blue_fighter_name = res[idx + 1][1][0]
+    If the batch fails, its images are retried one at a time and each failing
+    image gets its own exception instead of tokens.
+    """
 
-                # Extract date
-                elif date := extract_date(text):
-                    fight_data.date = date
+    if layouts is None:
+        layouts = [None] * len(image_paths)
 
-                # Extract total points
-                elif is_total_text(text):
-                    total_points_red = res[idx - 1][1][0]
-                    total_points_blue = res[idx + 1][1][0]
+    try:
+        return dict(zip(image_paths, run_ocr_batch(image_paths, layouts, full_page, preset)))
+    except Exception:
+        if len(image_paths) == 1:
+            raise
+
+    outcomes: Dict[str, Union[List[OCRToken], Exception]] = {}
+    for image_path, layout in zip(image_paths, layouts):
+        try:
+            outcomes[image_path] = run_ocr_batch([image_path], [layout], full_page, preset)[0]
+        except Exception as e:
+            outcomes[image_path] = e
+    return outcomes
 
-                    if total_points_red.lower() == "total" or total_points_blue.lower() == "total":
-                        fight_data.red_fighter_total_pts.append("-")
-                        fight_data.blue_fighter_total_pts.append("-")
-                    else:
-                        fight_data.red_fighter_total_pts.append(total_points_red)
-                        fight_data.blue_fighter_total_pts.append(total_points_blue)
 
-        if not fight_data.validate():
-            raise ValueError("Fight data validation failed.")
+def run_tier(
+    image_paths: List[str],
+    layouts: Dict[str, str],
+    tier: str,
+    preset: Optional[str] = None,
+    full_page: bool = False,
+    min_confidence: float = 0.0,
+    final: bool = False,
+) -> Dict[str, ImageResult]:
+    """One OCR pass of the cascade over the given images.
 
-        return fight_data
+    Returns the results this pass settles: images parsed into valid fight data
+    with every field at least ``min_confidence``, plus the failures when it is
+    the ``final`` pass. Unsettled images are left for the next pass.
+    """
 
+    try:
+        outcomes = run_ocr_isolated(image_paths, [layouts[path] for path in image_paths], full_page, preset)
     except Exception as e:
-        raise ValueError(f"Error processing {image_path}: {str(e)}")
+        outcomes = {image_path: e for image_path in image_paths}
+
+    settled: Dict[str, ImageResult] = {}
+    for image_path, tokens in outcomes.items():
+        layout = layouts[image_path]
+        if isinstance(tokens, Exception):
+            if final:
+                settled[image_path] = ImageResult(image_path, layout, stage="ocr", error=str(tokens))
+            continue
+
+        try:
+            with stage("parse", [image_path]):
+                fight_data = LAYOUT_PARSERS[layout](tokens, parse_filename(image_path))
+        except Exception as e:
+            if final:
+                settled[image_path] = ImageResult(image_path, layout, tokens, stage="parse", error=str(e))
+            continue
+
+        fight_data.ocr_tier = tier
+        fight_data.confidences = field_confidences(fight_data, tokens)
+        if min(fight_data.confidences.values()) < min_confidence:
+            logging.debug(f"Low confidence {tier} OCR of {image_path}: {fight_data.confidences}")
+            continue
+        settled[image_path] = ImageResult(image_path, layout, tokens, fight_data)
+
+    return settled
+
+
+def ocr_images(image_paths: List[str]) -> List[ImageResult]:
+    """Pool task. OCR a batch of images and parse each, keeping the raw tokens alongside the result.
+
+    Every image is classified first and parsed by its layout's parser. Images
+    go through a cascade of OCR passes, each one only for the images the
+    previous ones couldn't settle:
+
+    1. the fast tier, on aggressively downscaled images, accepted only if every
+       field is read with at least the configured confidence;
+    2. the full tier within the layout's template regions;
+    3. the full tier on the full page.
+
+    Failures are captured per image instead of being raised.
+    """
+
+    if _watchdog is not None:
+        _watchdog.start_task(image_paths[0])
+    if _tracer is not None:
+        _tracer.begin(image_paths)
+
+    results: Dict[str, ImageResult] = {}
+    layouts: Dict[str, str] = {}
+    for image_path in image_paths:
+        try:
+            with stage("classify", [image_path]):
+                layouts[image_path] = classify_layout(image_path)
+        except Exception as e:
+            results[image_path] = ImageResult(image_path, stage="classify", error=str(e))
+
+    def pending() -> List[str]:
+        return [image_path for image_path in layouts if image_path not in results]
+
+    if _ocr_config.fast_preset is not None:
+        results.update(
+            run_tier(
+                pending(),
+                layouts,
+                TIER_FAST,
+                _ocr_config.fast_preset,
+                full_page=not _ocr_config.use_templates,
+                min_confidence=_ocr_config.min_confidence,
+            )
+        )
+
+    if _ocr_config.use_templates:
+        templated = [image_path for image_path in pending() if layouts[image_path] in LAYOUT_TEMPLATES]
+        results.update(run_tier(templated, layouts, TIER_FULL))
+
+    results.update(run_tier(pending(), layouts, TIER_FULL, full_page=True, final=True))
+
+    if _tracer is not None:
+        for image_path, trace in _tracer.end().items():
+            results[image_path].trace = trace
+    if _watchdog is not None:
+        _watchdog.end_task(image_paths[0])
+
+    return [results[image_path] for image_path in image_paths]
+
+
+def ocr_prefetched_images(task: PrefetchedBatch) -> List[ImageResult]:
+    """Pool task. Same as ``ocr_images``, on images the parent already decoded into shared memory."""
+
+    global _prefetched
+    image_paths, handles = task
+    for image_path, handle in handles.items():
+        try:
+            _prefetched[image_path] = read_shared_image(handle)
+        except OSError as e:
+            logging.debug(f"Prefetched image of {image_path} is gone, reading the file: {e}")
+
+    try:
+        return ocr_images(image_paths)
+    finally:
+        _prefetched = {}
+
+
+def ocr_batches(batches: List[List[str]]) -> List[List[ImageResult]]:
+    """Pool task. ``ocr_images`` on every batch of a chunk handed to the worker in one dispatch."""
+
+    return [ocr_images(image_paths) for image_paths in batches]
+
+
+def ocr_prefetched_batches(tasks: List[PrefetchedBatch]) -> List[List[ImageResult]]:
+    """Pool task. ``ocr_prefetched_images`` on every batch of a chunk handed to the worker in one dispatch."""
+
+    return [ocr_prefetched_images(task) for task in tasks]
+
+
+def abandoned_batch(image_paths: List[str]) -> List[ImageResult]:
+    """Results of a batch given up on, after the workers it ran on kept dying."""
+
+    return [ImageResult(path, stage="worker", error="Lost the worker on every run") for path in image_paths]
+
+
+def field_confidences(fight_data: FightData, tokens: List[OCRToken]) -> Dict[str, float]:
+    """Confidence of every field, that of the OCR token it was read from.
+
+    A value found in several tokens takes the lowest of their confidences, to
+    stay on the safe side, and so do fields made of several values. Fields
+    that weren't found get 0, names agreed on with the file name 1.
+    """
+
+    def confidence_of(values: List[str], matches: Callable[[str, str], bool]) -> float:
+        values = [value for value in values if value != "-"]
+        if not values:
+            return 0.0
+        return min(
+            min((token.confidence for token in tokens if matches(token.text, value)), default=0.0)
+            for value in values
+        )
+
+    def same_text(text: str, value: str) -> bool:
+        return text == value
+
+    def same_date(text: str, value: str) -> bool:
+        return extract_date(text) == value
+
+    # Names taken from the file name and confirmed by the OCR'd ones are certain
+    if fight_data.name_source == NAME_SOURCE_FILENAME:
+        red_name_confidence = blue_name_confidence = 1.0
+    else:
+        red_name_confidence = confidence_of([fight_data.red_fighter_name], same_text)
+        blue_name_confidence = confidence_of([fight_data.blue_fighter_name], same_text)
+
+    return {
+        "red_fighter_name": red_name_confidence,
+        "blue_fighter_name": blue_name_confidence,
+        "date": confidence_of([fight_data.date], same_date),
+        "red_fighter_total_pts": confidence_of(fight_data.red_fighter_total_pts, same_text),
+        "blue_fighter_total_pts": confidence_of(fight_data.blue_fighter_total_pts, same_text),
+    }
 
 
 def read_images(folder_path: Path) -> List[str]:
-    """Read image paths from a folder."""
+    """Read image paths from a folder and its subfolders."""
 
-    return [str(file) for file in folder_path.glob("*.jpg")]
+    return sorted(str(file) for file in folder_path.rglob("*.jpg"))
 
 
 def extract_date(text: str) -> Optional[str]:
@@ -124,19 +818,38 @@ def is_total_text(text: str) -> bool:
     return sum(1 for w, t in zip(text.lower(), "total") if w != t) < 2 and 4 <= len(text) <= 5
 
 
+def is_final_score_text(text: str) -> bool:
+    """Check if text represents 'final score'."""
+
+    letters = re.sub(r"[^a-z]", "", text.lower())
+    return sum(1 for w, t in zip(letters, "finalscore") if w != t) < 2 and 9 <= len(letters) <= 10
+
+
+def extract_round_marker(text: str) -> Optional[int]:
+    """Extract the round number from a "(n)" round marker."""
+
+    marker_match = re.fullmatch(r"\((\d{1,2})\)", text.strip())
+    return int(marker_match.group(1)) if marker_match else None
+
+
+# Per-round scores, read along with the fields
+ROUND_FIELD_NAMES = ["red_fighter_round_pts", "blue_fighter_round_pts"]
+
+# Columns of the parsed scorecards output
+RESULT_COLUMNS = (
+    FIELD_NAMES
+    + ROUND_FIELD_NAMES
+    + ["event", "name_source", "ocr_tier"]
+    + [f"{name}_confidence" for name in FIELD_NAMES]
+)
+
+
 def save_results(collected_results: List[FightData], save_path: Path) -> pd.DataFrame:
     """Create a container where the results will be stored
     and specify the Path"""
 
     results_df = pd.DataFrame(
-        collected_results,
-        columns=[
-            "red_fighter_name",
-            "blue_fighter_name",
-            "date",
-            "red_fighter_total_pts",
-            "blue_fighter_total_pts",
-        ],
+        [fight_data.to_list() for fight_data in collected_results], columns=RESULT_COLUMNS
     )
 
     # Path, output directory, save
@@ -148,40 +861,590 @@ def save_results(collected_results: List[FightData], save_path: Path) -> pd.Data
     return results_df
 
 
+def append_results(collected_results: List[FightData], save_path: Path) -> None:
+    """Append results to the output file, writing the header if the file is new."""
+
+    output_path = Path(save_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    results_df = pd.DataFrame(
+        [fight_data.to_list() for fight_data in collected_results], columns=RESULT_COLUMNS
+    )
+    results_df.to_csv(output_path, mode="a", header=not output_path.exists(), index=False)
+
+
+QUARANTINE_COLUMNS = ["image_path", "stage", "error"]
+
+
+def quarantine_path_for(output_path: Path) -> Path:
+    """Report of the images that failed, kept next to the output file."""
+
+    output_path = Path(output_path)
+    return output_path.with_name(f"{output_path.stem}_quarantine.csv")
+
+
+def save_quarantine(failed_results: List[ImageResult], save_path: Path) -> None:
+    """Write the images that failed, with the stage and reason, or remove a stale report if none did."""
+
+    quarantine_path = Path(save_path)
+    if not failed_results:
+        quarantine_path.unlink(missing_ok=True)
+        return
+
+    pd.DataFrame(
+        [[result.image_path, result.stage, result.error] for result in failed_results],
+        columns=QUARANTINE_COLUMNS,
+    ).to_csv(quarantine_path, index=False)
+    logging.warning(f"{len(failed_results)} images failed, see {quarantine_path}")
+
+
+DUPLICATES_COLUMNS = ["image_path", "representative"]
+
+
+def duplicates_path_for(output_path: Path) -> Path:
+    """Manifest of the duplicate images, kept next to the output file."""
+
+    output_path = Path(output_path)
+    return output_path.with_name(f"{output_path.stem}_duplicates.csv")
+
+
+def save_duplicates(duplicates: Dict[str, str], save_path: Path) -> None:
+    """Write every duplicate image with the representative whose row it shares, or remove a stale manifest."""
+
+    duplicates_path = Path(save_path)
+    if not duplicates:
+        duplicates_path.unlink(missing_ok=True)
+        return
+
+    duplicates_path.parent.mkdir(parents=True, exist_ok=True)
+    pd.DataFrame(list(duplicates.items()), columns=DUPLICATES_COLUMNS).to_csv(duplicates_path, index=False)
+    logging.info(f"Skipping {len(duplicates)} duplicate images, see {duplicates_path}")
+
+
 def process_scorecards(
-    input_path: Path, output_path: Path, num_workers: int = DEFAULT_NUM_WORKERS
+    input_path: Path,
+    output_path: Path,
+    num_workers: Optional[int] = None,
+    threads_per_worker: Optional[int] = None,
+    ocr_config: OCRConfig = OCRConfig(),
+    cache_dir: Optional[Path] = None,
+    tokens_path: Optional[Path] = None,
+    batch_size: Optional[int] = None,
+    resume: bool = False,
+    chunksize: int = 1,
+    quarantine_path: Optional[Path] = None,
+    prefetch_threads: int = 2,
+    max_prefetched_batches: Optional[int] = None,
+    dedupe: bool = True,
+    trace_path: Optional[Path] = None,
+    shard_index: int = 0,
+    shard_count: int = 1,
+    image_cache_dir: Optional[Path] = None,
+    backend: Optional[OCRBackend] = None,
+    max_worker_memory_mb: Optional[float] = None,
+    max_tasks_per_worker: Optional[int] = None,
 ) -> pd.DataFrame:
-    """Main function to process scorecard images."""
+    """Main function to process scorecard images.
+
+    The pool's worker processes and the inference threads of every worker are
+    derived together from the available cores and memory, see
+    ``plan_thread_budget``; ``num_workers`` and ``threads_per_worker``
+    override either.
+
+    Images are sent to the workers in batches of ``batch_size``, chosen from
+    the number of images and workers when omitted. When ``cache_dir`` is given,
+    OCR results are cached there by image hash and engine configuration, so
+    unchanged images are never OCR'd twice. When ``tokens_path`` is given, the
+    raw OCR tokens are stored there for ``reparse_scorecards``.
+
+    Results are streamed batch by batch to a ``.partial`` file next to
+    ``output_path``, which replaces the output once the run completes, and
+    every written image is recorded in a ledger. With ``resume``, images
+    already in the ledger are skipped and the previous output is extended
+    instead of rewritten.
+
+    Batches are consumed in completion order, ``chunksize`` at a time per
+    worker dispatch. An image that fails doesn't stop the run: it is left out
+    of the output and the ledger, so ``resume`` retries it, and is listed with
+    its failing stage in ``quarantine_path`` (next to the output by default).
+
+    With ``prefetch_threads``, the parent reads and decodes upcoming batches
+    into shared memory while the workers run OCR, and only the shared memory
+    handles are sent through the pool. At most ``max_prefetched_batches``
+    (two per worker by default) are held in memory at once; 0 threads lets
+    every worker read its own images.
+
+    With ``dedupe``, near-identical images (re-downloads of the same scorecard)
+    are grouped by perceptual hash and only the first image of every group is
+    OCR'd, so each scorecard yields one row. The other images and the
+    representative whose row they share are listed in a duplicates manifest
+    next to the output.
+
+    With ``trace_path``, every image's stage durations (engine init, classify,
+    cache, decode, preprocess, detection, recognition, parse) and its worker's
+    peak memory are written there as JSON lines, and a summary is logged at
+    the end. Without it, the stage hooks are no-ops.
+
+    With ``shard_count`` above 1, only the images of shard ``shard_index``
+    are OCR'd, picked by a hash of their path relative to ``input_path``, so
+    several machines can split a run without coordinating. The shard writes
+    its own output, tokens and reports, named after ``output_path`` (see
+    ``shard_output_path``), and a manifest of its images; ``merge_shards``
+    combines them. Duplicates are found among all images before sharding,
+    so a scorecard and its copies never end up in different shards.
+
+    With ``image_cache_dir``, every image is decoded and preprocessed once
+    into memory-mapped shards there, and later runs map the pixels instead
+    of decoding them. Prefetching is off then, the cache replaces it.
+
+    ``backend`` replaces PaddleOCR in every worker, e.g. a ``ReplayBackend``
+    of stored tokens to run the whole pipeline without inference.
+
+    Workers report every batch they start and their memory, summarized per
+    worker at the end of the run. A batch whose worker dies, killed for
+    memory or crashed, is run again on another worker. A worker is replaced
+    by a fresh one after ``max_tasks_per_worker`` tasks, and once its
+    resident memory exceeds ``max_worker_memory_mb`` it leaves the task it is
+    handed next to another worker and is replaced too. A batch that keeps
+    losing its worker is given up on and quarantined. A worker returns the
+    results of a chunk together, so the whole chunk of a lost batch is run
+    again: a ``chunksize`` above 1 saves dispatches at the cost of larger reruns.
+    """
 
     try:
         try:
             images: List[str] = read_images(input_path)
-            print(images)
             logging.info(f"Found {len(images)} images to process")
 
         except Exception:
             raise ValueError(f"Error reading images at {input_path}")
 
-        collected_results = []
+        output_path = Path(output_path)
+        if shard_count > 1:
+            output_path = shard_output_path(output_path, shard_index, shard_count)
+            if tokens_path is not None:
+                tokens_path = shard_output_path(tokens_path, shard_index, shard_count)
 
-        with Pool(num_workers) as pool:
-            for result in tqdm(pool.imap(parse_image, images), total=len(images), desc="Processing images"):
-                # Process results as they complete
-                collected_results.append(result)
+        duplicates = find_duplicates(images) if dedupe else {}
+        save_duplicates(duplicates, duplicates_path_for(output_path))
+        images = [image_path for image_path in images if image_path not in duplicates]
 
-        # Saving results
-        return save_results(collected_results, output_path)
+        if shard_count > 1:
+            images = select_shard(images, input_path, shard_index, shard_count)
+            save_shard_manifest(
+                shard_manifest_path_for(output_path),
+                shard_index,
+                shard_count,
+                [relative_image_path(image_path, input_path) for image_path in images],
+                [relative_image_path(image_path, input_path) for image_path in duplicates],
+            )
+            logging.info(f"Shard {shard_index} of {shard_count}: {len(images)} images")
+
+        if quarantine_path is None:
+            quarantine_path = quarantine_path_for(output_path)
+        partial_path = partial_path_for(output_path)
+        ledger = CheckpointLedger(ledger_path_for(output_path))
+
+        # Continue an interrupted run, or extend the output of a finished one
+        if resume and not partial_path.exists() and output_path.exists():
+            shutil.copyfile(output_path, partial_path)
+
+        if resume and partial_path.exists():
+            completed = ledger.completed()
+            # Drop rows written after the last checkpoint, their images run again
+            truncate_rows(partial_path, len(completed))
+            done = set(completed)
+            images = [image_path for image_path in images if image_path not in done]
+            logging.info(f"Resuming: {len(done)} images already done, {len(images)} left")
+        else:
+            partial_path.unlink(missing_ok=True)
+            ledger.reset()
+            if tokens_path is not None:
+                for part in list_token_parts(tokens_path):
+                    part.unlink()
+
+        # Results from a different engine setup can't be reused
+        if cache_dir is not None:
+            open_cache(cache_dir, ocr_config).evict_stale()
+
+        budget = plan_thread_budget(num_workers, threads_per_worker or ocr_config.cpu_threads)
+        num_workers = budget.num_workers
+        ocr_config = replace(ocr_config, cpu_threads=budget.threads_per_worker)
+        logging.info(f"Running {num_workers} workers with {budget.threads_per_worker} threads each")
+
+        if batch_size is None:
+            batch_size = auto_batch_size(len(images), num_workers)
+        batches = make_batches(images, batch_size)
+        logging.info(f"Processing in {len(batches)} batches of up to {batch_size} images")
+
+        next_part = len(list_token_parts(tokens_path)) if tokens_path is not None else 0
+        failed_results: List[ImageResult] = []
+
+        prefetcher: Optional[ImagePrefetcher] = None
+        if prefetch_threads > 0 and image_cache_dir is None:
+            max_pending = max(max_prefetched_batches or 2 * num_workers, chunksize + prefetch_threads)
+            prefetcher = ImagePrefetcher(batches, load_image, prefetch_threads, max_pending)
+
+        # Batches are known by their first image
+        batches_by_key = {batch[0]: batch for batch in batches}
+        reports = multiprocessing.SimpleQueue()
+        tracker = TaskTracker(reports)
+
+        # Every worker loads its engine once and keeps it warm for all its images
+        trace = trace_path is not None
+        watchdog = WorkerWatchdog(reports, max_worker_memory_mb)
+        initargs = (ocr_config, cache_dir, trace, image_cache_dir, backend, watchdog)
+        with Pool(
+            num_workers, initializer=init_worker, initargs=initargs, maxtasksperchild=max_tasks_per_worker
+        ) as pool:
+            with ExitStack() as stack:
+                trace_writer = stack.enter_context(TraceWriter(trace_path)) if trace else None
+                if prefetcher is not None:
+                    # Closed before the pool, so a prefetch waiting for room can't block the pool's shutdown
+                    stack.enter_context(prefetcher)
+                    tasks = pool.imap_unordered(ocr_prefetched_batches, make_chunks(prefetcher, chunksize))
+                else:
+                    tasks = pool.imap_unordered(ocr_batches, make_chunks(batches, chunksize))
+
+                results = watch_results(
+                    tasks,
+                    tracker,
+                    list(make_chunks(batches_by_key, chunksize)),
+                    key_of=lambda batch_results: batch_results[0].image_path,
+                    rerun=lambda key: pool.apply_async(ocr_images, (batches_by_key[key],)),
+                    abandon=lambda key: abandoned_batch(batches_by_key[key]),
+                )
+                with tqdm(total=len(images), desc="Processing images") as progress:
+                    # Unordered, so one slow batch doesn't hold back the results behind it
+                    for batch_results in results:
+                        if prefetcher is not None:
+                            prefetcher.release([result.image_path for result in batch_results])
+                        if trace_writer is not None:
+                            for result in batch_results:
+                                trace_writer.write(
+                                    trace_record(result.image_path, result.layout, result.ok, result.trace)
+                                )
+                        # Checkpoint every batch: tokens and results first, then the ledger
+                        if tokens_path is not None:
+                            save_token_store(
+                                {result.image_path: result.tokens for result in batch_results},
+                                token_part_path(tokens_path, next_part),
+                                {result.image_path: result.layout for result in batch_results},
+                            )
+                            next_part += 1
+                        succeeded = [result for result in batch_results if result.ok]
+                        failed_results.extend(result for result in batch_results if not result.ok)
+                        if succeeded:
+                            append_results([result.fight_data for result in succeeded], partial_path)
+                            ledger.record(result.image_path for result in succeeded)
+                        progress.update(len(batch_results))
+
+        logging.info(
+            f"{len(images)} images: {len(images) - len(failed_results)} succeeded, "
+            f"{len(failed_results)} failed"
+        )
+        save_quarantine(failed_results, quarantine_path)
+        logging.info(tracker.summary())
+        if trace_writer is not None:
+            logging.info(f"Stage trace saved to {trace_path}\n\n{summarize_trace(trace_writer.records)}")
+
+        if tokens_path is not None:
+            merge_token_parts(tokens_path, keep_existing=resume)
+            logging.info(f"Raw OCR tokens saved to {tokens_path}")
+
+        if not partial_path.exists():
+            return save_results([], output_path)
+
+        os.replace(partial_path, output_path)
+        logging.info(f"Results saved to {output_path}")
+        return pd.read_csv(output_path)
 
     except Exception as e:
         logging.error(f"Error in main processing: {str(e)}")
         raise
 
 
+def merge_shards(
+    output_path: Path,
+    shard_count: int,
+    input_path: Optional[Path] = None,
+    tokens_path: Optional[Path] = None,
+) -> pd.DataFrame:
+    """Combine the outputs of a sharded run into the final output, after checking that the shards fit.
+
+    Every shard must have finished, its images must all hash to it and to no
+    other shard, and each must be either in its output or in its quarantine.
+    With ``input_path``, the shards must also cover every image there except
+    the duplicates. The shards' quarantines are merged next to the output,
+    and with ``tokens_path`` their token stores replace the one there, so the
+    merged run can be re-parsed.
+    """
+
+    output_path = Path(output_path)
+    results, failures = [], []
+    assigned: Set[str] = set()
+    duplicates: List[str] = []
+    for shard_index in range(shard_count):
+        shard_path = shard_output_path(output_path, shard_index, shard_count)
+        if not shard_path.exists():
+            raise ValueError(f"Shard {shard_index} of {shard_count} hasn't finished: {shard_path} is missing")
+
+        manifest = load_shard_manifest(shard_manifest_path_for(shard_path))
+        images, duplicates = manifest["images"], manifest["duplicates"]
+        if (manifest["shard_index"], manifest["shard_count"]) != (shard_index, shard_count):
+            raise ValueError(f"{shard_path} comes from a different sharding")
+        misplaced = [image for image in images if shard_of(image, shard_count) != shard_index]
+        if misplaced:
+            raise ValueError(f"{shard_path} has {len(misplaced)} images of other shards, e.g. {misplaced[0]}")
+        overlap = assigned.intersection(images)
+        if overlap:
+            raise ValueError(f"{len(overlap)} images are in more than one shard, e.g. {min(overlap)}")
+        assigned.update(images)
+
+        shard_results = pd.read_csv(shard_path)
+        if list(shard_results.columns) != RESULT_COLUMNS:
+            raise ValueError(f"{shard_path} doesn't have the expected columns")
+        shard_quarantine = quarantine_path_for(shard_path)
+        if shard_quarantine.exists():
+            shard_failures = pd.read_csv(shard_quarantine)
+        else:
+            shard_failures = pd.DataFrame(columns=QUARANTINE_COLUMNS)
+        if len(shard_results) + len(shard_failures) != len(images):
+            raise ValueError(
+                f"{shard_path} has {len(shard_results)} results and {len(shard_failures)} failures "
+                f"for {len(images)} images"
+            )
+        results.append(shard_results)
+        failures.append(shard_failures)
+
+    if input_path is not None:
+        expected = {relative_image_path(image_path, input_path) for image_path in read_images(input_path)}
+        missing = expected - assigned - set(duplicates)
+        if missing:
+            raise ValueError(f"{len(missing)} images of {input_path} are in no shard, e.g. {min(missing)}")
+
+    merged = pd.concat(results, ignore_index=True)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    merged.to_csv(output_path, index=False)
+    logging.info(f"Merged {shard_count} shards, {len(merged)} results saved to {output_path}")
+
+    quarantine_path = quarantine_path_for(output_path)
+    failed = pd.concat(failures, ignore_index=True)
+    if len(failed):
+        failed.to_csv(quarantine_path, index=False)
+        logging.warning(f"{len(failed)} images failed, see {quarantine_path}")
+    else:
+        quarantine_path.unlink(missing_ok=True)
+
+    # Every shard found the same duplicates, among all images
+    shard_duplicates = duplicates_path_for(shard_output_path(output_path, 0, shard_count))
+    if shard_duplicates.exists():
+        shutil.copyfile(shard_duplicates, duplicates_path_for(output_path))
+
+    if tokens_path is not None:
+        # Copied in as parts, so merging leaves the shards' own stores in place
+        next_part = len(list_token_parts(tokens_path))
+        for shard_index in range(shard_count):
+            shard_tokens = shard_output_path(tokens_path, shard_index, shard_count)
+            if not shard_tokens.exists():
+                logging.warning(f"Shard {shard_index} of {shard_count} has no OCR tokens at {shard_tokens}")
+                continue
+            Path(tokens_path).parent.mkdir(parents=True, exist_ok=True)
+            shutil.copyfile(shard_tokens, token_part_path(tokens_path, next_part))
+            next_part += 1
+        merge_token_parts(tokens_path, keep_existing=False)
+        logging.info(f"Raw OCR tokens of the shards saved to {tokens_path}")
+
+    return merged
+
+
+def reparse_scorecards(tokens_path: Path, output_path: Path) -> pd.DataFrame:
+    """Rebuild the parsed scorecards from stored OCR tokens, without running OCR."""
+
+    try:
+        tokens_by_image = load_token_store(tokens_path)
+        layouts = load_token_layouts(tokens_path)
+        logging.info(f"Loaded OCR tokens of {len(tokens_by_image)} images from {tokens_path}")
+
+        collected_results = []
+        failed_results: List[ImageResult] = []
+        for image_path, tokens in tqdm(tokens_by_image.items(), desc="Re-parsing images"):
+            layout = layouts.get(image_path)
+            try:
+                layout = layout or classify_layout(image_path)
+            except Exception as e:
+                failed_results.append(ImageResult(image_path, tokens=tokens, stage="classify", error=str(e)))
+                continue
+            try:
+                fight_data = LAYOUT_PARSERS[layout](tokens, parse_filename(image_path))
+                fight_data.confidences = field_confidences(fight_data, tokens)
+                collected_results.append(fight_data)
+            except Exception as e:
+                failed_results.append(ImageResult(image_path, layout, tokens, stage="parse", error=str(e)))
+
+        logging.info(
+            f"{len(tokens_by_image)} images: {len(collected_results)} succeeded, {len(failed_results)} failed"
+        )
+        save_quarantine(failed_results, quarantine_path_for(output_path))
+        return save_results(collected_results, output_path)
+
+    except Exception as e:
+        logging.error(f"Error in re-parsing: {str(e)}")
+        raise
+
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="OCR-parse UFC scorecard images.")
+    parser.add_argument(
+        "--reparse",
+        action="store_true",
+        help="Rebuild the output from stored OCR tokens instead of running OCR",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Skip images already written by an interrupted run and extend its output",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=None,
+        help="Images per OCR batch (default: tuned from the number of images and workers)",
+    )
+    parser.add_argument(
+        "--chunksize",
+        type=int,
+        default=1,
+        help="Batches handed to a worker per dispatch, all rerun if the worker dies during one of them",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Worker processes (default: calibrated for this host, else derived from cores and memory)",
+    )
+    parser.add_argument(
+        "--threads-per-worker",
+        type=int,
+        default=None,
+        help="Inference threads per worker (default: calibrated for this host, else derived)",
+    )
+    parser.add_argument(
+        "--prefetch-threads",
+        type=int,
+        default=2,
+        help="Threads decoding upcoming images into shared memory for the workers, 0 to disable",
+    )
+    parser.add_argument(
+        "--trace",
+        type=Path,
+        default=None,
+        help="Write per-image stage timings and worker memory to this JSONL file and log a summary",
+    )
+    parser.add_argument(
+        "--replay-tokens",
+        type=Path,
+        default=None,
+        help="OCR by replaying the tokens stored in this file instead of running PaddleOCR",
+    )
+    parser.add_argument(
+        "--max-worker-memory",
+        type=float,
+        default=None,
+        help="Recycle a worker once its resident memory exceeds this many MB, rerunning its next batch",
+    )
+    parser.add_argument(
+        "--recycle-after",
+        type=int,
+        default=None,
+        help="Replace every worker with a fresh one after this many tasks",
+    )
+    parser.add_argument(
+        "--image-cache",
+        action="store_true",
+        help="Keep decoded, preprocessed images in memory-mapped shards, so later runs skip decoding",
+    )
+    parser.add_argument(
+        "--no-dedupe",
+        action="store_true",
+        help="OCR every image, even near-identical copies of another",
+    )
+    parser.add_argument(
+        "--no-cascade",
+        action="store_true",
+        help="Skip the fast low-resolution pass and OCR every image at full resolution",
+    )
+    parser.add_argument(
+        "--shard-count",
+        type=int,
+        default=1,
+        help="Split the images into this many shards, to OCR them on several machines",
+    )
+    parser.add_argument(
+        "--shard-index",
+        type=int,
+        default=0,
+        help="Shard OCR'd by this run, from 0 to --shard-count - 1",
+    )
+    parser.add_argument(
+        "--merge-shards",
+        action="store_true",
+        help="Check and combine the outputs of all --shard-count shards into the final output",
+    )
+    parser.add_argument(
+        "--mode",
+        default="accurate",
+        choices=list(OCR_MODES),
+        help="OCR models: full precision, or small int8-quantized ones for speed",
+    )
+    parser.add_argument(
+        "--preprocess",
+        default="none",
+        choices=list(PREPROCESS_PRESETS),
+        help="Image preprocessing preset, compare them with benchmark.py",
+    )
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
     try:
         path_config: PathConfig = PathConfig()
-        path_config.validate_paths()
-        process_scorecards(path_config.INPUT_PATH, path_config.OUTPUT_PATH)
+        if args.reparse:
+            reparse_scorecards(path_config.TOKENS_PATH, path_config.OUTPUT_PATH)
+        elif args.merge_shards:
+            input_path = path_config.INPUT_PATH if path_config.INPUT_PATH.exists() else None
+            merge_shards(path_config.OUTPUT_PATH, args.shard_count, input_path, path_config.TOKENS_PATH)
+        else:
+            path_config.validate_paths()
+            num_workers, threads_per_worker = args.workers, args.threads_per_worker
+            calibrated = load_thread_budget(path_config.THREAD_BUDGET_PATH)
+            if calibrated is not None and num_workers is None and threads_per_worker is None:
+                num_workers, threads_per_worker = calibrated
+            replay = args.replay_tokens is not None
+            process_scorecards(
+                path_config.INPUT_PATH,
+                path_config.OUTPUT_PATH,
+                num_workers=num_workers,
+                threads_per_worker=threads_per_worker,
+                ocr_config=OCRConfig(
+                    mode=args.mode,
+                    preprocess=args.preprocess,
+                    fast_preset=None if args.no_cascade else OCRConfig.fast_preset,
+                ),
+                cache_dir=None if replay else path_config.CACHE_PATH,
+                # Replayed tokens are already stored
+                tokens_path=None if replay else path_config.TOKENS_PATH,
+                batch_size=args.batch_size,
+                resume=args.resume,
+                chunksize=args.chunksize,
+                prefetch_threads=args.prefetch_threads,
+                dedupe=not args.no_dedupe,
+                trace_path=args.trace,
+                shard_index=args.shard_index,
+                shard_count=args.shard_count,
+                image_cache_dir=path_config.IMAGE_CACHE_PATH if args.image_cache else None,
+                backend=ReplayBackend(load_token_store(args.replay_tokens)) if replay else None,
+                max_worker_memory_mb=args.max_worker_memory,
+                max_tasks_per_worker=args.recycle_after,
+            )
 
     except Exception as e:
         logging.error(f"Application failed: {e}")
@@ -0,0 +1,71 @@
+import copy
+from contextlib import nullcontext
+from typing import Any, Callable, ContextManager, List, Optional
+
+import numpy as np
+from paddleocr import PaddleOCR
+
+# Importing paddleocr puts its bundled ``tools`` package on the path
+from tools.infer.predict_system import sorted_boxes
+from tools.infer.utility import get_rotate_crop_image
+
+
+def ocr_batch(
+    engine: PaddleOCR,
+    images: List[np.ndarray],
+    stage: Optional[Callable[[str, Optional[List[int]]], ContextManager]] = None,
+) -> List[List]:
+    """OCR several images with a single recognition call.
+
+    Text is detected on each image separately, then the crops of all images are
+    recognized together so the recognizer runs on full batches. Results have the
+    same shape as ``engine.ocr`` for each image.
+
+    ``stage(name, image_indices)``, when given, times the detection of each
+    image and the recognition of all of them.
+    """
+
+    if stage is None:
+        stage = lambda name, image_indices: nullcontext()  # noqa: E731
+
+    boxes_per_image = []
+    crops = []
+    for idx, image in enumerate(images):
+        with stage("detection", [idx]):
+            dt_boxes, _ = engine.text_detector(image)
+            dt_boxes = sorted_boxes(dt_boxes) if dt_boxes is not None and len(dt_boxes) else []
+            boxes_per_image.append(dt_boxes)
+            crops.extend(get_rotate_crop_image(image, copy.deepcopy(box)) for box in dt_boxes)
+
+    with stage("recognition", None):
+        rec_res = engine.text_recognizer(crops)[0] if crops else []
+
+    results = []
+    offset = 0
+    for dt_boxes in boxes_per_image:
+        page = [
+            [box.tolist(), (text, score)]
+            for box, (text, score) in zip(dt_boxes, rec_res[offset : offset + len(dt_boxes)])
+            if score >= engine.drop_score
+        ]
+        offset += len(dt_boxes)
+        results.append([page])
+
+    return results
+
+
+class PaddleBackend:
+    """PaddleOCR, recognizing the text of every request in one batched call. See ``ocr_batch``."""
+
+    name = "paddleocr"
+
+    def __init__(self, **kwargs: Any) -> None:
+        self.engine = PaddleOCR(**kwargs)
+
+    def ocr(
+        self,
+        requests: List[Any],
+        stage: Optional[Callable[[str, Optional[List[int]]], ContextManager]] = None,
+    ) -> List[List]:
+        # backends.OCRRequest
+        return ocr_batch(self.engine, [request.image for request in requests], stage)
@@ -0,0 +1,126 @@
+import logging
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from multiprocessing import shared_memory
+from typing import Callable, Deque, Dict, Iterable, Iterator, List, NamedTuple, Tuple
+
+import numpy as np
+
+
+class SharedImage(NamedTuple):
+    """Handle of a decoded image in shared memory. Only this is pickled to the workers, never the pixels."""
+
+    name: str
+    shape: Tuple[int, ...]
+    dtype: str
+
+
+def read_shared_image(handle: SharedImage) -> np.ndarray:
+    """Copy a decoded image out of shared memory, in the worker that OCRs it."""
+
+    shm = shared_memory.SharedMemory(name=handle.name)
+    try:
+        return np.ndarray(handle.shape, dtype=handle.dtype, buffer=shm.buf).copy()
+    finally:
+        shm.close()
+
+
+# A task for the OCR workers: the batch's image paths and their prefetched images
+PrefetchedBatch = Tuple[List[str], Dict[str, SharedImage]]
+
+
+class ImagePrefetcher:
+    """Decode the images of upcoming batches on a thread pool, into shared memory.
+
+    Iterating yields one ``(image_paths, handles)`` task per batch, in order,
+    while the next batches are already being read and decoded, so file I/O
+    and decoding overlap with OCR in the workers. At most ``max_pending``
+    batches are held in shared memory at a time: iteration blocks until the
+    consumer hands a finished batch back with ``release``. Images that fail
+    to decode get no handle, the worker reads them itself and reports the error.
+    """
+
+    def __init__(
+        self,
+        batches: Iterable[List[str]],
+        decode: Callable[[str], np.ndarray],
+        num_threads: int = 2,
+        max_pending: int = 4,
+    ) -> None:
+        self.batches = batches
+        self.decode = decode
+        self.num_threads = max(num_threads, 1)
+        self.max_pending = max(max_pending, 1)
+
+        self._slots = threading.Semaphore(self.max_pending)
+        self._closed = False
+        self._lock = threading.Lock()
+        self._segments: Dict[str, shared_memory.SharedMemory] = {}
+        self._executor = ThreadPoolExecutor(self.num_threads, thread_name_prefix="prefetch")
+
+    def __enter__(self) -> "ImagePrefetcher":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __iter__(self) -> Iterator[PrefetchedBatch]:
+        # Decode a few batches ahead, but never hold more than max_pending at once
+        ahead = min(self.num_threads, self.max_pending)
+        pending: Deque[Future] = deque()
+        for batch in self.batches:
+            if len(pending) >= ahead:
+                yield pending.popleft().result()
+            self._slots.acquire()
+            if self._closed:
+                return
+            pending.append(self._executor.submit(self._share_batch, batch))
+
+        while pending:
+            yield pending.popleft().result()
+
+    def _share_batch(self, image_paths: List[str]) -> PrefetchedBatch:
+        handles: Dict[str, SharedImage] = {}
+        for image_path in image_paths:
+            try:
+                image = self.decode(image_path)
+            except Exception as e:
+                logging.debug(f"Prefetch of {image_path} failed: {e}")
+                continue
+
+            shm = shared_memory.SharedMemory(create=True, size=max(image.nbytes, 1))
+            np.ndarray(image.shape, dtype=image.dtype, buffer=shm.buf)[...] = image
+            with self._lock:
+                self._segments[image_path] = shm
+            handles[image_path] = SharedImage(shm.name, image.shape, image.dtype.str)
+
+        return image_paths, handles
+
+    def _free(self, image_path: str) -> None:
+        with self._lock:
+            shm = self._segments.pop(image_path, None)
+        if shm is not None:
+            shm.close()
+            shm.unlink()
+
+    def release(self, image_paths: List[str]) -> None:
+        """Free the shared memory of a batch the workers are done with, making room for the next one."""
+
+        for image_path in image_paths:
+            self._free(image_path)
+        self._slots.release()
+
+    def close(self) -> None:
+        """Stop decoding and free every image still in shared memory."""
+
+        # Wake up an iteration waiting for a slot, so it can stop
+        self._closed = True
+        for _ in range(self.max_pending):
+            self._slots.release()
+
+        self._executor.shutdown(wait=True)
+        with self._lock:
+            image_paths = list(self._segments)
+        for image_path in image_paths:
+            self._free(image_path)
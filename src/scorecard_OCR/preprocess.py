@@ -0,0 +1,139 @@
+import hashlib
+from typing import Dict, NamedTuple, Optional
+
+import cv2
+import numpy as np
+
+
+# Grayscale value below which a pixel counts as page content when cropping borders
+BORDER_TOLERANCE = 24
+# Margin kept around the content when cropping borders, in pixels
+BORDER_MARGIN = 8
+
+
+class PreprocessConfig(NamedTuple):
+    """Image preprocessing applied before OCR. The defaults leave the image untouched.
+
+    Scraped scorecards carry no usable DPI metadata, so downscaling is
+    expressed as the maximum length of the longer image side, in pixels.
+    """
+
+    max_side: Optional[int] = None
+    grayscale: bool = False
+    # CLAHE on the lightness channel
+    normalize_contrast: bool = False
+    crop_border: bool = False
+
+    def is_identity(self) -> bool:
+        return self == PreprocessConfig()
+
+
+NO_PREPROCESSING = PreprocessConfig()
+
+# Preprocessing of every layout, by preset name. Layouts missing from a preset aren't preprocessed.
+PREPROCESS_PRESETS: Dict[str, Dict[str, PreprocessConfig]] = {
+    "none": {},
+    "gray": {
+        "new_version_v1": PreprocessConfig(grayscale=True),
+        "new_version_v2": PreprocessConfig(grayscale=True),
+        "old_version": PreprocessConfig(grayscale=True, normalize_contrast=True),
+    },
+    "fast": {
+        "new_version_v1": PreprocessConfig(max_side=640, grayscale=True),
+        "new_version_v2": PreprocessConfig(max_side=640, grayscale=True),
+        "old_version": PreprocessConfig(max_side=800, grayscale=True, normalize_contrast=True),
+    },
+    "fastest": {
+        "new_version_v1": PreprocessConfig(max_side=480, grayscale=True),
+        "new_version_v2": PreprocessConfig(max_side=480, grayscale=True),
+        "old_version": PreprocessConfig(max_side=640, grayscale=True, normalize_contrast=True),
+    },
+    "clean": {
+        "new_version_v1": PreprocessConfig(normalize_contrast=True, crop_border=True),
+        "new_version_v2": PreprocessConfig(crop_border=True),
+        "old_version": PreprocessConfig(grayscale=True, normalize_contrast=True, crop_border=True),
+    },
+}
+
+
+def preprocess_config_for(preset: str, layout: Optional[str]) -> PreprocessConfig:
+    """Preprocessing of a layout under the named preset."""
+
+    if preset not in PREPROCESS_PRESETS:
+        raise ValueError(f"Unknown preprocessing preset: {preset}")
+    return PREPROCESS_PRESETS[preset].get(layout, NO_PREPROCESSING)
+
+
+def preprocess_fingerprint(config: PreprocessConfig) -> str:
+    """Short hash of the preprocessing settings, so their results are cached separately."""
+
+    payload = repr(tuple(config)) + f"{BORDER_TOLERANCE}-{BORDER_MARGIN}"
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:8]
+
+
+def downscale(image: np.ndarray, max_side: int) -> np.ndarray:
+    """Shrink the image so its longer side is at most ``max_side``. Smaller images are left as they are."""
+
+    height, width = image.shape[:2]
+    scale = max_side / max(height, width)
+    if scale >= 1:
+        return image
+    size = (max(1, round(width * scale)), max(1, round(height * scale)))
+    return cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+
+
+def normalize_contrast(gray: np.ndarray) -> np.ndarray:
+    """Even out faint handwriting and uneven lighting with CLAHE."""
+
+    return cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8)).apply(gray)
+
+
+def crop_border(image: np.ndarray) -> np.ndarray:
+    """Trim the uniform border around the page content.
+
+    The border colour is taken from the image edges; everything that differs
+    from it by more than ``BORDER_TOLERANCE`` is content.
+    """
+
+    gray = image if image.ndim == 2 else cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    edges = np.concatenate([gray[0], gray[-1], gray[:, 0], gray[:, -1]])
+    content = np.abs(gray.astype(np.int16) - int(np.median(edges))) > BORDER_TOLERANCE
+
+    rows = np.flatnonzero(content.any(axis=1))
+    cols = np.flatnonzero(content.any(axis=0))
+    if not len(rows) or not len(cols):
+        return image
+
+    top, bottom = max(rows[0] - BORDER_MARGIN, 0), min(rows[-1] + BORDER_MARGIN + 1, gray.shape[0])
+    left, right = max(cols[0] - BORDER_MARGIN, 0), min(cols[-1] + BORDER_MARGIN + 1, gray.shape[1])
+    return image[top:bottom, left:right]
+
+
+def preprocess_image(image: np.ndarray, config: PreprocessConfig, allow_crop: bool = True) -> np.ndarray:
+    """Apply the preprocessing steps to a BGR image and return a BGR image for the OCR engine.
+
+    Border cropping moves the page content, so it is skipped when
+    ``allow_crop`` is off, e.g. before cutting out template regions.
+    """
+
+    if config.is_identity():
+        return image
+
+    if config.crop_border and allow_crop:
+        image = crop_border(image)
+    if config.max_side is not None:
+        image = downscale(image, config.max_side)
+
+    if config.grayscale:
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        if config.normalize_contrast:
+            gray = normalize_contrast(gray)
+        # The detector expects three channels
+        return cv2.cvtColor(gray, cv2.COLOR_GRAY2BGR)
+
+    if config.normalize_contrast:
+        lab = cv2.cvtColor(image, cv2.COLOR_BGR2LAB)
+        lab[:, :, 0] = normalize_contrast(lab[:, :, 0])
+        image = cv2.cvtColor(lab, cv2.COLOR_LAB2BGR)
+
+    return image
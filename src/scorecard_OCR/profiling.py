@@ -0,0 +1,147 @@
+import json
+import os
+import resource
+import sys
+import time
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+from typing import Any, ContextManager, Dict, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+
+# Shared by every untraced stage, so disabled tracing costs no allocation
+NO_STAGE: ContextManager = nullcontext()
+
+# Slowest images listed in the summary
+SLOWEST_IMAGES = 5
+
+
+def peak_rss_mb() -> float:
+    """Peak resident memory of this process so far, in MB."""
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS, in kilobytes on Linux
+    return peak / (1 << 20) if sys.platform == "darwin" else peak / 1024
+
+
+class StageTracer:
+    """Records how long every stage of a task takes, per image.
+
+    A stage run for several images at once, like batched recognition, is
+    split evenly between them.
+    """
+
+    def __init__(self) -> None:
+        self._stages: Dict[str, Dict[str, float]] = {}
+
+    def begin(self, image_paths: List[str]) -> None:
+        """Start tracing the images of a new task."""
+
+        self._stages = {image_path: {} for image_path in image_paths}
+
+    @contextmanager
+    def stage(self, name: str, image_paths: Optional[List[str]] = None) -> Iterator[None]:
+        """Time a stage of the given images, all images of the task by default."""
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            targets = list(self._stages) if image_paths is None else image_paths
+            for image_path in targets:
+                stages = self._stages.setdefault(image_path, {})
+                stages[name] = stages.get(name, 0.0) + elapsed / len(targets)
+
+    def end(self) -> Dict[str, Dict[str, Any]]:
+        """Trace of every image of the task, with the worker's memory at its end."""
+
+        worker, rss = os.getpid(), peak_rss_mb()
+        traces = {
+            image_path: {"worker": worker, "peak_rss_mb": rss, "stages": stages}
+            for image_path, stages in self._stages.items()
+        }
+        self._stages = {}
+        return traces
+
+
+def trace_record(image_path: str, layout: Optional[str], ok: bool, trace: Dict[str, Any]) -> Dict[str, Any]:
+    """One JSONL trace line."""
+
+    return {
+        "image_path": image_path,
+        "layout": layout,
+        "ok": ok,
+        "total_s": sum(trace["stages"].values()),
+        **trace,
+    }
+
+
+class TraceWriter:
+    """Streams trace records to a JSONL file and keeps them for the summary."""
+
+    def __init__(self, trace_path: Path) -> None:
+        self.trace_path = Path(trace_path)
+        self.trace_path.parent.mkdir(parents=True, exist_ok=True)
+        self.records: List[Dict[str, Any]] = []
+        self._file = open(self.trace_path, "w", encoding="utf-8")
+
+    def __enter__(self) -> "TraceWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._file.close()
+
+    def write(self, record: Dict[str, Any]) -> None:
+        self.records.append(record)
+        self._file.write(json.dumps(record) + "\n")
+        self._file.flush()
+
+
+def summarize_trace(records: List[Dict[str, Any]]) -> str:
+    """Summary table of a trace: time per stage with percentiles, worker memory and the slowest images."""
+
+    if not records:
+        return "No traced images"
+
+    stage_names = sorted({name for record in records for name in record["stages"]})
+    total = sum(record["total_s"] for record in records)
+    rows = []
+    for name in stage_names + ["total"]:
+        durations = [
+            record["total_s"] if name == "total" else record["stages"].get(name, 0.0) for record in records
+        ]
+        rows.append(
+            [
+                name,
+                round(sum(durations), 3),
+                f"{sum(durations) / total:.1%}" if total else "-",
+                round(float(np.percentile(durations, 50)), 4),
+                round(float(np.percentile(durations, 95)), 4),
+            ]
+        )
+    stages = pd.DataFrame(rows, columns=["stage", "total_s", "share", "p50_s", "p95_s"])
+
+    workers = pd.DataFrame(
+        [[record["worker"], record["peak_rss_mb"]] for record in records], columns=["worker", "peak_rss_mb"]
+    )
+    memory = workers.groupby("worker")["peak_rss_mb"].max().round(1).reset_index()
+
+    slowest = sorted(records, key=lambda record: record["total_s"], reverse=True)[:SLOWEST_IMAGES]
+    slowest_table = pd.DataFrame(
+        [[Path(record["image_path"]).name, record["layout"], record["total_s"]] for record in slowest],
+        columns=["image", "layout", "total_s"],
+    ).round(3)
+
+    return "\n\n".join(
+        [
+            f"Stage timings over {len(records)} images",
+            stages.to_string(index=False),
+            "Peak worker memory",
+            memory.to_string(index=False),
+            "Slowest images",
+            slowest_table.to_string(index=False),
+        ]
+    )
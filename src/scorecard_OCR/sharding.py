@@ -0,0 +1,74 @@
+import hashlib
+import json
+from pathlib import Path
+from typing import Any, Dict, List
+
+
+def relative_image_path(image_path: str, input_path: Path) -> str:
+    """Image path relative to the input folder, the same on every machine whatever the checkout location."""
+
+    return Path(image_path).relative_to(input_path).as_posix()
+
+
+def shard_of(relative_path: str, shard_count: int) -> int:
+    """Shard an image belongs to, by a stable hash of its relative path.
+
+    Python's ``hash`` is salted per process, so a digest is used instead.
+    """
+
+    digest = hashlib.sha1(relative_path.encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") % shard_count
+
+
+def select_shard(image_paths: List[str], input_path: Path, shard_index: int, shard_count: int) -> List[str]:
+    """The images of one shard. Every image lands in exactly one shard, with no coordination between them."""
+
+    if not 0 <= shard_index < shard_count:
+        raise ValueError(f"Shard index {shard_index} is out of range for {shard_count} shards")
+    return [
+        image_path
+        for image_path in image_paths
+        if shard_of(relative_image_path(image_path, input_path), shard_count) == shard_index
+    ]
+
+
+def shard_output_path(output_path: Path, shard_index: int, shard_count: int) -> Path:
+    """Output of one shard, next to the final output the shards are merged into."""
+
+    output_path = Path(output_path)
+    shard_name = f"{output_path.stem}_shard-{shard_index}-of-{shard_count}{output_path.suffix}"
+    return output_path.with_name(shard_name)
+
+
+def shard_manifest_path_for(output_path: Path) -> Path:
+    """Manifest of the images assigned to a shard, kept next to the shard's output."""
+
+    output_path = Path(output_path)
+    return output_path.with_name(f"{output_path.stem}_manifest.json")
+
+
+def save_shard_manifest(
+    manifest_path: Path,
+    shard_index: int,
+    shard_count: int,
+    images: List[str],
+    duplicates: List[str],
+) -> None:
+    """Record which images a shard was assigned, and the duplicates skipped by all shards, as relative paths.
+
+    The merge checks the shards' outputs against these.
+    """
+
+    manifest_path = Path(manifest_path)
+    manifest_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        manifest = {"shard_index": shard_index, "shard_count": shard_count}
+        json.dump({**manifest, "images": images, "duplicates": duplicates}, f)
+        f.write("\n")
+
+
+def load_shard_manifest(manifest_path: Path) -> Dict[str, Any]:
+    """Read a manifest written by ``save_shard_manifest``."""
+
+    with open(manifest_path, "r", encoding="utf-8") as f:
+        return json.load(f)
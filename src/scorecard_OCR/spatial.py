@@ -0,0 +1,160 @@
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+
+# Tokens whose centers are within this many median box heights of a row's first token share its row
+ROW_TOLERANCE = 0.5
+# Round numbers a scorecard's round column can hold
+MAX_ROUNDS = 5
+
+# Horizontal range of the page, in pixels
+Bounds = Tuple[float, float]
+
+
+def any_text(text: str) -> bool:
+    return True
+
+
+class SpatialIndex:
+    """Rows and columns of one image's OCR tokens, found once from their box geometry.
+
+    Lookups go by position on the page rather than by reading order, so they
+    hold when the OCR engine returns tokens in a slightly different order.
+    """
+
+    def __init__(self, tokens: List[Any]) -> None:
+        # token_store.OCRToken, or anything else with a text and a four-point box
+        self.tokens = tokens
+        boxes = np.array([token.box for token in tokens], dtype=np.float32).reshape(-1, 4, 2)
+        self.centers = boxes.mean(axis=1)
+        self.widths = boxes[:, :, 0].max(axis=1) - boxes[:, :, 0].min(axis=1)
+        heights = boxes[:, :, 1].max(axis=1) - boxes[:, :, 1].min(axis=1)
+
+        # One sweep down the page: a token opens a new row once it is too far below the row's first token
+        tolerance = ROW_TOLERANCE * float(np.median(heights)) if len(tokens) else 0.0
+        self.row_of = np.zeros(len(tokens), dtype=np.int64)
+        self.rows: List[List[int]] = []
+        row_top = None
+        for idx in np.argsort(self.centers[:, 1], kind="stable"):
+            if row_top is None or self.centers[idx, 1] - row_top > tolerance:
+                row_top = self.centers[idx, 1]
+                self.rows.append([])
+            self.row_of[idx] = len(self.rows) - 1
+            self.rows[-1].append(int(idx))
+        for row in self.rows:
+            row.sort(key=lambda idx: self.centers[idx, 0])
+
+    def text(self, idx: int) -> str:
+        return self.tokens[idx].text
+
+    def find(self, predicate: Callable[[str], bool]) -> List[int]:
+        """Tokens whose text matches, top to bottom and left to right."""
+
+        return [idx for row in self.rows for idx in row if predicate(self.tokens[idx].text)]
+
+    def row_neighbors(
+        self,
+        idx: int,
+        direction: int,
+        predicate: Callable[[str], bool] = any_text,
+        bounds: Optional[Bounds] = None,
+    ) -> List[int]:
+        """Matching tokens of ``idx``'s row on its left (``direction`` -1) or right (1), nearest first.
+
+        ``bounds`` limits them to a horizontal range of the page.
+        """
+
+        x = self.centers[idx, 0]
+        neighbors = [
+            other
+            for other in self.rows[self.row_of[idx]]
+            if (self.centers[other, 0] - x) * direction > 0
+            and (bounds is None or bounds[0] <= self.centers[other, 0] <= bounds[1])
+            and predicate(self.tokens[other].text)
+        ]
+        return sorted(neighbors, key=lambda other: abs(self.centers[other, 0] - x))
+
+    def nearest_in_row(
+        self,
+        idx: int,
+        direction: int,
+        predicate: Callable[[str], bool] = any_text,
+        bounds: Optional[Bounds] = None,
+    ) -> Optional[int]:
+        """Nearest matching token on ``idx``'s left (``direction`` -1) or right (1), None if there is none."""
+
+        neighbors = self.row_neighbors(idx, direction, predicate, bounds)
+        return neighbors[0] if neighbors else None
+
+    def column_above(self, idx: int, predicate: Callable[[str], bool] = any_text) -> List[int]:
+        """Matching tokens above ``idx`` and centered within its width, top to bottom."""
+
+        x, y = self.centers[idx]
+        reach = self.widths[idx] / 2
+        column = [
+            other
+            for other in range(len(self.tokens))
+            if self.centers[other, 1] < y
+            and abs(self.centers[other, 0] - x) <= max(reach, self.widths[other] / 2)
+            and predicate(self.tokens[other].text)
+        ]
+        return sorted(column, key=lambda other: self.centers[other, 1])
+
+
+class RoundGrid(NamedTuple):
+    """Round scores of every judge: one list per judge, one score per round fought, "-" if missing."""
+
+    red: List[List[str]]
+    blue: List[List[str]]
+
+
+def is_round_number(text: str) -> bool:
+    return text.isdigit() and 1 <= int(text) <= MAX_ROUNDS
+
+
+def panel_bounds(index: SpatialIndex, anchors: List[int]) -> Dict[int, Bounds]:
+    """Horizontal extent of every judge's panel, split halfway between neighbouring panel anchors."""
+
+    xs = [float(index.centers[anchor, 0]) for anchor in anchors]
+    bounds = {}
+    for position, anchor in enumerate(anchors):
+        left = (xs[position - 1] + xs[position]) / 2 if position > 0 else -np.inf
+        right = (xs[position] + xs[position + 1]) / 2 if position + 1 < len(xs) else np.inf
+        bounds[anchor] = (left, right)
+    return bounds
+
+
+def extract_round_grid(index: SpatialIndex, total_labels: List[int]) -> RoundGrid:
+    """Read every judge's round scores from the round tables above the "TOTAL" labels.
+
+    Each judge's panel has a center column of round numbers aligned with its
+    "TOTAL" label, the red corner's round scores in the outermost column on
+    the left and the blue corner's on the right, with point deductions in
+    between.
+    """
+
+    anchors = sorted(total_labels, key=lambda idx: index.centers[idx, 0])
+    bounds = panel_bounds(index, anchors)
+    grid = RoundGrid([], [])
+    for anchor in anchors:
+        rounds: Dict[int, List[str]] = {}
+        # Bottom up, so the round column wins over stray digits higher up the page
+        for marker in reversed(index.column_above(anchor, is_round_number)):
+            round_number = int(index.text(marker))
+            if round_number in rounds:
+                continue
+            # Outermost number of the panel on each side: the round score, not a deduction
+            red = index.row_neighbors(marker, -1, str.isdigit, bounds[anchor])
+            blue = index.row_neighbors(marker, 1, str.isdigit, bounds[anchor])
+            rounds[round_number] = [
+                index.text(red[-1]) if red else "-",
+                index.text(blue[-1]) if blue else "-",
+            ]
+
+        # Rounds after a stoppage keep their numbers but not their scores
+        scored = [round_number for round_number, scores in rounds.items() if scores != ["-", "-"]]
+        fought = range(1, max(scored) + 1) if scored else range(0)
+        grid.red.append([rounds.get(round_number, ["-", "-"])[0] for round_number in fought])
+        grid.blue.append([rounds.get(round_number, ["-", "-"])[1] for round_number in fought])
+    return grid
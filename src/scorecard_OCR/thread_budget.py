@@ -0,0 +1,144 @@
+import json
+import logging
+import os
+from pathlib import Path
+from typing import List, NamedTuple, Optional
+
+import cv2
+
+
+# Inference threads per worker when nothing else decides it. Detection and
+# recognition scale poorly past a few threads, more processes scale better
+DEFAULT_THREADS_PER_WORKER = 2
+# Resident memory of one worker with the detection and recognition models loaded
+WORKER_MEMORY_MB = 1200
+
+# Environment variables read by the math libraries when they start their thread pools
+THREAD_ENV_VARS = ["OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"]
+
+
+class ThreadBudget(NamedTuple):
+    """How the host's cores are split: worker processes and inference threads inside each."""
+
+    num_workers: int
+    threads_per_worker: int
+
+
+def available_cpus() -> int:
+    """Cores this process may run on, which can be fewer than the host's in a container or under taskset."""
+
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def available_memory_mb() -> Optional[float]:
+    """Memory available for new processes, in MB. None where /proc/meminfo doesn't exist."""
+
+    try:
+        with open("/proc/meminfo", "r") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    # Reported in kB
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def max_workers_for_memory(memory_mb: Optional[float]) -> Optional[int]:
+    """Workers that fit in the available memory, None if it's unknown."""
+
+    if memory_mb is None:
+        return None
+    return max(1, int(memory_mb // WORKER_MEMORY_MB))
+
+
+def plan_thread_budget(
+    num_workers: Optional[int] = None,
+    threads_per_worker: Optional[int] = None,
+    cpus: Optional[int] = None,
+    memory_mb: Optional[float] = None,
+) -> ThreadBudget:
+    """Derive worker processes and threads per worker together, so they never oversubscribe the cores.
+
+    Either number can be given as an override and the other is derived from
+    it. Without overrides, workers get ``DEFAULT_THREADS_PER_WORKER`` threads
+    each, as many workers as the cores and memory allow are started, and
+    cores left over when memory limits the workers go to their threads.
+    """
+
+    cpus = cpus or available_cpus()
+    if memory_mb is None:
+        memory_mb = available_memory_mb()
+    memory_workers = max_workers_for_memory(memory_mb)
+
+    def fitting_workers(threads: int) -> int:
+        workers = max(1, cpus // threads)
+        return min(workers, memory_workers) if memory_workers is not None else workers
+
+    if num_workers is not None and threads_per_worker is not None:
+        budget = ThreadBudget(num_workers, threads_per_worker)
+    elif threads_per_worker is not None:
+        budget = ThreadBudget(fitting_workers(threads_per_worker), threads_per_worker)
+    elif num_workers is not None:
+        budget = ThreadBudget(num_workers, max(1, cpus // num_workers))
+    else:
+        workers = fitting_workers(DEFAULT_THREADS_PER_WORKER)
+        budget = ThreadBudget(workers, max(DEFAULT_THREADS_PER_WORKER, cpus // workers))
+
+    if budget.num_workers * budget.threads_per_worker > cpus:
+        logging.warning(
+            f"{budget.num_workers} workers x {budget.threads_per_worker} threads oversubscribe {cpus} cores"
+        )
+    return budget
+
+
+def candidate_budgets(cpus: Optional[int] = None, memory_mb: Optional[float] = None) -> List[ThreadBudget]:
+    """Splits of the cores worth calibrating: powers of two threads per worker, the most workers for each."""
+
+    cpus = cpus or available_cpus()
+    candidates = []
+    threads = 1
+    while threads <= cpus:
+        candidates.append(plan_thread_budget(threads_per_worker=threads, cpus=cpus, memory_mb=memory_mb))
+        threads *= 2
+    return list(dict.fromkeys(candidates))
+
+
+def limit_threads(threads: int) -> None:
+    """Cap the threads of the math libraries and OpenCV in this process.
+
+    Called in every worker before its engine is loaded, since the libraries
+    size their thread pools once, when first used.
+    """
+
+    for var in THREAD_ENV_VARS:
+        os.environ[var] = str(threads)
+    cv2.setNumThreads(threads)
+
+
+def save_thread_budget(budget: ThreadBudget, budget_path: Path) -> None:
+    """Store a calibrated budget, along with the cores it was calibrated for."""
+
+    budget_path = Path(budget_path)
+    budget_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(budget_path, "w", encoding="utf-8") as f:
+        json.dump({"cpus": available_cpus(), **budget._asdict()}, f, indent=2)
+        f.write("\n")
+
+
+def load_thread_budget(budget_path: Path) -> Optional[ThreadBudget]:
+    """The calibrated budget, or None if there is none or it was calibrated for a different core count."""
+
+    budget_path = Path(budget_path)
+    if not budget_path.exists():
+        return None
+    with open(budget_path, "r", encoding="utf-8") as f:
+        stored = json.load(f)
+
+    if stored.get("cpus") != available_cpus():
+        logging.info(f"Ignoring {budget_path}, it was calibrated for {stored.get('cpus')} cores")
+        return None
+    return ThreadBudget(stored["num_workers"], stored["threads_per_worker"])
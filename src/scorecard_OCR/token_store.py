@@ -0,0 +1,122 @@
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional
+
+import numpy as np
+
+
+class OCRToken(NamedTuple):
+    """A single recognized text box."""
+
+    text: str
+    confidence: float
+    # Four (x, y) corner points, clockwise from top-left, in the full-resolution page's pixels
+    box: List[List[float]]
+
+
+def tokens_from_result(result: Any) -> List[OCRToken]:
+    """Flatten a raw PaddleOCR result into tokens in reading order."""
+
+    tokens: List[OCRToken] = []
+    for page in result or []:
+        for box, (text, confidence) in page or []:
+            tokens.append(OCRToken(text, float(confidence), [[float(x), float(y)] for x, y in box]))
+    return tokens
+
+
+def save_token_store(
+    tokens_by_image: Dict[str, List[OCRToken]],
+    store_path: Path,
+    layouts: Optional[Dict[str, str]] = None,
+) -> None:
+    """Write the tokens of every image into one compressed columnar ``.npz`` file.
+
+    Tokens of all images are concatenated column by column; ``offsets[i]`` and
+    ``offsets[i + 1]`` delimit the rows belonging to ``image_paths[i]``. The
+    layout each image was classified as is stored alongside, when known.
+    """
+
+    image_paths = list(tokens_by_image)
+    layouts = layouts or {}
+    all_tokens = [token for path in image_paths for token in tokens_by_image[path]]
+    offsets = np.cumsum([0] + [len(tokens_by_image[path]) for path in image_paths], dtype=np.int64)
+
+    store_path = Path(store_path)
+    store_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(store_path, "wb") as f:
+        np.savez_compressed(
+            f,
+            image_paths=np.array(image_paths, dtype=str),
+            layouts=np.array([layouts.get(path, "") for path in image_paths], dtype=str),
+            offsets=offsets,
+            texts=np.array([token.text for token in all_tokens], dtype=str),
+            confidences=np.array([token.confidence for token in all_tokens], dtype=np.float32),
+            boxes=np.array([token.box for token in all_tokens], dtype=np.float32).reshape(-1, 4, 2),
+        )
+
+
+def load_token_store(store_path: Path) -> Dict[str, List[OCRToken]]:
+    """Read a token store written by ``save_token_store``."""
+
+    with np.load(store_path, allow_pickle=False) as store:
+        image_paths = store["image_paths"].tolist()
+        offsets = store["offsets"].tolist()
+        texts = store["texts"].tolist()
+        confidences = store["confidences"].tolist()
+        boxes = store["boxes"].tolist()
+
+    return {
+        path: [
+            OCRToken(texts[i], confidences[i], boxes[i]) for i in range(offsets[idx], offsets[idx + 1])
+        ]
+        for idx, path in enumerate(image_paths)
+    }
+
+
+def load_token_layouts(store_path: Path) -> Dict[str, str]:
+    """Read the layout of every image in a token store. Images of unknown layout are left out."""
+
+    with np.load(store_path, allow_pickle=False) as store:
+        if "layouts" not in store.files:
+            return {}
+        return {
+            path: layout
+            for path, layout in zip(store["image_paths"].tolist(), store["layouts"].tolist())
+            if layout
+        }
+
+
+def token_part_path(store_path: Path, part: int) -> Path:
+    """Path of one partial token store, written at a checkpoint of a streaming run."""
+
+    store_path = Path(store_path)
+    return store_path.with_name(f"{store_path.stem}.part-{part:05d}{store_path.suffix}")
+
+
+def list_token_parts(store_path: Path) -> List[Path]:
+    """Partial token stores of a run, oldest first."""
+
+    store_path = Path(store_path)
+    return sorted(store_path.parent.glob(f"{store_path.stem}.part-*{store_path.suffix}"))
+
+
+def merge_token_parts(store_path: Path, keep_existing: bool = True) -> None:
+    """Fold the partial token stores into the main store and delete them.
+
+    Tokens already in the main store are kept unless ``keep_existing`` is off;
+    later parts win for images that were OCR'd more than once.
+    """
+
+    store_path = Path(store_path)
+    parts = list_token_parts(store_path)
+    if not parts:
+        return
+
+    tokens_by_image: Dict[str, List[OCRToken]] = {}
+    layouts: Dict[str, str] = {}
+    for path in ([store_path] if keep_existing and store_path.exists() else []) + parts:
+        tokens_by_image.update(load_token_store(path))
+        layouts.update(load_token_layouts(path))
+
+    save_token_store(tokens_by_image, store_path, layouts)
+    for part in parts:
+        part.unlink()
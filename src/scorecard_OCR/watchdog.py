@@ -0,0 +1,233 @@
+import logging
+import multiprocessing
+import os
+import resource
+import sys
+import time
+from multiprocessing.pool import AsyncResult
+from multiprocessing.queues import SimpleQueue
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+import pandas as pd
+import psutil
+
+
+# How often the parent checks for tasks whose worker is gone, in seconds
+POLL_INTERVAL_S = 1.0
+# Times a task is run again after its worker died running it, before it is given up on
+MAX_RERUNS = 2
+
+# What a worker reports about a task
+TASK_STARTED = "started"
+TASK_FINISHED = "finished"
+# Left to another worker by a worker recycled for memory
+TASK_HANDED_BACK = "handed_back"
+
+
+def current_rss_mb() -> float:
+    """Resident memory of this process right now, in MB."""
+
+    return psutil.Process().memory_info().rss / (1 << 20)
+
+
+def peak_rss_mb() -> float:
+    """Peak resident memory of this process so far, in MB."""
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS, in kilobytes on Linux
+    return peak / (1 << 20) if sys.platform == "darwin" else peak / 1024
+
+
+def process_alive(pid: int) -> bool:
+    """Whether the process is still running. A process that exited but wasn't reaped yet counts as gone."""
+
+    try:
+        return psutil.Process(pid).status() != psutil.STATUS_ZOMBIE
+    except psutil.NoSuchProcess:
+        return False
+
+
+class WorkerWatchdog:
+    """Worker side of the watchdog: reports the tasks a worker starts and its memory, and recycles it.
+
+    A worker that grew past ``memory_limit_mb`` exits when it is handed its
+    next task, before doing any work on it. The pool starts a fresh worker in
+    its place, and the parent, told the task was handed back, runs it again.
+    A worker always runs its first task, so a limit below the loaded engine's
+    own footprint can't recycle it forever.
+    """
+
+    def __init__(self, reports: SimpleQueue, memory_limit_mb: Optional[float] = None) -> None:
+        self.reports = reports
+        self.memory_limit_mb = memory_limit_mb
+        self.tasks_started = 0
+
+    def report(self, task_key: str, event: str) -> float:
+        rss_mb = current_rss_mb()
+        peak_mb = peak_rss_mb()
+        # A SimpleQueue writes to the pipe right away, so the report is out even if the worker exits next
+        self.reports.put((task_key, event, os.getpid(), rss_mb, peak_mb))
+        return rss_mb
+
+    def start_task(self, task_key: str) -> None:
+        rss_mb = self.report(task_key, TASK_STARTED)
+        self.tasks_started += 1
+        if self.memory_limit_mb is not None and rss_mb > self.memory_limit_mb and self.tasks_started > 1:
+            logging.info(
+                f"Worker {os.getpid()} uses {rss_mb:.0f} MB, over the {self.memory_limit_mb:.0f} MB limit: "
+                "recycling it"
+            )
+            self.report(task_key, TASK_HANDED_BACK)
+            os._exit(0)
+
+    def end_task(self, task_key: str) -> None:
+        # Reported before the result goes out, so a worker that exits after a task never loses it
+        self.report(task_key, TASK_FINISHED)
+
+
+class TaskTracker:
+    """Parent side of the watchdog: the worker running every task, and the memory workers report."""
+
+    def __init__(self, reports: SimpleQueue) -> None:
+        self.reports = reports
+        self.running: Dict[str, int] = {}
+        self.handed_back: List[str] = []
+        # Times every task was running on a worker that died
+        self.crashes: Dict[str, int] = {}
+        self.rss_mb: Dict[int, List[float]] = {}
+        self.peak_mb: Dict[int, float] = {}
+        self.tasks: Dict[int, int] = {}
+
+    def poll(self) -> None:
+        """Read the reports sent by the workers since the last poll."""
+
+        while not self.reports.empty():
+            task_key, event, pid, rss_mb, peak_mb = self.reports.get()
+            if event == TASK_STARTED:
+                self.running[task_key] = pid
+                self.tasks[pid] = self.tasks.get(pid, 0) + 1
+            elif self.running.get(task_key) == pid:
+                del self.running[task_key]
+                if event == TASK_HANDED_BACK:
+                    self.handed_back.append(task_key)
+            self.rss_mb.setdefault(pid, []).append(rss_mb)
+            self.peak_mb[pid] = max(self.peak_mb.get(pid, 0.0), peak_mb)
+
+    def finish(self, task_key: str) -> None:
+        self.running.pop(task_key, None)
+
+    def lost(self) -> List[str]:
+        """Tasks started by workers that are gone before finishing them: handed back or crashed."""
+
+        self.poll()
+        crashed = [task_key for task_key, pid in self.running.items() if not process_alive(pid)]
+        for task_key in crashed:
+            del self.running[task_key]
+            self.crashes[task_key] = self.crashes.get(task_key, 0) + 1
+        lost, self.handed_back = self.handed_back + crashed, []
+        return lost
+
+    def summary(self) -> str:
+        """Table of the tasks and the average and peak memory of every worker process of the run."""
+
+        self.poll()
+        if not self.peak_mb:
+            return "No worker reported its memory"
+
+        rows = [
+            [
+                pid,
+                self.tasks.get(pid, 0),
+                round(sum(self.rss_mb[pid]) / len(self.rss_mb[pid]), 1),
+                round(self.peak_mb[pid], 1),
+            ]
+            for pid in sorted(self.peak_mb)
+        ]
+        table = pd.DataFrame(rows, columns=["worker", "tasks", "mean_rss_mb", "peak_rss_mb"])
+        return f"Worker memory\n\n{table.to_string(index=False)}"
+
+
+def watch_results(
+    tasks: Iterator[List[Any]],
+    tracker: TaskTracker,
+    chunks: List[List[str]],
+    key_of: Callable[[Any], str],
+    rerun: Callable[[str], AsyncResult],
+    abandon: Callable[[str], Any],
+    max_reruns: int = MAX_RERUNS,
+) -> Iterator[Any]:
+    """Results of the pool's ``tasks`` as they complete, running the tasks of workers that are gone again.
+
+    The pool hands the tasks out in ``chunks``, the keys of the tasks of
+    every dispatch, and ``tasks`` yields the results of a chunk together.
+    ``key_of`` gives the key of a task's result and ``rerun`` submits a
+    single task again by its key. A task lost with its worker never comes
+    out of ``tasks``, so the results stop once every task has one, rather
+    than when ``tasks`` is exhausted. A task that completes twice is only
+    yielded once.
+
+    Every result already in is taken before looking for lost tasks, so the
+    task of a worker that exited right after it, e.g. recycled after its
+    last task, isn't taken for lost and run again. With the task lost, the
+    rest of its chunk is lost too: the tasks that ran before it and those
+    that hadn't started yet.
+
+    Reruns report to the tracker like any task, so a rerun lost with its
+    worker is run again too. A task whose worker died running it more than
+    ``max_reruns`` times, e.g. one that crashes every worker, is given up
+    on: ``abandon`` gives the result yielded in its place. Tasks handed back
+    by workers recycled for memory don't count.
+    """
+
+    pending = {task_key for chunk in chunks for task_key in chunk}
+    chunk_of = {task_key: chunk for chunk in chunks for task_key in chunk}
+    reruns: Dict[str, AsyncResult] = {}
+    exhausted = False
+    while pending:
+        completed = []
+        if not exhausted:
+            try:
+                completed.extend(tasks.next(timeout=POLL_INTERVAL_S))
+                while True:
+                    completed.extend(tasks.next(timeout=0))
+            except StopIteration:
+                exhausted = True
+            except multiprocessing.TimeoutError:
+                pass
+        elif reruns:
+            next(iter(reruns.values())).wait(POLL_INTERVAL_S)
+        else:
+            time.sleep(POLL_INTERVAL_S)
+
+        for task_key, rerun_result in list(reruns.items()):
+            if rerun_result.ready():
+                del reruns[task_key]
+                completed.append(rerun_result.get())
+
+        completed_keys = [key_of(result) for result in completed]
+        for task_key in completed_keys:
+            tracker.finish(task_key)
+
+        lost = []
+        for task_key in tracker.lost():
+            # A rerun runs on its own
+            lost_chunk = [task_key] if task_key in reruns else chunk_of.get(task_key, [task_key])
+            lost.extend(key for key in lost_chunk if key == task_key or key not in reruns)
+
+        for task_key in dict.fromkeys(lost):
+            if task_key not in pending or task_key in completed_keys:
+                continue
+            # A rerun lost with its worker never becomes ready
+            reruns.pop(task_key, None)
+            if tracker.crashes.get(task_key, 0) > max_reruns:
+                logging.error(f"The task of {task_key} killed {max_reruns + 1} workers, giving up on it")
+                completed.append(abandon(task_key))
+                completed_keys.append(task_key)
+                continue
+            logging.warning(f"The worker running the task of {task_key} is gone, running the task again")
+            reruns[task_key] = rerun(task_key)
+
+        for result, task_key in zip(completed, completed_keys):
+            if task_key in pending:
+                pending.discard(task_key)
+                yield result
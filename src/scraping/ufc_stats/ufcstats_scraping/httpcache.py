@@ -0,0 +1,302 @@
+# Compressed on-disk HTTP cache for the ufcstats spider, and its offline replay mode.
+#
+# Enabled in settings.py. To train a zstd dictionary on the cached pages and
+# recompress them with it, from src/scraping/ufc_stats:
+#
+#     python -m ufcstats_scraping.httpcache train
+
+import argparse
+import gzip
+import json
+import logging
+import os
+from pathlib import Path
+from time import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from scrapy import Spider
+from scrapy.extensions.httpcache import DummyPolicy
+from scrapy.http import Headers, Request, Response
+from scrapy.responsetypes import responsetypes
+from scrapy.settings import BaseSettings
+from scrapy.utils.project import data_path, get_project_settings
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+logger = logging.getLogger(__name__)
+
+ZSTD_SUFFIX = ".zst"
+GZIP_SUFFIX = ".gz"
+# Kept next to the cached pages of a spider
+DICTIONARY_NAME = "dictionary.zstd"
+
+# Dictionary training: fewer pages don't train a useful dictionary, more only slow the training down
+MIN_TRAINING_PAGES = 20
+MAX_TRAINING_PAGES = 2000
+DICTIONARY_SIZE = 112640
+
+# Settings that run a crawl from the HTTP cache alone, without touching the network
+REPLAY_SETTINGS: Dict[str, Any] = {
+    "HTTPCACHE_ENABLED": True,
+    "HTTPCACHE_EXPIRATION_SECS": 0,
+    # Pages missing from the cache are dropped instead of downloaded
+    "HTTPCACHE_IGNORE_MISSING": True,
+    "ROBOTSTXT_OBEY": False,
+    "RETRY_ENABLED": False,
+    "DOWNLOAD_DELAY": 0,
+    "AUTOTHROTTLE_ENABLED": False,
+    "CONCURRENT_REQUESTS": 64,
+    "CONCURRENT_REQUESTS_PER_DOMAIN": 64,
+}
+
+# A cached page: its metadata and body
+Page = Tuple[Dict[str, Any], bytes]
+
+
+class RefreshingPolicy(DummyPolicy):
+    """Serves every cached page but those requested with the ``refresh_cache`` meta key.
+
+    Completed events and their fights don't change once published, but the
+    listing of completed events grows with every event, so it is downloaded
+    again on every crawl. When replaying, everything comes from the cache.
+    """
+
+    def __init__(self, settings: BaseSettings) -> None:
+        super().__init__(settings)
+        self.replay = settings.getbool("HTTPCACHE_REPLAY")
+
+    def is_cached_response_fresh(self, cachedresponse: Response, request: Request) -> bool:
+        return self.replay or not request.meta.get("refresh_cache", False)
+
+    def is_cached_response_valid(
+        self, cachedresponse: Response, response: Response, request: Request
+    ) -> bool:
+        # The downloaded page replaces the cached one, rather than just revalidating it
+        return not request.meta.get("refresh_cache", False)
+
+
+class ZstdCodec:
+    """zstd compression, with the spider's trained dictionary when there is one."""
+
+    suffix = ZSTD_SUFFIX
+
+    def __init__(self, level: int, dictionary: Optional["zstandard.ZstdCompressionDict"] = None) -> None:
+        self.dictionary = dictionary
+        self.dict_id = dictionary.dict_id() if dictionary is not None else 0
+        self.compressor = zstandard.ZstdCompressor(level=level, dict_data=dictionary)
+        self.plain_decompressor = zstandard.ZstdDecompressor()
+        self.decompressor = zstandard.ZstdDecompressor(dict_data=dictionary)
+
+    def compress(self, data: bytes) -> bytes:
+        return self.compressor.compress(data)
+
+    def decompress(self, data: bytes) -> Optional[bytes]:
+        """The decompressed data, None if it was compressed with another dictionary than the current one."""
+
+        dict_id = zstandard.get_frame_parameters(data).dict_id
+        if dict_id == 0:
+            return self.plain_decompressor.decompress(data)
+        if dict_id != self.dict_id:
+            return None
+        return self.decompressor.decompress(data)
+
+
+class GzipCodec:
+    """gzip compression, when zstandard isn't installed."""
+
+    suffix = GZIP_SUFFIX
+
+    def compress(self, data: bytes) -> bytes:
+        return gzip.compress(data)
+
+    def decompress(self, data: bytes) -> Optional[bytes]:
+        return gzip.decompress(data)
+
+
+def load_dictionary(spider_dir: Path) -> Optional["zstandard.ZstdCompressionDict"]:
+    dictionary_path = spider_dir / DICTIONARY_NAME
+    if not dictionary_path.exists():
+        return None
+    return zstandard.ZstdCompressionDict(dictionary_path.read_bytes())
+
+
+def encode_page(request: Request, response: Response) -> bytes:
+    """A response as one JSON line of metadata followed by the raw body."""
+
+    metadata = {
+        "url": request.url,
+        "method": request.method,
+        "status": response.status,
+        "response_url": response.url,
+        "headers": {
+            key.decode("latin-1"): [value.decode("latin-1") for value in values]
+            for key, values in response.headers.items()
+        },
+        "timestamp": time(),
+    }
+    return json.dumps(metadata).encode("utf-8") + b"\n" + response.body
+
+
+def decode_page(data: bytes) -> Page:
+    metadata, body = data.split(b"\n", 1)
+    return json.loads(metadata), body
+
+
+def write_atomically(path: Path, data: bytes) -> None:
+    # Readers and interrupted crawls never see a half-written page
+    partial_path = path.with_name(f"{path.name}.{os.getpid()}.partial")
+    partial_path.write_bytes(data)
+    os.replace(partial_path, path)
+
+
+class CompressedCacheStorage:
+    """HTTP cache storage keeping every response in one compressed file, keyed by its request fingerprint.
+
+    Pages are compressed with zstd, with a dictionary trained on cached
+    ufcstats pages once ``train_dictionary`` has been run: the pages share
+    most of their markup, which the dictionary holds instead of every page.
+    Without zstandard installed, pages are gzipped. Pages compressed either
+    way are read back, so switching doesn't throw the cache away.
+
+    Settings, besides Scrapy's ``HTTPCACHE_DIR`` and ``HTTPCACHE_EXPIRATION_SECS``:
+    ``HTTPCACHE_COMPRESSION`` ("zstd" or "gzip") and ``HTTPCACHE_ZSTD_LEVEL``.
+    """
+
+    def __init__(self, settings: BaseSettings) -> None:
+        self.cachedir = Path(data_path(settings["HTTPCACHE_DIR"]))
+        self.expiration_secs = settings.getint("HTTPCACHE_EXPIRATION_SECS")
+        self.level = settings.getint("HTTPCACHE_ZSTD_LEVEL", 10)
+        self.compression = settings.get("HTTPCACHE_COMPRESSION", "zstd")
+        if self.compression not in ("zstd", "gzip"):
+            raise ValueError(f"Unknown HTTP cache compression: {self.compression}")
+        if self.compression == "zstd" and zstandard is None:
+            logger.warning("zstandard isn't installed, gzipping the HTTP cache instead")
+            self.compression = "gzip"
+
+    def open_spider(self, spider: Spider) -> None:
+        self.spider_dir = self.cachedir / spider.name
+        self.codecs: Dict[str, Any] = {GZIP_SUFFIX: GzipCodec()}
+        if zstandard is not None:
+            self.codecs[ZSTD_SUFFIX] = ZstdCodec(self.level, load_dictionary(self.spider_dir))
+        self.codec = self.codecs[ZSTD_SUFFIX if self.compression == "zstd" else GZIP_SUFFIX]
+        self._fingerprinter = spider.crawler.request_fingerprinter
+        logger.debug(
+            f"Using {self.compression} compressed cache storage in {self.spider_dir}",
+            extra={"spider": spider},
+        )
+
+    def close_spider(self, spider: Spider) -> None:
+        pass
+
+    def _page_path(self, request: Request, suffix: str) -> Path:
+        key = self._fingerprinter.fingerprint(request).hex()
+        return self.spider_dir / key[:2] / f"{key}{suffix}"
+
+    def read_page(self, path: Path) -> Optional[Page]:
+        """The cached page at ``path``, None if it can't be read here."""
+
+        codec = self.codecs.get(path.suffix)
+        if codec is None:
+            return None
+        data = codec.decompress(path.read_bytes())
+        if data is None:
+            logger.warning(f"{path} was compressed with another dictionary, ignoring it")
+            return None
+        return decode_page(data)
+
+    def retrieve_response(self, spider: Spider, request: Request) -> Optional[Response]:
+        """The cached response to the request, None if it isn't cached or expired."""
+
+        # The configured compression first, a page stored since may have replaced the other one
+        suffixes = sorted(self.codecs, key=lambda suffix: suffix != self.codec.suffix)
+        for suffix in suffixes:
+            path = self._page_path(request, suffix)
+            if path.exists():
+                page = self.read_page(path)
+                if page is not None:
+                    break
+        else:
+            return None
+
+        metadata, body = page
+        if 0 < self.expiration_secs < time() - metadata["timestamp"]:
+            return None
+        url = metadata["response_url"]
+        headers = Headers(metadata["headers"])
+        respcls = responsetypes.from_args(headers=headers, url=url, body=body)
+        return respcls(url=url, headers=headers, status=metadata["status"], body=body)
+
+    def store_response(self, spider: Spider, request: Request, response: Response) -> None:
+        path = self._page_path(request, self.codec.suffix)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        write_atomically(path, self.codec.compress(encode_page(request, response)))
+        for suffix in self.codecs:
+            if suffix != self.codec.suffix:
+                self._page_path(request, suffix).unlink(missing_ok=True)
+
+
+def cached_page_paths(spider_dir: Path) -> List[Path]:
+    return sorted(path for path in spider_dir.glob("*/*") if path.suffix in (ZSTD_SUFFIX, GZIP_SUFFIX))
+
+
+def train_dictionary(spider_dir: Path, level: int = 10, dict_size: int = DICTIONARY_SIZE) -> int:
+    """Train a zstd dictionary on a spider's cached pages and recompress them all with it.
+
+    Run it while no crawl is writing to the cache. Returns the number of
+    recompressed pages.
+    """
+
+    if zstandard is None:
+        raise ValueError("Training a dictionary needs zstandard installed")
+
+    old_codecs = {ZSTD_SUFFIX: ZstdCodec(level, load_dictionary(spider_dir)), GZIP_SUFFIX: GzipCodec()}
+
+    def read_all(paths: List[Path]) -> Iterator[Tuple[Path, bytes]]:
+        for path in paths:
+            data = old_codecs[path.suffix].decompress(path.read_bytes())
+            if data is not None:
+                yield path, data
+
+    paths = cached_page_paths(spider_dir)
+    if len(paths) < MIN_TRAINING_PAGES:
+        raise ValueError(
+            f"{len(paths)} cached pages in {spider_dir}, at least {MIN_TRAINING_PAGES} are needed"
+        )
+
+    samples = [data for _, data in read_all(paths[:: max(1, len(paths) // MAX_TRAINING_PAGES)])]
+    dictionary = zstandard.train_dictionary(dict_size, samples, level=level)
+    codec = ZstdCodec(level, dictionary)
+
+    # The pages are rewritten before the dictionary is replaced, so no page is left unreadable
+    recompressed = 0
+    for path, data in read_all(paths):
+        write_atomically(path.with_suffix(ZSTD_SUFFIX), codec.compress(data))
+        if path.suffix != ZSTD_SUFFIX:
+            path.unlink()
+        recompressed += 1
+    write_atomically(spider_dir / DICTIONARY_NAME, dictionary.as_bytes())
+
+    logger.info(f"Trained a {len(dictionary.as_bytes())} byte dictionary, recompressed {recompressed} pages")
+    return recompressed
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    parser = argparse.ArgumentParser(description="Maintain the compressed HTTP cache of the ufcstats spider")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    train = subparsers.add_parser("train", help="Train a zstd dictionary on the cached pages")
+    train.add_argument("--spider", default="stats_spider", help="Spider whose cached pages to recompress")
+    train.add_argument("--dict-size", type=int, default=DICTIONARY_SIZE, help="Dictionary size in bytes")
+    args = parser.parse_args()
+
+    settings = get_project_settings()
+    spider_dir = Path(data_path(settings["HTTPCACHE_DIR"])) / args.spider
+    train_dictionary(spider_dir, settings.getint("HTTPCACHE_ZSTD_LEVEL", 10), args.dict_size)
+
+
+if __name__ == "__main__":
+    main()
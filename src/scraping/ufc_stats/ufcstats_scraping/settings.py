@@ -86,11 +86,20 @@ ITEM_PIPELINES = {
 
 # Enable and configure HTTP caching (disabled by default)
 # See https://docs.scrapy.org/en/latest/topics/downloader-middleware.html#httpcache-middleware-settings
-#HTTPCACHE_ENABLED = True
-#HTTPCACHE_EXPIRATION_SECS = 0
-#HTTPCACHE_DIR = "httpcache"
-#HTTPCACHE_IGNORE_HTTP_CODES = []
-#HTTPCACHE_STORAGE = "scrapy.extensions.httpcache.FilesystemCacheStorage"
+# Fetched pages are kept compressed under .scrapy/httpcache and reused by later
+# crawls, except the listing of completed events (see ufcstats_scraping/httpcache.py).
+HTTPCACHE_ENABLED = True
+HTTPCACHE_EXPIRATION_SECS = 0
+HTTPCACHE_DIR = "httpcache"
+HTTPCACHE_IGNORE_HTTP_CODES = [429, 500, 502, 503, 504]
+HTTPCACHE_STORAGE = "ufcstats_scraping.httpcache.CompressedCacheStorage"
+HTTPCACHE_POLICY = "ufcstats_scraping.httpcache.RefreshingPolicy"
+# "zstd", or "gzip" where zstandard isn't installed
+HTTPCACHE_COMPRESSION = "zstd"
+HTTPCACHE_ZSTD_LEVEL = 10
+# Re-parse everything from the cache alone, without network access:
+#     scrapy crawl stats_spider -s HTTPCACHE_REPLAY=1
+HTTPCACHE_REPLAY = False
 
 # Set settings whose default value is deprecated to a future-proof value
 REQUEST_FINGERPRINTER_IMPLEMENTATION = "2.7"
@@ -6,6 +6,7 @@ import scrapy
 from scrapy.http.request import Request
 from scrapy.http.response import Response
 
+from ..httpcache import REPLAY_SETTINGS
 from ..items import FightData
 
 
@@ -18,6 +19,11 @@ class StatsSpider(scrapy.Spider):
         scrapy crawl stats_spider -a since=14/03/2026
 
     When ``since`` is omitted the spider performs a full scrape.
+
+    Fetched pages are cached on disk. After fixing a selector, the whole
+    history can be re-parsed from the cache, without network access::
+
+        scrapy crawl stats_spider -s HTTPCACHE_REPLAY=1
     """
 
     name: str = "stats_spider"
@@ -32,6 +38,17 @@ class StatsSpider(scrapy.Spider):
         else:
             self.since = None
 
+    @classmethod
+    def update_settings(cls, settings) -> None:
+        super().update_settings(settings)
+        if settings.getbool("HTTPCACHE_REPLAY"):
+            settings.setdict(REPLAY_SETTINGS, priority="spider")
+
+    def start_requests(self) -> Iterator[Request]:
+        # The listing grows with every event, so it is downloaded again rather than served from the cache
+        for url in self.start_urls:
+            yield scrapy.Request(url=url, callback=self.parse, dont_filter=True, meta={"refresh_cache": True})
+
     @staticmethod
     def _parse_listing_date(text: str) -> Optional[datetime]:
         """Parse a date string like 'March 28, 2026' from the events listing."""
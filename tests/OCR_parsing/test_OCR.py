@@ -1,16 +1,42 @@
+import multiprocessing
+import os
+import random
+import shutil
+import sys
+import types
 from pathlib import Path
 from typing import List, Tuple
 
+import numpy as np
 import pandas as pd
 import pytest
 
+from src.scorecard_OCR import ocr
+from src.scorecard_OCR.backends import FakeBackend, ReplayBackend
+from src.scorecard_OCR.config import OCRConfig
+from src.scorecard_OCR.layouts import LAYOUT_V2
 from src.scorecard_OCR.ocr import (
+    RESULT_COLUMNS,
+    TIER_FAST,
+    TIER_FULL,
     FightData,
+    field_confidences,
+    get_engine,
+    init_warm_worker,
+    init_worker,
+    ocr_images,
     parse_image,
+    parse_old_tokens,
+    parse_tokens,
+    parse_v1_tokens,
     process_scorecards,
     read_images,
+    wait_for_workers,
 )
 
+from src.scorecard_OCR.filename_metadata import NAME_SOURCE_FILENAME, NAME_SOURCE_OCR, parse_filename
+from src.scorecard_OCR.token_store import OCRToken
+
 from .config import PathConfig
 
 
@@ -107,6 +133,8 @@ def expected_img_parsed_data() -> FightData:
         date="11/02/2024",
         red_fighter_total_pts=["49", "50", "50"],
         blue_fighter_total_pts=["46", "45", "45"],
+        red_fighter_round_pts=[["9", "10", "10", "10", "10"], ["10"] * 5, ["10"] * 5],
+        blue_fighter_round_pts=[["10", "9", "9", "9", "9"], ["9"] * 5, ["9"] * 5],
     )
 
 
@@ -120,8 +148,284 @@ def test_parse_image(mock_scorecard_image: Tuple[str, str], expected_img_parsed_
     assert got == expected_img_parsed_data
 
 
+def make_tokens(texts: List[str], confidence: float = 0.99) -> List[OCRToken]:
+    """Build OCR tokens in reading order from their texts"""
+
+    return [OCRToken(text, confidence, [[0.0, 0.0]] * 4) for text in texts]
+
+
+def mock_v2_tokens(confidence: float = 0.99) -> List[OCRToken]:
+    """OCR tokens of the mock v2 scorecard, placed where they are on the card"""
+
+    placed = [("11/02/2024", 50, 85), ("BRANDON MORENO", 430, 42), ("vs.", 590, 42), ("AMIR ALBAZI", 720, 42)]
+    red_rounds = [["9", "10", "10", "10", "10"], ["10"] * 5, ["10"] * 5]
+    blue_rounds = [["10", "9", "9", "9", "9"], ["9"] * 5, ["9"] * 5]
+    judge_columns = [147, 404, 660]
+    for x, red, blue in zip(judge_columns, red_rounds, blue_rounds):
+        placed += [("ROUND", x, 170)]
+        for round_idx in range(5):
+            y = 193 + 21 * round_idx
+            placed += [(red[round_idx], x - 90, y), (str(round_idx + 1), x, y), (blue[round_idx], x + 90, y)]
+    for x, (red, blue) in zip(judge_columns, [("49", "46"), ("50", "45"), ("50", "45")]):
+        placed += [(red, x - 65, 297), ("TOTAL", x, 297), (blue, x + 65, 297)]
+
+    def box(text: str, x: float, y: float) -> List[List[float]]:
+        half_width = 4 * len(text)
+        left, right = x - half_width, x + half_width
+        return [[left, y - 7], [right, y - 7], [right, y + 7], [left, y + 7]]
+
+    return [OCRToken(text, confidence, box(text, x, y)) for text, x, y in placed]
+
+
+def test_parse_tokens(expected_img_parsed_data) -> None:
+    """Testing parse_tokens on stored tokens, without running OCR, whatever their order"""
+
+    tokens = mock_v2_tokens()
+    assert parse_tokens(tokens) == expected_img_parsed_data
+
+    random.Random(0).shuffle(tokens)
+    assert parse_tokens(tokens) == expected_img_parsed_data
+
+
+def test_parse_tokens_early_stoppage() -> None:
+    """A judge panel without totals reads as "-", rounds after the stoppage are left out"""
+
+    def blank(token: OCRToken) -> bool:
+        x, y = np.mean(token.box, axis=0)
+        first_judge_total = y > 280 and x < 275 and token.text != "TOTAL"
+        late_round_score = 225 < y < 280 and token.text not in ("3", "4", "5")
+        return first_judge_total or late_round_score
+
+    fight_data = parse_tokens([token for token in mock_v2_tokens() if not blank(token)])
+
+    assert fight_data.red_fighter_total_pts == ["-", "50", "50"]
+    assert fight_data.blue_fighter_total_pts == ["-", "45", "45"]
+    assert fight_data.red_fighter_round_pts == [["9", "10"], ["10", "10"], ["10", "10"]]
+    assert fight_data.blue_fighter_round_pts == [["10", "9"], ["9", "9"], ["9", "9"]]
+
+
+def test_field_confidences() -> None:
+    """Every field takes the confidence of its token, the lowest one for point lists"""
+
+    tokens = mock_v2_tokens()
+    tokens[-1] = tokens[-1]._replace(confidence=0.5)
+
+    assert field_confidences(parse_tokens(tokens), tokens) == pytest.approx(
+        {
+            "red_fighter_name": 0.99,
+            "blue_fighter_name": 0.99,
+            "date": 0.99,
+            "red_fighter_total_pts": 0.99,
+            "blue_fighter_total_pts": 0.5,
+        }
+    )
+
+
+def test_cascade_falls_back_on_low_confidence(monkeypatch, expected_img_parsed_data) -> None:
+    """Testing that only low-confidence fast tier results are OCR'd again at full resolution"""
+
+    def fake_run_ocr_batch(image_paths, layouts=None, full_page=False, preset=None):
+        confidence = {"clean.jpg": 0.99, "faint.jpg": 0.5}
+        return [
+            mock_v2_tokens(confidence[path] if preset == "fastest" else 0.95)
+            for path in image_paths
+        ]
+
+    monkeypatch.setattr(ocr, "classify_layout", lambda image_path: LAYOUT_V2)
+    monkeypatch.setattr(ocr, "run_ocr_batch", fake_run_ocr_batch)
+
+    clean, faint = ocr_images(["clean.jpg", "faint.jpg"])
+
+    assert clean.fight_data == faint.fight_data == expected_img_parsed_data
+    assert clean.fight_data.ocr_tier == TIER_FAST
+    assert faint.fight_data.ocr_tier == TIER_FULL
+    assert min(faint.fight_data.confidences.values()) == pytest.approx(0.95)
+
+
+@pytest.fixture
+def reset_worker():
+    """Put the module's worker state back to the default PaddleOCR engine after the test"""
+
+    yield
+    init_worker(OCRConfig())
+
+
+class CountingEngine:
+    """Stands in for PaddleOCR, counting the engines built in every process in ``engines_dir``."""
+
+    engines_dir: Path = Path()
+    fail = False
+
+    def __init__(self, **kwargs) -> None:
+        with open(self.engines_dir / str(os.getpid()), "a") as f:
+            f.write("x")
+        if self.fail:
+            raise RuntimeError("Models failed to load")
+
+
+@pytest.fixture
+def counting_engine(monkeypatch, tmp_path: Path):
+    """Load CountingEngine instead of PaddleOCR, in this process and the workers it forks"""
+
+    monkeypatch.setattr(CountingEngine, "engines_dir", tmp_path)
+    monkeypatch.setitem(sys.modules, "models", types.SimpleNamespace(model_dir_kwargs=dict))
+    monkeypatch.setitem(sys.modules, "paddle_backend", types.SimpleNamespace(PaddleBackend=CountingEngine))
+    return tmp_path
+
+
+def engine_of_worker(_) -> Tuple[int, int]:
+    return os.getpid(), id(get_engine())
+
+
+@pytest.mark.parametrize("warm", [False, True])
+def test_engine_loaded_once_per_worker(counting_engine: Path, warm: bool) -> None:
+    """Every worker builds one engine, on its first task or up front, and keeps it for all its tasks"""
+
+    context = multiprocessing.get_context("fork")
+    ready = context.Semaphore(0)
+    initargs = (OCRConfig(), ready) if warm else (OCRConfig(),)
+    with context.Pool(2, init_warm_worker if warm else init_worker, initargs) as pool:
+        if warm:
+            wait_for_workers(ready, 2, timeout=30)
+        engines = pool.map(engine_of_worker, range(20), chunksize=1)
+
+    assert len(set(engines)) == len({pid for pid, _ in engines})
+    assert {pid: (counting_engine / str(pid)).read_text() for pid, _ in engines} == {
+        pid: "x" for pid, _ in engines
+    }
+
+
+def test_warm_worker_failing_to_load_releases(monkeypatch, counting_engine: Path) -> None:
+    """A worker whose engine fails to load doesn't leave the parent waiting, its tasks get the error"""
+
+    monkeypatch.setattr(CountingEngine, "fail", True)
+    context = multiprocessing.get_context("fork")
+    ready = context.Semaphore(0)
+    with context.Pool(2, init_warm_worker, (OCRConfig(), ready)) as pool:
+        wait_for_workers(ready, 2, timeout=30)
+        with pytest.raises(RuntimeError, match="Models failed to load"):
+            pool.apply_async(engine_of_worker, (0,)).get(timeout=30)
+
+
+def test_parse_image_on_replayed_tokens(
+    reset_worker, mock_scorecard_image: Tuple[str, str], expected_img_parsed_data
+) -> None:
+    """The whole pipeline, from the image file through template regions to parsing, on stored tokens"""
+
+    init_worker(OCRConfig(), backend=ReplayBackend({mock_scorecard_image[0]: mock_v2_tokens()}))
+
+    assert parse_image(mock_scorecard_image[0]) == expected_img_parsed_data
+
+
+def test_failing_image_is_isolated_from_its_batch(
+    reset_worker, tmp_path: Path, mock_scorecard_image: Tuple[str, str], expected_img_parsed_data
+) -> None:
+    """A batch with a broken image is retried image by image, and only the broken image fails"""
+
+    good, bad = str(tmp_path / "good.jpg"), str(tmp_path / "bad.jpg")
+    for image_path in (good, bad):
+        shutil.copy(mock_scorecard_image[0], image_path)
+    backend = FakeBackend(mock_v2_tokens(), fail={bad})
+    init_worker(OCRConfig(fast_preset=None), backend=backend)
+
+    good_result, bad_result = ocr_images([good, bad])
+
+    assert good_result.fight_data == expected_img_parsed_data
+    assert bad_result.stage == "ocr" and "bad.jpg" in bad_result.error
+    # Both images in their template regions, then one at a time. Only the broken one is tried again
+    assert backend.calls[:3] == [[good] * 3 + [bad] * 3, [good] * 3, [bad] * 3]
+    assert all(good not in call for call in backend.calls[3:])
+
+
+def test_names_region_skipped_when_filename_gives_them(
+    reset_worker, tmp_path: Path, mock_scorecard_image: Tuple[str, str]
+) -> None:
+    """The names of a card whose file name gives both aren't OCR'd, they come from the file name"""
+
+    titled = str(tmp_path / "UFC 309 Jones vs. Miocic - Scorecards - Moreno vs. Albazi_0.jpg")
+    shutil.copy(mock_scorecard_image[0], titled)
+    names = ("BRANDON MORENO", "vs.", "AMIR ALBAZI")
+    backend = FakeBackend([token for token in mock_v2_tokens() if token.text not in names])
+    init_worker(OCRConfig(fast_preset=None), backend=backend)
+
+    fight_data = parse_image(titled)
+
+    # The date and scores regions only
+    assert backend.calls == [[titled] * 2]
+    assert (fight_data.red_fighter_name, fight_data.blue_fighter_name) == ("MORENO", "ALBAZI")
+    assert fight_data.name_source == NAME_SOURCE_FILENAME
+
+
+def test_parse_v1_tokens() -> None:
+    """Testing the v1 commission scorecard parser"""
+
+    texts = ["Date:", "8/15/2020", "STIPE MIOCIC", "vs.", "DANIEL CORMIER"]
+    for red, blue in [("49", "46"), ("49", "46"), ("48", "47")]:
+        texts += ["FINAL SCORE", red, blue, "FINAL SCORE"]
+
+    assert parse_v1_tokens(make_tokens(texts)) == FightData(
+        red_fighter_name="STIPE MIOCIC",
+        blue_fighter_name="DANIEL CORMIER",
+        date="8/15/2020",
+        red_fighter_total_pts=["49", "49", "48"],
+        blue_fighter_total_pts=["46", "46", "47"],
+    )
+
+
+def test_parse_v1_tokens_names_from_filename() -> None:
+    """Testing that names from the file name replace misread ones, and count as certain"""
+
+    texts = ["Date:", "8/15/2020", "STIPE MI0CIC", "vs.", "DANIEL CORMIER"]
+    for red, blue in [("49", "46"), ("49", "46"), ("48", "47")]:
+        texts += ["FINAL SCORE", red, blue, "FINAL SCORE"]
+    tokens = make_tokens(texts)
+    metadata = parse_filename("stipe-miocic-daniel-cormier-ufc-252-scorecard.jpg")
+
+    fight_data = parse_v1_tokens(tokens, metadata)
+    assert (fight_data.red_fighter_name, fight_data.blue_fighter_name) == ("STIPE MIOCIC", "DANIEL CORMIER")
+    assert (fight_data.event, fight_data.name_source) == ("UFC 252", NAME_SOURCE_FILENAME)
+    assert field_confidences(fight_data, tokens)["red_fighter_name"] == 1.0
+
+
+def test_parse_old_tokens() -> None:
+    """Testing the old handwritten scorecard parser, blue corner written on the left"""
+
+    texts = ["Date", "5/9/2020", "GAETHJE", "vs.", "FERGUSON"]
+    texts += ["39", "10", "(4)", "9", "37"] * 3
+    texts += ["49", "10", "(5)", "7", "44", "49", "10", "(5)", "8", "45", "50", "10", "(5)", "8", "44"]
+    texts += ["(6)"] * 3
+
+    assert parse_old_tokens(make_tokens(texts)) == FightData(
+        red_fighter_name="FERGUSON",
+        blue_fighter_name="GAETHJE",
+        date="5/9/2020",
+        red_fighter_total_pts=["44", "45", "44"],
+        blue_fighter_total_pts=["49", "49", "50"],
+    )
+
+    # The file name lists the corners in another order, and full names where the card has surnames
+    metadata = parse_filename("tony-ferguson-justin-gaethje-ufc-249-scorecard.jpg")
+    fight_data = parse_old_tokens(make_tokens(texts), metadata)
+    assert (fight_data.red_fighter_name, fight_data.blue_fighter_name) == ("FERGUSON", "GAETHJE")
+    assert (fight_data.event, fight_data.name_source) == ("UFC 249", NAME_SOURCE_OCR)
+
+
+def test_ocr_images_isolates_failures(tmp_path: Path) -> None:
+    """Testing that a broken image is reported instead of failing its batch"""
+
+    broken = tmp_path / "broken.jpg"
+    broken.write_bytes(b"not a jpeg")
+
+    result = ocr_images([str(broken)])[0]
+    assert not result.ok
+    assert result.stage == "classify"
+
+    with pytest.raises(ValueError):
+        parse_image(str(broken))
+
+
 def test_process_scorecards(mock_scorecard_path: Path, mock_output_path: Path) -> None:
     """Testing process scorecards"""
 
     resulting_df: pd.DataFrame = process_scorecards(mock_scorecard_path, mock_output_path)
-    assert resulting_df.shape == (1, 5), "Resulting DataFrame should have 1 row and 5 columns"
+    assert resulting_df.shape == (1, len(RESULT_COLUMNS)), "Resulting DataFrame should have 1 row"
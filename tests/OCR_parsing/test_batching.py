@@ -0,0 +1,115 @@
+import shutil
+from pathlib import Path
+from typing import List
+
+import pytest
+
+from src.scorecard_OCR.backends import FakeBackend, OCRRequest
+from src.scorecard_OCR.batching import (
+    BATCHES_PER_WORKER,
+    MAX_BATCH_SIZE,
+    auto_batch_size,
+    load_image,
+    make_batches,
+    make_chunks,
+)
+from src.scorecard_OCR.config import OCRConfig
+from src.scorecard_OCR.layouts import LAYOUT_V2, crop_regions
+from src.scorecard_OCR.ocr import init_worker, run_ocr_batch
+from src.scorecard_OCR.preprocess import preprocess_config_for, preprocess_image
+
+from .config import PathConfig
+
+
+class RegionEchoBackend:
+    """Reads one token per request, naming the image and the offset of the region it was read on."""
+
+    name = "echo"
+
+    def ocr(self, requests: List[OCRRequest], stage=None) -> List[List]:
+        return [
+            [[[[[0, 0], [1, 0], [1, 1], [0, 1]], (f"{Path(request.image_path).name}@{request.offset}", 0.9)]]]
+            for request in requests
+        ]
+
+
+@pytest.fixture
+def echo_worker():
+    init_worker(OCRConfig(), backend=RegionEchoBackend())
+    yield
+    init_worker(OCRConfig())
+
+
+def test_auto_batch_size() -> None:
+    """Batches give every worker several of them, within the upper bound"""
+
+    assert auto_batch_size(1, 4) == 1
+    assert auto_batch_size(0, 4) == 1
+    assert auto_batch_size(100, 2) == 100 // (2 * BATCHES_PER_WORKER)
+    assert auto_batch_size(10_000, 2) == MAX_BATCH_SIZE
+    # No workers counts as one
+    assert auto_batch_size(40, 0) == 40 // BATCHES_PER_WORKER
+
+
+def test_make_batches() -> None:
+    """Images keep their order, the last batch holds what is left"""
+
+    images = [f"{idx}.jpg" for idx in range(10)]
+
+    batches = make_batches(images, 4)
+    assert [len(batch) for batch in batches] == [4, 4, 2]
+    assert [image for batch in batches for image in batch] == images
+    assert make_batches(["0.jpg"], 4) == [["0.jpg"]]
+    assert make_batches([], 4) == []
+
+
+def test_make_chunks() -> None:
+    """Chunks are taken lazily, in order, the last one holding what is left"""
+
+    assert list(make_chunks(iter(range(7)), 3)) == [[0, 1, 2], [3, 4, 5], [6]]
+    assert list(make_chunks([], 3)) == []
+
+
+def test_batched_regions_map_back_to_their_images(echo_worker, tmp_path: Path) -> None:
+    """Every image gets the tokens of its own regions, in template order, however the images are batched"""
+
+    images = []
+    for idx in range(5):
+        images.append(str(tmp_path / f"{idx}.jpg"))
+        shutil.copy(PathConfig.INPUT_PATH / "0.jpg", images[-1])
+    offsets = [offset for _, offset in crop_regions(load_image(images[0]), LAYOUT_V2)]
+
+    batched = [
+        tokens
+        for batch in make_batches(images, 2)
+        for tokens in run_ocr_batch(batch, [LAYOUT_V2] * len(batch))
+    ]
+
+    assert batched == run_ocr_batch(images, [LAYOUT_V2] * len(images))
+    for image_path, tokens in zip(images, batched):
+        assert [token.text for token in tokens] == [f"{Path(image_path).name}@{offset}" for offset in offsets]
+        # Moved from the region back onto the page
+        assert [token.box[0] for token in tokens] == [[float(x), float(y)] for x, y in offsets]
+    assert run_ocr_batch(images[:1], [LAYOUT_V2]) == batched[:1]
+
+
+def test_downscaled_boxes_map_back_to_full_resolution(echo_worker) -> None:
+    """Boxes read on a downscaled page are stored, and replayed, in the full-resolution page's pixels"""
+
+    image_path = str(PathConfig.INPUT_PATH / "0.jpg")
+    full = load_image(image_path)
+    image = preprocess_image(full, preprocess_config_for("fastest", LAYOUT_V2), allow_crop=False)
+    scale = max(full.shape[:2]) / max(image.shape[:2])
+    assert scale > 1
+
+    tokens = run_ocr_batch([image_path], [LAYOUT_V2], preset="fastest")[0]
+    corners = [coord for token in tokens for coord in token.box[0]]
+    offsets = [offset for _, offset in crop_regions(image, LAYOUT_V2)]
+    assert corners == pytest.approx([coord * scale for offset in offsets for coord in offset])
+
+    # Replayed on the downscaled page, they come back where they were stored
+    init_worker(OCRConfig(), backend=FakeBackend(tokens))
+    replayed = run_ocr_batch([image_path], [LAYOUT_V2], preset="fastest")[0]
+    assert [token.text for token in replayed] == [token.text for token in tokens]
+    boxes = [coord for token in replayed for point in token.box for coord in point]
+    assert boxes == pytest.approx([coord for token in tokens for point in token.box for coord in point])
@@ -0,0 +1,56 @@
+from pathlib import Path
+
+from src.scorecard_OCR.cache import OCRCache, engine_fingerprint, image_digest
+from src.scorecard_OCR.config import OCR_MODES, OCRConfig
+
+
+def make_image(tmp_path: Path, content: bytes = b"scorecard") -> str:
+    """Write a fake image file and return its path."""
+
+    image_path = tmp_path / "0.jpg"
+    image_path.write_bytes(content)
+    return str(image_path)
+
+
+def test_cache_round_trip(tmp_path: Path) -> None:
+    """A stored OCR result is served back for the same image digest."""
+
+    digest = image_digest(make_image(tmp_path))
+    cache = OCRCache(tmp_path / "cache", engine_fingerprint({"lang": "en"}))
+    result = [[[[[0.0, 0.0], [1.0, 0.0], [1.0, 1.0], [0.0, 1.0]], ["vs.", 0.99]]]]
+
+    assert cache.get(digest) is None
+    cache.put(digest, result)
+    assert cache.get(digest) == result
+
+
+def test_digest_follows_image_content(tmp_path: Path) -> None:
+    """Changing the image bytes changes its cache key."""
+
+    first = image_digest(make_image(tmp_path, b"first"))
+    second = image_digest(make_image(tmp_path, b"second"))
+
+    assert first != second
+
+
+def test_evict_stale_drops_other_engine_configs(tmp_path: Path) -> None:
+    """Entries written under a different engine config are evicted."""
+
+    digest = image_digest(make_image(tmp_path))
+    old_cache = OCRCache(tmp_path / "cache", engine_fingerprint({"lang": "en"}))
+    new_cache = OCRCache(tmp_path / "cache", engine_fingerprint({"lang": "fr"}))
+    old_cache.put(digest, [])
+
+    assert new_cache.evict_stale() == 1
+    assert old_cache.get(digest) is None
+
+
+def test_ocr_modes_have_their_own_fingerprint() -> None:
+    """Results of the fast models are never served for the accurate ones, thread counts don't matter."""
+
+    accurate = OCRConfig()
+    assert accurate.engine_kwargs() == {"use_angle_cls": False, "lang": "en"}
+
+    fingerprints = {engine_fingerprint(OCRConfig(mode=mode).engine_kwargs()) for mode in OCR_MODES}
+    assert len(fingerprints) == len(OCR_MODES)
+    assert OCRConfig(cpu_threads=4).engine_kwargs() == accurate.engine_kwargs()
@@ -0,0 +1,36 @@
+from pathlib import Path
+
+from src.scorecard_OCR.checkpoint import CheckpointLedger, ledger_path_for, truncate_rows
+
+
+def test_ledger_records_completed_images(tmp_path: Path) -> None:
+    """Completed images are read back in the order they were recorded."""
+
+    ledger = CheckpointLedger(ledger_path_for(tmp_path / "scorecards.csv"))
+    ledger.record(["a.jpg", "b.jpg"])
+    ledger.record(["c.jpg"])
+
+    assert ledger.ledger_path.name == "scorecards.csv.done"
+    assert ledger.completed() == ["a.jpg", "b.jpg", "c.jpg"]
+
+
+def test_ledger_ignores_partial_last_line(tmp_path: Path) -> None:
+    """A line cut short by a crash doesn't count as a completed image."""
+
+    ledger = CheckpointLedger(tmp_path / "ledger")
+    ledger.record(["a.jpg"])
+    with open(ledger.ledger_path, "a") as f:
+        f.write("b.j")
+
+    assert ledger.completed() == ["a.jpg"]
+
+
+def test_truncate_rows_drops_unrecorded_rows(tmp_path: Path) -> None:
+    """Rows past the ledger are dropped, the header is kept."""
+
+    csv_path = tmp_path / "scorecards.csv"
+    csv_path.write_text('name,pts\nA,"[\'49\', \'50\']"\nB,"[]"\nC,"[]"\n')
+
+    truncate_rows(csv_path, 2)
+
+    assert csv_path.read_text() == 'name,pts\nA,"[\'49\', \'50\']"\nB,[]\n'
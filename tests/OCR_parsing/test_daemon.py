@@ -0,0 +1,107 @@
+import multiprocessing
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import List
+
+import pytest
+
+from src.scorecard_OCR import daemon
+from src.scorecard_OCR.backends import FakeBackend, OCRRequest
+from src.scorecard_OCR.client import ocr_remote, request
+from src.scorecard_OCR.config import OCRConfig
+from src.scorecard_OCR.daemon import OCRDaemon, serve
+from src.scorecard_OCR.ocr import RESULT_COLUMNS, FightData, ImageResult, init_warm_worker, wait_for_workers
+
+
+def fake_ocr(image_paths: List[str]) -> List[ImageResult]:
+    """Parse every image as the same fight, except the ones named bad.jpg."""
+
+    return [
+        ImageResult(image_path, stage="ocr", error="unreadable")
+        if image_path.endswith("bad.jpg")
+        else ImageResult(image_path, "new_version_v2", fight_data=FightData("RED", "BLUE", "1/22/2022"))
+        for image_path in image_paths
+    ]
+
+
+class CrashingBackend(FakeBackend):
+    """Kills its worker on images named crash.jpg, like an OCR engine segfault."""
+
+    def ocr(self, requests: List[OCRRequest], stage=None) -> List[List]:
+        if any(request.image_path.endswith("crash.jpg") for request in requests):
+            os._exit(1)
+        return super().ocr(requests, stage)
+
+
+def test_daemon_round_trip(tmp_path: Path) -> None:
+    """Jobs sent by the client come back in order, with failures reported per image."""
+
+    socket_path = tmp_path / "ocr.sock"
+    daemon = OCRDaemon(socket_path, fake_ocr)
+    server = threading.Thread(target=daemon.serve_forever)
+    server.start()
+    try:
+        response = ocr_remote([str(tmp_path / "0.jpg"), str(tmp_path / "bad.jpg")], socket_path)
+        assert response["columns"] == RESULT_COLUMNS
+
+        good, bad = response["results"]
+        assert good["ok"] and good["row"][:3] == ["RED", "BLUE", "1/22/2022"]
+        assert not bad["ok"] and bad["stage"] == "ocr" and bad["row"] is None
+
+        with pytest.raises(RuntimeError):
+            request({"command": "reload"}, socket_path)
+
+        # A second daemon can't take over the socket of a running one
+        with pytest.raises(RuntimeError):
+            OCRDaemon(socket_path, fake_ocr)
+
+        assert request({"command": "shutdown"}, socket_path) == {"stopping": True}
+        server.join(timeout=5)
+        assert not server.is_alive()
+    finally:
+        daemon.shutdown()
+        daemon.server_close()
+
+    assert not socket_path.exists()
+
+
+def test_replacement_worker_warms_up_alone() -> None:
+    """A worker started in place of a dead one loads its engine without waiting for the others."""
+
+    ready = multiprocessing.Semaphore(0)
+    with multiprocessing.Pool(2, init_warm_worker, (OCRConfig(), ready, None, FakeBackend())) as pool:
+        wait_for_workers(ready, 2, timeout=30)
+        # A worker crashing in a task, as on an OCR engine segfault
+        pool.apply_async(os._exit, (1,))
+        wait_for_workers(ready, 1, timeout=30)
+        assert pool.apply_async(os.getpid).get(timeout=30) > 0
+
+
+def test_daemon_survives_crashing_workers(monkeypatch, tmp_path: Path) -> None:
+    """A job whose image kills every worker gets a failed result for it, and the daemon keeps serving"""
+
+    monkeypatch.setitem(daemon.watch_results.__globals__, "POLL_INTERVAL_S", 0.05)
+    image = Path(__file__).parent / "mock_scorecard" / "0.jpg"
+    good, crash = str(tmp_path / "good.jpg"), str(tmp_path / "crash.jpg")
+    for image_path in (good, crash):
+        shutil.copy(image, image_path)
+    socket_path = tmp_path / "ocr.sock"
+    server = threading.Thread(
+        target=serve, args=(socket_path, OCRConfig(fast_preset=None)), kwargs={"backend": CrashingBackend()}
+    )
+    server.start()
+    try:
+        deadline = time.monotonic() + 30
+        while not socket_path.exists() and time.monotonic() < deadline:
+            time.sleep(0.05)
+
+        good_result, crash_result, again = ocr_remote([good, crash, good], socket_path)["results"]
+        assert crash_result["stage"] == "worker" and not crash_result["ok"]
+        assert good_result["stage"] != "worker" and again == good_result
+        assert ocr_remote([good], socket_path)["results"] == [good_result]
+    finally:
+        request({"command": "shutdown"}, socket_path)
+        server.join(timeout=30)
@@ -0,0 +1,37 @@
+from pathlib import Path
+
+import cv2
+
+from src.scorecard_OCR.dedupe import find_duplicates, perceptual_hash
+
+from .config import PathConfig
+
+
+def test_reencoded_copy_is_a_duplicate(tmp_path: Path) -> None:
+    """A JPEG re-encode of a scorecard is grouped with the original, an unreadable file is left alone."""
+
+    original = str(PathConfig.INPUT_PATH / "0.jpg")
+    image = cv2.imread(original)
+
+    copy = tmp_path / "0_copy.jpg"
+    cv2.imwrite(str(copy), image, [cv2.IMWRITE_JPEG_QUALITY, 60])
+    broken = tmp_path / "broken.jpg"
+    broken.write_bytes(b"not a jpeg")
+
+    assert perceptual_hash(str(broken)) is None
+    assert find_duplicates([original, str(copy), str(broken)]) == {str(copy): original}
+
+
+def test_different_text_is_not_a_duplicate(tmp_path: Path) -> None:
+    """The same layout with different text, as on another fight's scorecard, is kept."""
+
+    original = str(PathConfig.INPUT_PATH / "0.jpg")
+    image = cv2.imread(original)
+
+    # Blank out the judges' totals, all else stays the same
+    height, width = image.shape[:2]
+    image[int(height * 0.6) : int(height * 0.66), : width // 2] = 255
+    edited = tmp_path / "edited.jpg"
+    cv2.imwrite(str(edited), image, [cv2.IMWRITE_JPEG_QUALITY, 95])
+
+    assert find_duplicates([original, str(edited)]) == {}
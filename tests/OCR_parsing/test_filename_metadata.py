@@ -0,0 +1,69 @@
+from src.scorecard_OCR.filename_metadata import (
+    NAME_SOURCE_CONFLICT,
+    NAME_SOURCE_FILENAME,
+    parse_filename,
+    reconcile_names,
+)
+
+
+def test_parse_filename() -> None:
+    """Testing the names and event read from slug and title file names, and file names without them"""
+
+    slug = parse_filename("data/scorecards/alexander-volkanovski-max-holloway-ufc-251-scorecard.jpg")
+    assert slug.event == "UFC 251"
+    assert slug.full_names
+    assert ("ALEXANDER VOLKANOVSKI", "MAX HOLLOWAY") in slug.fighters
+    assert len(slug.fighters) == 3
+
+    title = parse_filename("UFC 270 Ngannou vs. Gane - Scorecards - Moreno vs. Figueiredo_0.jpg")
+    assert title.event == "UFC 270 Ngannou vs. Gane"
+    assert not title.full_names
+    assert title.fighters == [("MORENO", "FIGUEIREDO")]
+
+    assert parse_filename("data/scorecards/645.jpg") is None
+
+
+def test_reconcile_slug_names() -> None:
+    """Testing that the OCR'd names pick the split of a slug and only cross-check it"""
+
+    metadata = parse_filename("jan-blachowicz-glover-teixeira-ufc-267-scorecard.jpg")
+
+    # Misread names are corrected, names only the slug can't spell are kept
+    assert reconcile_names(metadata, "JAN BLACH0WICZ", "-") == (
+        "JAN BLACHOWICZ",
+        "GLOVER TEIXEIRA",
+        NAME_SOURCE_FILENAME,
+    )
+    metadata = parse_filename("jose-aldo-max-holloway-ufc-212-scorecard.jpg")
+    assert reconcile_names(metadata, "JOSÉ ALDO", "MAX HOLLOWAY") == (
+        "JOSÉ ALDO",
+        "MAX HOLLOWAY",
+        NAME_SOURCE_FILENAME,
+    )
+
+    # Names the file name disagrees with are kept, including other forms of the name
+    assert reconcile_names(metadata, "ISRAEL ADESANYA", "-") == ("ISRAEL ADESANYA", "-", NAME_SOURCE_CONFLICT)
+    metadata = parse_filename("alexander-volkanovski-max-holloway-ufc-251-scorecard.jpg")
+    assert reconcile_names(metadata, "ALEX VOLKANOVSKI", "MAX HOLLOWAY") == (
+        "ALEX VOLKANOVSKI",
+        "MAX HOLLOWAY",
+        NAME_SOURCE_CONFLICT,
+    )
+
+
+def test_reconcile_surnames() -> None:
+    """Testing that title file names only correct the surnames of the OCR'd names"""
+
+    metadata = parse_filename("UFC 270 Ngannou vs. Gane - Scorecards - Moreno vs. Figueiredo_0.jpg")
+
+    assert reconcile_names(metadata, "BRANDON M0RENO", "DEIVESON FIGUEIRED") == (
+        "BRANDON MORENO",
+        "DEIVESON FIGUEIREDO",
+        NAME_SOURCE_FILENAME,
+    )
+    assert reconcile_names(metadata, "-", "DEIVESON FIGUEIREDO")[:2] == ("MORENO", "DEIVESON FIGUEIREDO")
+    assert reconcile_names(metadata, "AMIR ALBAZI", "DEIVESON FIGUEIREDO") == (
+        "AMIR ALBAZI",
+        "DEIVESON FIGUEIREDO",
+        NAME_SOURCE_CONFLICT,
+    )
@@ -0,0 +1,74 @@
+from pathlib import Path
+
+import pytest
+
+from src.scorecard_OCR.config import PathConfig as ProjectPathConfig
+from src.scorecard_OCR.golden import (
+    GoldenLabel,
+    compare_to_baseline,
+    field_accuracy,
+    field_matches,
+    load_baseline,
+    load_golden_set,
+    save_baseline,
+)
+from src.scorecard_OCR.layouts import classify_layout
+from src.scorecard_OCR.ocr import FightData
+
+
+@pytest.fixture
+def golden_set():
+    project = ProjectPathConfig()
+    return load_golden_set(project.GOLDEN_LABELS_PATH, project.INPUT_PATH)
+
+
+def test_golden_set_images_match_their_layout(golden_set) -> None:
+    """Every labeled image exists, covers all layouts and classifies as labeled."""
+
+    assert {label.layout for label in golden_set} == {"new_version_v1", "new_version_v2", "old_version"}
+    for label in golden_set:
+        assert classify_layout(label.image_path) == label.layout
+        assert len(label.red_fighter_total_pts) == len(label.blue_fighter_total_pts) == 3
+
+
+def test_field_accuracy() -> None:
+    """Names ignore case and spacing, dates leading zeros, failed images get every field wrong."""
+
+    label = GoldenLabel(
+        "0.jpg", "new_version_v1", "JIM MILLER", "VINC PICHEL", "8/15/2020", ["27"] * 3, ["29"] * 3
+    )
+    parsed = FightData("Jim  Miller", "VINC PICHEL", "08/15/2020", ["27", "27", "28"], ["29"] * 3)
+
+    matches = [field_matches(label, parsed), field_matches(label, None)]
+    assert matches[0] == {
+        "red_fighter_name": True,
+        "blue_fighter_name": True,
+        "date": True,
+        "red_fighter_total_pts": False,
+        "blue_fighter_total_pts": True,
+    }
+    assert field_accuracy(matches)["red_fighter_name"] == 0.5
+    assert field_accuracy(matches)["all_fields"] == 0.0
+
+
+def test_compare_to_baseline(tmp_path: Path) -> None:
+    """Only changes beyond the allowed slack count as regressions."""
+
+    baseline = {
+        "images_per_sec": 2.0,
+        "p95_latency_s": 1.0,
+        "peak_rss_mb": 1000.0,
+        "accuracy": {"date": 1.0, "all_fields": 0.8},
+    }
+    save_baseline(baseline, tmp_path / "baseline.json")
+    assert load_baseline(tmp_path / "baseline.json") == baseline
+    assert load_baseline(tmp_path / "missing.json") is None
+
+    report = {
+        "images_per_sec": 1.95,
+        "p95_latency_s": 1.5,
+        "peak_rss_mb": 1050.0,
+        "accuracy": {"date": 0.9, "all_fields": 0.9},
+    }
+    regressions = compare_to_baseline(report, baseline)
+    assert [regression.split(":")[0] for regression in regressions] == ["p95_latency_s", "accuracy.date"]
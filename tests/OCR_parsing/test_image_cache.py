@@ -0,0 +1,42 @@
+from pathlib import Path
+
+import numpy as np
+
+from src.scorecard_OCR.image_cache import DecodedImageCache
+
+
+def test_image_cache_round_trip(tmp_path: Path) -> None:
+    """Cached images come back identical, as read-only views of the memory-mapped shards."""
+
+    cache = DecodedImageCache(tmp_path)
+    rng = np.random.default_rng(0)
+    color = rng.integers(0, 256, size=(45, 80, 3), dtype=np.uint8)
+    gray = rng.integers(0, 256, size=(31, 17), dtype=np.uint8)
+
+    assert cache.get("color") is None
+    cache.put("color", color)
+    cache.put("gray", gray)
+
+    for key, image in [("color", color), ("gray", gray)]:
+        cached = cache.get(key)
+        assert cached.shape == image.shape and cached.dtype == image.dtype
+        np.testing.assert_array_equal(cached, image)
+        assert not cached.flags.writeable
+
+    cache.clear()
+    assert cache.get("color") is None
+
+
+def test_image_cache_is_shared_between_instances(tmp_path: Path) -> None:
+    """Images written by one process are found by another, also those written after it opened the cache."""
+
+    image = np.arange(12 * 10 * 3, dtype=np.uint8).reshape(12, 10, 3)
+    writer = DecodedImageCache(tmp_path)
+    writer.put("first", image)
+
+    reader = DecodedImageCache(tmp_path)
+    np.testing.assert_array_equal(reader.get("first"), image)
+
+    writer.put("second", image[::-1])
+    np.testing.assert_array_equal(reader.get("second"), image[::-1])
+    assert reader.get("third") is None
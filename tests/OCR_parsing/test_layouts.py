@@ -0,0 +1,85 @@
+from pathlib import Path
+
+import cv2
+import numpy as np
+import pytest
+
+from src.scorecard_OCR.layouts import (
+    LAYOUT_OLD,
+    LAYOUT_TEMPLATES,
+    LAYOUT_V1,
+    LAYOUT_V2,
+    NAMES_REGION,
+    classify_layout,
+    crop_regions,
+    shift_result,
+)
+
+from .config import PathConfig
+
+
+def test_classify_mock_scorecard() -> None:
+    """The mock scorecard is a UFC-branded v2 card."""
+
+    assert classify_layout(str(PathConfig.INPUT_PATH / "0.jpg")) == LAYOUT_V2
+
+
+def page(background: int, band: int, band_rows: int) -> np.ndarray:
+    """A grayscale page with a band of another shade across the top."""
+
+    pixels = np.full((600, 800), background, dtype=np.uint8)
+    pixels[:band_rows] = band
+    return pixels
+
+
+@pytest.mark.parametrize(
+    "pixels, expected",
+    [
+        # Blank white page with a black header
+        (page(255, 0, 60), LAYOUT_V2),
+        # Light gray scan with a large black block, high contrast
+        (page(200, 0, 200), LAYOUT_V1),
+        # Flat gray paper photo
+        (page(190, 170, 60), LAYOUT_OLD),
+    ],
+)
+def test_classify_layout(tmp_path: Path, pixels: np.ndarray, expected: str) -> None:
+    """Layouts are told apart by the whiteness and contrast of the page."""
+
+    image_path = str(tmp_path / "scorecard.jpg")
+    cv2.imwrite(image_path, pixels)
+
+    assert classify_layout(image_path) == expected
+
+
+def test_crop_regions_follow_template() -> None:
+    """Every template region is cropped with its top-left pixel offset."""
+
+    image = np.zeros((500, 800, 3), dtype=np.uint8)
+    crops = crop_regions(image, LAYOUT_V2)
+
+    assert len(crops) == len(LAYOUT_TEMPLATES[LAYOUT_V2])
+    for (crop, (left, top)), region in zip(crops, LAYOUT_TEMPLATES[LAYOUT_V2]):
+        assert (left, top) == (int(region.left * 800), int(region.top * 500))
+        assert crop.shape[0] == int(region.bottom * 500) - top
+
+
+def test_crop_regions_skips_regions() -> None:
+    """Skipped regions are left out, the others keep their offsets."""
+
+    image = np.zeros((500, 800, 3), dtype=np.uint8)
+
+    assert [offset for _, offset in crop_regions(image, LAYOUT_V2, skip=[NAMES_REGION])] == [
+        offset for region, (_, offset) in zip(LAYOUT_TEMPLATES[LAYOUT_V2], crop_regions(image, LAYOUT_V2))
+        if region.name != NAMES_REGION
+    ]
+
+
+def test_shift_result_moves_boxes_to_page() -> None:
+    """Boxes found on a crop are moved back into page coordinates."""
+
+    result = [[[[[0, 0], [10, 0], [10, 5], [0, 5]], ("TOTAL", 0.9)]], None]
+
+    assert shift_result(result, (100, 200)) == [
+        [[[100, 200], [110, 200], [110, 205], [100, 205]], ("TOTAL", 0.9)]
+    ]
@@ -0,0 +1,43 @@
+from typing import List
+
+import numpy as np
+import pytest
+
+from src.scorecard_OCR.prefetch import ImagePrefetcher, read_shared_image
+
+
+def decode(image_path: str) -> np.ndarray:
+    """A fake decoder, every image is filled with its number."""
+
+    if image_path == "broken.jpg":
+        raise ValueError(f"Could not read image: {image_path}")
+    return np.full((4, 6, 3), int(image_path.split(".")[0]), dtype=np.uint8)
+
+
+def test_prefetched_images_round_trip() -> None:
+    """Every decoded image comes back intact from shared memory and is freed on release."""
+
+    batches = [["1.jpg", "2.jpg"], ["3.jpg", "broken.jpg"], ["5.jpg"]]
+
+    seen: List[str] = []
+    with ImagePrefetcher(batches, decode, num_threads=2, max_pending=2) as prefetcher:
+        for image_paths, handles in prefetcher:
+            assert len(prefetcher._segments) <= 2 * 2
+            for image_path, handle in handles.items():
+                np.testing.assert_array_equal(read_shared_image(handle), decode(image_path))
+            seen += image_paths
+            prefetcher.release(image_paths)
+
+            assert all(image_path not in prefetcher._segments for image_path in image_paths)
+
+    assert seen == ["1.jpg", "2.jpg", "3.jpg", "broken.jpg", "5.jpg"]
+
+
+def test_close_frees_unreleased_images() -> None:
+    """Images never handed back are freed when the prefetcher closes."""
+
+    with ImagePrefetcher([["1.jpg"], ["2.jpg"]], decode, num_threads=1, max_pending=2) as prefetcher:
+        _, handles = next(iter(prefetcher))
+
+    with pytest.raises(FileNotFoundError):
+        read_shared_image(handles["1.jpg"])
@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+
+from src.scorecard_OCR.layouts import LAYOUT_TEMPLATES
+from src.scorecard_OCR.preprocess import (
+    BORDER_MARGIN,
+    NO_PREPROCESSING,
+    PREPROCESS_PRESETS,
+    PreprocessConfig,
+    preprocess_config_for,
+    preprocess_fingerprint,
+    preprocess_image,
+)
+
+
+def scan() -> np.ndarray:
+    """A white BGR page with dark content, inside a gray border."""
+
+    image = np.full((600, 800, 3), 128, dtype=np.uint8)
+    image[50:550, 100:700] = 255
+    image[200:300, 200:600] = 0
+    return image
+
+
+def test_presets_cover_known_layouts() -> None:
+    """Every preset only configures layouts the pipeline knows."""
+
+    for preset in PREPROCESS_PRESETS.values():
+        assert set(preset) <= set(LAYOUT_TEMPLATES)
+
+    assert preprocess_config_for("none", "new_version_v2") == NO_PREPROCESSING
+    with pytest.raises(ValueError):
+        preprocess_config_for("missing", "new_version_v2")
+
+
+def test_identity_leaves_image_untouched() -> None:
+    """The default config returns the very same image."""
+
+    image = scan()
+    assert preprocess_image(image, NO_PREPROCESSING) is image
+
+
+def test_downscale_and_grayscale() -> None:
+    """Downscaling keeps the aspect ratio and grayscale output still has three channels."""
+
+    config = PreprocessConfig(max_side=400, grayscale=True, normalize_contrast=True)
+    processed = preprocess_image(scan(), config)
+
+    assert processed.shape == (300, 400, 3)
+    assert (processed[..., 0] == processed[..., 1]).all()
+
+
+def test_crop_border() -> None:
+    """Border cropping trims to the page content plus a margin, unless cropping isn't allowed."""
+
+    config = PreprocessConfig(crop_border=True)
+
+    assert preprocess_image(scan(), config).shape == (500 + 2 * BORDER_MARGIN, 600 + 2 * BORDER_MARGIN, 3)
+    assert preprocess_image(scan(), config, allow_crop=False).shape == (600, 800, 3)
+
+
+def test_fingerprint_tracks_settings() -> None:
+    """Different settings are cached apart."""
+
+    assert preprocess_fingerprint(PreprocessConfig(max_side=640)) != preprocess_fingerprint(
+        PreprocessConfig(max_side=480)
+    )
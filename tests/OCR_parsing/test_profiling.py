@@ -0,0 +1,44 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from src.scorecard_OCR.profiling import StageTracer, TraceWriter, summarize_trace, trace_record
+
+
+def test_stage_tracer_splits_shared_stages(monkeypatch) -> None:
+    """A stage of one image is charged to it, a stage of the whole task is split evenly."""
+
+    clock = iter([0.0, 1.0, 1.0, 3.0])
+    monkeypatch.setattr("src.scorecard_OCR.profiling.time.perf_counter", lambda: next(clock))
+
+    tracer = StageTracer()
+    tracer.begin(["a.jpg", "b.jpg"])
+    with tracer.stage("detection", ["a.jpg"]):
+        pass
+    with tracer.stage("recognition"):
+        pass
+
+    traces = tracer.end()
+    assert traces["a.jpg"]["stages"] == pytest.approx({"detection": 1.0, "recognition": 1.0})
+    assert traces["b.jpg"]["stages"] == pytest.approx({"recognition": 1.0})
+    assert traces["a.jpg"]["peak_rss_mb"] > 0
+
+
+def test_trace_file_and_summary(tmp_path: Path) -> None:
+    """Records are written as JSON lines and summarized per stage, worker and image."""
+
+    traces = [
+        ("a.jpg", {"worker": 1, "peak_rss_mb": 900.0, "stages": {"detection": 0.5, "parse": 0.001}}),
+        ("b.jpg", {"worker": 2, "peak_rss_mb": 950.0, "stages": {"detection": 1.5}}),
+    ]
+    with TraceWriter(tmp_path / "trace.jsonl") as writer:
+        for image_path, trace in traces:
+            writer.write(trace_record(image_path, "new_version_v2", True, trace))
+
+    lines = (tmp_path / "trace.jsonl").read_text().splitlines()
+    assert [json.loads(line)["total_s"] for line in lines] == pytest.approx([0.501, 1.5])
+
+    summary = summarize_trace(writer.records)
+    assert "detection" in summary and "950.0" in summary
+    assert summary.index("b.jpg") < summary.index("a.jpg")
@@ -0,0 +1,92 @@
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from src.scorecard_OCR.ocr import RESULT_COLUMNS, FightData, merge_shards, reparse_scorecards, save_results
+from src.scorecard_OCR.sharding import (
+    relative_image_path,
+    save_shard_manifest,
+    select_shard,
+    shard_manifest_path_for,
+    shard_output_path,
+)
+from src.scorecard_OCR.token_store import OCRToken, list_token_parts, load_token_store, save_token_store
+
+
+def test_shards_partition_images_the_same_on_every_machine() -> None:
+    """Every image is in exactly one shard, whatever folder the images are checked out to."""
+
+    relative = [f"new_version_v2/UFC {event}/{fight}.jpg" for event in range(20) for fight in range(10)]
+    shards = [
+        select_shard([f"/data/a/{path}" for path in relative], Path("/data/a"), shard_index, 3)
+        for shard_index in range(3)
+    ]
+    assigned = sorted(path for shard in shards for path in shard)
+    assert assigned == sorted(f"/data/a/{path}" for path in relative)
+    assert all(shards)
+
+    elsewhere = select_shard([f"/mnt/b/{path}" for path in relative], Path("/mnt/b"), 1, 3)
+    assert [relative_image_path(path, Path("/mnt/b")) for path in elsewhere] == [
+        relative_image_path(path, Path("/data/a")) for path in shards[1]
+    ]
+
+    with pytest.raises(ValueError):
+        select_shard(relative, Path("."), 3, 3)
+
+
+def write_shard(output_path: Path, shard_index: int, shard_count: int, images, num_results: int) -> None:
+    """Write a finished shard: its manifest and ``num_results`` rows."""
+
+    shard_path = shard_output_path(output_path, shard_index, shard_count)
+    save_shard_manifest(shard_manifest_path_for(shard_path), shard_index, shard_count, images, [])
+    save_results([FightData(f"RED {idx}", "BLUE", "1/22/2022") for idx in range(num_results)], shard_path)
+
+
+def test_merge_shards(tmp_path: Path) -> None:
+    """Finished shards are concatenated, and shards that don't add up are refused."""
+
+    output_path = tmp_path / "parsed_scorecards.csv"
+    images = [f"v2/{idx}.jpg" for idx in range(12)]
+    by_shard = [select_shard(images, Path("."), shard_index, 2) for shard_index in range(2)]
+
+    write_shard(output_path, 0, 2, by_shard[0], len(by_shard[0]))
+    with pytest.raises(ValueError, match="hasn't finished"):
+        merge_shards(output_path, 2)
+
+    # One result short of its images, with no quarantine to account for it
+    write_shard(output_path, 1, 2, by_shard[1], len(by_shard[1]) - 1)
+    with pytest.raises(ValueError, match="results"):
+        merge_shards(output_path, 2)
+
+    write_shard(output_path, 1, 2, by_shard[1], len(by_shard[1]))
+    merged = merge_shards(output_path, 2)
+    assert len(merged) == len(images)
+    assert list(pd.read_csv(output_path).columns) == RESULT_COLUMNS
+
+
+def test_merge_shards_merges_their_tokens(tmp_path: Path) -> None:
+    """The shards' token stores are merged for re-parsing, and are kept themselves."""
+
+    output_path = tmp_path / "parsed_scorecards.csv"
+    tokens_path = tmp_path / "OCR_tokens" / "tokens.npz"
+    texts = ["11/02/2024", "BRANDON MORENO", "vs.", "AMIR ALBAZI"] + ["FINAL SCORE", "49", "46"] * 3
+    tokens = [OCRToken(text, 0.9, [[0, 0], [1, 0], [1, 1], [0, 1]]) for text in texts]
+    images = [f"v2/{idx}.jpg" for idx in range(6)]
+    for shard_index in range(2):
+        shard_images = select_shard(images, Path("."), shard_index, 2)
+        write_shard(output_path, shard_index, 2, shard_images, len(shard_images))
+        shard_tokens = shard_output_path(tokens_path, shard_index, 2)
+        shard_tokens.parent.mkdir(parents=True, exist_ok=True)
+        save_token_store(
+            {image: tokens for image in shard_images},
+            shard_tokens,
+            {image: "new_version_v1" for image in shard_images},
+        )
+
+    merge_shards(output_path, 2, tokens_path=tokens_path)
+
+    assert sorted(load_token_store(tokens_path)) == images
+    assert not list_token_parts(tokens_path)
+    assert shard_output_path(tokens_path, 0, 2).exists()
+    assert len(reparse_scorecards(tokens_path, tmp_path / "reparsed.csv")) == len(images)
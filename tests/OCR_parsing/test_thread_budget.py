@@ -0,0 +1,45 @@
+from pathlib import Path
+
+from src.scorecard_OCR.thread_budget import (
+    ThreadBudget,
+    available_cpus,
+    candidate_budgets,
+    load_thread_budget,
+    plan_thread_budget,
+    save_thread_budget,
+)
+
+
+def test_plan_thread_budget_fits_cores_and_memory() -> None:
+    """Workers times threads stay within the cores, and workers within the memory."""
+
+    assert plan_thread_budget(cpus=16, memory_mb=64_000) == ThreadBudget(8, 2)
+    # Only 4 workers fit in memory, the spare cores go to their threads
+    assert plan_thread_budget(cpus=16, memory_mb=5_000) == ThreadBudget(4, 4)
+    assert plan_thread_budget(cpus=1, memory_mb=64_000) == ThreadBudget(1, 2)
+
+    # Either number can be overridden, the other follows
+    assert plan_thread_budget(num_workers=4, cpus=16, memory_mb=64_000) == ThreadBudget(4, 4)
+    assert plan_thread_budget(threads_per_worker=1, cpus=16, memory_mb=64_000) == ThreadBudget(16, 1)
+    assert plan_thread_budget(3, 3, cpus=16, memory_mb=64_000) == ThreadBudget(3, 3)
+
+    assert candidate_budgets(cpus=16, memory_mb=64_000) == [
+        ThreadBudget(16, 1),
+        ThreadBudget(8, 2),
+        ThreadBudget(4, 4),
+        ThreadBudget(2, 8),
+        ThreadBudget(1, 16),
+    ]
+
+
+def test_calibrated_budget_is_host_specific(tmp_path: Path) -> None:
+    """A stored budget is only used on a host with the same number of cores."""
+
+    budget_path = tmp_path / "thread_budget.json"
+    assert load_thread_budget(budget_path) is None
+
+    save_thread_budget(ThreadBudget(4, 2), budget_path)
+    assert load_thread_budget(budget_path) == ThreadBudget(4, 2)
+
+    budget_path.write_text(f'{{"cpus": {available_cpus() + 1}, "num_workers": 4, "threads_per_worker": 2}}')
+    assert load_thread_budget(budget_path) is None
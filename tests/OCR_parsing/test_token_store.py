@@ -0,0 +1,71 @@
+from pathlib import Path
+
+from src.scorecard_OCR.token_store import (
+    OCRToken,
+    load_token_layouts,
+    load_token_store,
+    merge_token_parts,
+    save_token_store,
+    token_part_path,
+    tokens_from_result,
+)
+
+
+def box(x: float, y: float) -> list:
+    """A unit box with its top-left corner at (x, y)."""
+
+    return [[x, y], [x + 1, y], [x + 1, y + 1], [x, y + 1]]
+
+
+def test_tokens_from_result_flattens_pages() -> None:
+    """Raw PaddleOCR pages are flattened into tokens, skipping empty pages."""
+
+    result = [[[box(0, 0), ("BRANDON MORENO", 0.98)], [box(2, 0), ("vs.", 0.99)]], None]
+
+    assert tokens_from_result(result) == [
+        OCRToken("BRANDON MORENO", 0.98, box(0, 0)),
+        OCRToken("vs.", 0.99, box(2, 0)),
+    ]
+
+
+def test_token_store_round_trip(tmp_path: Path) -> None:
+    """Tokens of every image, including images without tokens, survive a save/load cycle."""
+
+    tokens_by_image = {
+        "a.jpg": [OCRToken("TOTAL", 0.5, box(0, 0)), OCRToken("49", 0.75, box(1, 0))],
+        "b.jpg": [],
+        "c.jpg": [OCRToken("vs.", 1.0, box(3, 4))],
+    }
+    store_path = tmp_path / "tokens.npz"
+
+    save_token_store(tokens_by_image, store_path)
+
+    assert load_token_store(store_path) == tokens_by_image
+
+
+def test_token_store_keeps_known_layouts(tmp_path: Path) -> None:
+    """Layouts are stored per image; images without one are left out."""
+
+    tokens_by_image = {"a.jpg": [OCRToken("vs.", 1.0, box(0, 0))], "b.jpg": []}
+    store_path = tmp_path / "tokens.npz"
+
+    save_token_store(tokens_by_image, store_path, layouts={"a.jpg": "new_version_v2"})
+
+    assert load_token_layouts(store_path) == {"a.jpg": "new_version_v2"}
+
+
+def test_merge_token_parts(tmp_path: Path) -> None:
+    """Partial stores are folded into the main store, later parts win."""
+
+    store_path = tmp_path / "tokens.npz"
+    save_token_store({"a.jpg": [OCRToken("old", 0.5, box(0, 0))]}, store_path)
+    save_token_store({"b.jpg": [OCRToken("b", 1.0, box(0, 0))]}, token_part_path(store_path, 0))
+    save_token_store({"a.jpg": [OCRToken("new", 1.0, box(0, 0))]}, token_part_path(store_path, 1))
+
+    merge_token_parts(store_path)
+
+    assert load_token_store(store_path) == {
+        "a.jpg": [OCRToken("new", 1.0, box(0, 0))],
+        "b.jpg": [OCRToken("b", 1.0, box(0, 0))],
+    }
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["tokens.npz"]
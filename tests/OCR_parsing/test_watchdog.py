@@ -0,0 +1,146 @@
+import multiprocessing
+import os
+import time
+from pathlib import Path
+from typing import List, Optional
+
+from src.scorecard_OCR import watchdog
+from src.scorecard_OCR.batching import make_chunks
+from src.scorecard_OCR.watchdog import MAX_RERUNS, TaskTracker, WorkerWatchdog, watch_results
+
+
+_watchdog: Optional[WorkerWatchdog] = None
+# Every run of a task appends a mark to a file named after it, when set
+_runs_dir: Optional[Path] = None
+# Crash marker of a task that kills every worker it runs on
+CRASH_ALWAYS = "always"
+
+
+def init_test_worker(worker_watchdog: WorkerWatchdog, runs_dir: Optional[Path] = None) -> None:
+    global _watchdog, _runs_dir
+    _watchdog = worker_watchdog
+    _runs_dir = runs_dir
+
+
+def run_test_task(task: List[str]) -> List[str]:
+    """Pool task that dies the first time it runs a task with a crash marker path, like an OOM kill would.
+
+    A task with the ``CRASH_ALWAYS`` marker dies every time.
+    """
+
+    _watchdog.start_task(task[0])
+    if _runs_dir is not None:
+        with open(_runs_dir / task[0], "a") as f:
+            f.write("x")
+    if task[1:] == [CRASH_ALWAYS]:
+        os._exit(1)
+    if len(task) > 1 and not Path(task[1]).exists():
+        Path(task[1]).touch()
+        os._exit(1)
+    _watchdog.end_task(task[0])
+    return task
+
+
+def run_test_chunk(tasks: List[List[str]]) -> List[List[str]]:
+    return [run_test_task(task) for task in tasks]
+
+
+def run_watched(
+    tasks: List[List[str]],
+    memory_limit_mb: Optional[float] = None,
+    runs_dir: Optional[Path] = None,
+    max_tasks_per_worker: Optional[int] = None,
+    checkpoint_s: float = 0.0,
+    chunksize: int = 1,
+) -> List[List[str]]:
+    """Results of the tasks, taking ``checkpoint_s`` to handle each like the parent writing a checkpoint"""
+
+    reports = multiprocessing.SimpleQueue()
+    tracker = TaskTracker(reports)
+    tasks_by_key = {task[0]: task for task in tasks}
+    initargs = (WorkerWatchdog(reports, memory_limit_mb), runs_dir)
+    with multiprocessing.Pool(2, init_test_worker, initargs, max_tasks_per_worker) as pool:
+        results = watch_results(
+            pool.imap_unordered(run_test_chunk, make_chunks(tasks, chunksize)),
+            tracker,
+            list(make_chunks(tasks_by_key, chunksize)),
+            key_of=lambda task: task[0],
+            rerun=lambda key: pool.apply_async(run_test_task, (tasks_by_key[key],)),
+            abandon=lambda key: [key, "abandoned"],
+        )
+        completed = []
+        for result in results:
+            time.sleep(checkpoint_s)
+            completed.append(result)
+    assert "peak_rss_mb" in tracker.summary()
+    return completed
+
+
+def test_task_of_a_dead_worker_is_run_again(monkeypatch, tmp_path: Path) -> None:
+    """A task whose worker dies comes out once, from a fresh worker, and the other tasks are unaffected"""
+
+    monkeypatch.setattr(watchdog, "POLL_INTERVAL_S", 0.05)
+    tasks = [[f"image-{idx}.jpg"] for idx in range(6)] + [["crashing.jpg", str(tmp_path / "crashed")]]
+
+    completed = run_watched(tasks)
+
+    assert sorted(task[0] for task in completed) == sorted(task[0] for task in tasks)
+
+
+def test_workers_over_the_memory_limit_are_recycled(monkeypatch) -> None:
+    """With a limit every worker exceeds, each runs a single task and every task still completes once"""
+
+    monkeypatch.setattr(watchdog, "POLL_INTERVAL_S", 0.05)
+    tasks = [[f"image-{idx}.jpg"] for idx in range(6)]
+
+    completed = run_watched(tasks, memory_limit_mb=0)
+
+    assert sorted(task[0] for task in completed) == sorted(task[0] for task in tasks)
+
+
+def test_tasks_of_recycled_workers_run_once(monkeypatch, tmp_path: Path) -> None:
+    """Workers replaced after every task exit before their results are taken, which doesn't lose the tasks"""
+
+    monkeypatch.setattr(watchdog, "POLL_INTERVAL_S", 0.05)
+    tasks = [[f"image-{idx}.jpg"] for idx in range(20)]
+
+    completed = run_watched(tasks, runs_dir=tmp_path, max_tasks_per_worker=1, checkpoint_s=0.05)
+
+    assert sorted(task[0] for task in completed) == sorted(task[0] for task in tasks)
+    assert {task[0]: (tmp_path / task[0]).read_text() for task in tasks} == {task[0]: "x" for task in tasks}
+
+
+def test_chunk_of_a_dead_worker_is_run_again(monkeypatch, tmp_path: Path) -> None:
+    """Tasks sharing a chunk with one whose worker dies, done or not started yet, come out once too"""
+
+    monkeypatch.setattr(watchdog, "POLL_INTERVAL_S", 0.05)
+    tasks = [[f"image-{idx}.jpg"] for idx in range(8)]
+    tasks.insert(4, ["crashing.jpg", str(tmp_path / "crashed")])
+
+    completed = run_watched(tasks, chunksize=3)
+
+    assert sorted(task[0] for task in completed) == sorted(task[0] for task in tasks)
+
+
+def test_task_killing_every_worker_is_given_up_on(monkeypatch, tmp_path: Path) -> None:
+    """A task that crashes every worker runs a limited number of times, and the others still complete"""
+
+    monkeypatch.setattr(watchdog, "POLL_INTERVAL_S", 0.05)
+    tasks = [[f"image-{idx}.jpg"] for idx in range(6)] + [["crashing.jpg", CRASH_ALWAYS]]
+
+    completed = run_watched(tasks, runs_dir=tmp_path)
+
+    assert ["crashing.jpg", "abandoned"] in completed
+    assert sorted(task[0] for task in completed) == sorted(task[0] for task in tasks)
+    assert (tmp_path / "crashing.jpg").read_text() == "x" * (MAX_RERUNS + 1)
+
+
+def test_process_alive() -> None:
+    """Running processes are alive, exited ones are gone"""
+
+    assert watchdog.process_alive(os.getpid())
+    child = multiprocessing.Process(target=os._exit, args=(0,))
+    child.start()
+    child.join()
+    assert not watchdog.process_alive(child.pid)
+    assert watchdog.current_rss_mb() > 0
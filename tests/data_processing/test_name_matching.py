@@ -0,0 +1,102 @@
+import random
+import time
+
+import pandas as pd
+from rapidfuzz.distance import Levenshtein
+
+from src.data_processing.name_matching import (
+    BKTree,
+    FighterRoster,
+    NameMatch,
+    correct_scorecard_names,
+)
+from src.data_processing.stats_processing import build_merged_stats_scorecards
+
+
+def make_fights_stats() -> pd.DataFrame:
+    """Two small cards with result markers, like the raw stats."""
+
+    return pd.DataFrame(
+        {
+            "red_fighter_name": ["BRANDON MORENO", "KAI KAMAKA", "BRANDON ROYVAL"],
+            "blue_fighter_name": ["AMIR ALBAZI", "TJ BROWN", "AMIR ALBAZI"],
+            "event_date": ["02/11/2024", "02/11/2024", "14/12/2024"],
+            "red_fighter_result": ["W", "L", "W"],
+            "blue_fighter_result": ["L", "W", "L"],
+        }
+    )
+
+
+def test_bk_tree_lookups_match_a_full_scan() -> None:
+    """Range and nearest lookups find exactly what comparing against every word finds."""
+
+    rng = random.Random(0)
+    words = ["".join(rng.choice("ABCDE ") for _ in range(rng.randint(4, 10))) for _ in range(300)]
+    tree = BKTree(words)
+
+    for query in words[:20] + ["ABCDEABCDE", "EEEE"]:
+        expected = sorted({(Levenshtein.distance(query, word), word) for word in words})
+        assert tree.search(query, 2) == [match for match in expected if match[0] <= 2]
+        assert tree.nearest(query, 3) == (expected[0] if expected[0][0] <= 3 else None)
+
+
+def test_roster_snaps_names_to_the_fighters_of_the_event_date() -> None:
+    """Names are corrected among that date's fighters, others fall back to every known name within reach."""
+
+    roster = FighterRoster(make_fights_stats())
+
+    # Royval is closer to the misread name, but didn't fight that night, and Moreno is too far from it
+    assert roster.match("BRANDON R0YVAL", "02/11/2024") == NameMatch("BRANDON R0YVAL", None)
+    assert roster.match("BRANDON M0RENO", "02/11/2024") == NameMatch("BRANDON MORENO", 1)
+    assert roster.match("BRANDON R0YVAL", "14/12/2024").distance == 1
+    assert roster.match("TJ BR0WN", "01/01/2000").name == "TJ BROWN"
+    assert roster.match("SOMEONE ELSE", "01/01/2000").distance is None
+    assert roster.match("-", "02/11/2024") == NameMatch("-", None)
+
+    start = time.perf_counter()
+    for _ in range(1000):
+        roster.match("AMIR ALBAZl", "02/11/2024")
+    assert (time.perf_counter() - start) / 1000 < 1e-3
+
+
+def test_misread_names_are_merged_with_their_fight() -> None:
+    """A scorecard with OCR errors in the names still finds its fight, with the edit distances kept."""
+
+    scorecards = pd.DataFrame(
+        {
+            "red_fighter_name": ["BRAND0N MORENO"],
+            "blue_fighter_name": ["AMIR ALBAZl"],
+            "event_date": ["02/11/2024"],
+            "red_fighter_total_pts": ["49 50 50"],
+            "blue_fighter_total_pts": ["46 45 45"],
+        }
+    )
+
+    corrected = correct_scorecard_names(scorecards, FighterRoster(make_fights_stats()))
+    assert corrected.loc[0, "red_fighter_name_distance"] == 1
+    assert corrected.loc[0, "blue_fighter_name_distance"] == 1
+
+    merged = build_merged_stats_scorecards(make_fights_stats(), scorecards)
+    assert merged.loc[0, "red_fighter_total_pts"] == "49 50 50"
+    assert merged["red_fighter_total_pts"].notna().sum() == 1
+
+
+def test_corrections_never_collapse_onto_one_fighter_or_fight() -> None:
+    """Both corners can't become the same fighter, and only the nearest of two scorecards gets a fight."""
+
+    scorecards = pd.DataFrame(
+        {
+            "red_fighter_name": ["AMIR ALBAZl", "BRAND0N MORENO", "BRAND0N M0REN0"],
+            "blue_fighter_name": ["AMIR ALBAZI", "AMIR ALBAZl", "AMIR ALBAZl"],
+            "event_date": ["02/11/2024"] * 3,
+        }
+    )
+
+    corrected = correct_scorecard_names(scorecards, FighterRoster(make_fights_stats()))
+    assert corrected.loc[0, "red_fighter_name"] == "AMIR ALBAZl"
+    assert pd.isna(corrected.loc[0, "red_fighter_name_distance"])
+    assert corrected.loc[0, "blue_fighter_name"] == "AMIR ALBAZI"
+    assert list(corrected.loc[1:, "red_fighter_name"]) == ["BRANDON MORENO", "BRAND0N M0REN0"]
+
+    merged = build_merged_stats_scorecards(make_fights_stats(), scorecards)
+    assert len(merged) == len(make_fights_stats())
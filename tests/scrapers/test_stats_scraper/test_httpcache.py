@@ -0,0 +1,122 @@
+from pathlib import Path
+from typing import Tuple
+
+import pytest
+from scrapy.downloadermiddlewares.httpcache import HttpCacheMiddleware
+from scrapy.exceptions import IgnoreRequest
+from scrapy.http import HtmlResponse, Request
+from scrapy.utils.test import get_crawler
+
+from src.scraping.ufc_stats.ufcstats_scraping import httpcache
+from src.scraping.ufc_stats.ufcstats_scraping.httpcache import (
+    CompressedCacheStorage,
+    RefreshingPolicy,
+    cached_page_paths,
+    train_dictionary,
+)
+from src.scraping.ufc_stats.ufcstats_scraping.spiders.stats_spider import StatsSpider
+
+
+MOCK_FIGHT_PAGE = Path(__file__).parents[0] / "mock_pages/mock_fight_page/fight_page.html"
+CACHE_SETTINGS = {
+    "HTTPCACHE_ENABLED": True,
+    "HTTPCACHE_STORAGE": "src.scraping.ufc_stats.ufcstats_scraping.httpcache.CompressedCacheStorage",
+    "HTTPCACHE_POLICY": "src.scraping.ufc_stats.ufcstats_scraping.httpcache.RefreshingPolicy",
+}
+
+
+def open_storage(tmp_path: Path, **settings) -> Tuple[CompressedCacheStorage, StatsSpider]:
+    crawler = get_crawler(StatsSpider, {"HTTPCACHE_DIR": str(tmp_path), **settings})
+    spider = StatsSpider.from_crawler(crawler)
+    storage = CompressedCacheStorage(crawler.settings)
+    storage.open_spider(spider)
+    return storage, spider
+
+
+def fight_response(url: str) -> HtmlResponse:
+    return HtmlResponse(
+        url=url,
+        headers={"Content-Type": "text/html; charset=utf-8"},
+        body=MOCK_FIGHT_PAGE.read_bytes(),
+    )
+
+
+@pytest.mark.parametrize("compression", ["zstd", "gzip"])
+def test_store_and_retrieve(tmp_path: Path, compression: str) -> None:
+    """Testing that a cached page comes back as the response that was stored"""
+
+    storage, spider = open_storage(tmp_path, HTTPCACHE_COMPRESSION=compression)
+    request = Request("http://ufcstats.com/fight-details/1")
+    assert storage.retrieve_response(spider, request) is None
+
+    storage.store_response(spider, request, fight_response(request.url))
+    cached = storage.retrieve_response(spider, request)
+
+    assert isinstance(cached, HtmlResponse)
+    assert cached.body == MOCK_FIGHT_PAGE.read_bytes()
+    assert cached.headers["Content-Type"] == b"text/html; charset=utf-8"
+    assert cached.css("title::text").get() == fight_response(request.url).css("title::text").get()
+
+    # Pages stay readable when the compression changes
+    other, _ = open_storage(tmp_path, HTTPCACHE_COMPRESSION="gzip" if compression == "zstd" else "zstd")
+    assert other.retrieve_response(spider, request).body == cached.body
+
+
+def test_train_dictionary(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Testing that pages recompressed with a trained dictionary shrink and stay readable"""
+
+    monkeypatch.setattr(httpcache, "MIN_TRAINING_PAGES", 10)
+    storage, spider = open_storage(tmp_path)
+    requests = [Request(f"http://ufcstats.com/fight-details/{idx}") for idx in range(40)]
+    for request in requests:
+        storage.store_response(spider, request, fight_response(request.url))
+    spider_dir = tmp_path / spider.name
+    size_before = sum(path.stat().st_size for path in cached_page_paths(spider_dir))
+
+    assert train_dictionary(spider_dir, dict_size=4096) == len(requests)
+
+    assert sum(path.stat().st_size for path in cached_page_paths(spider_dir)) < size_before
+    storage, _ = open_storage(tmp_path)
+    assert all(
+        storage.retrieve_response(spider, request).url == request.url for request in requests
+    )
+
+
+def test_replay_serves_every_page_from_cache() -> None:
+    """Testing that replaying never downloads, not even the listing refreshed on live crawls"""
+
+    listing = next(iter(StatsSpider().start_requests()))
+    live = get_crawler(StatsSpider)
+    replay = get_crawler(StatsSpider, {"HTTPCACHE_REPLAY": True})
+
+    assert not RefreshingPolicy(live.settings).is_cached_response_fresh(None, listing)
+    assert RefreshingPolicy(replay.settings).is_cached_response_fresh(None, listing)
+    assert replay.settings.getbool("HTTPCACHE_IGNORE_MISSING")
+    assert not live.settings.getbool("HTTPCACHE_IGNORE_MISSING")
+
+
+def crawl_listing(tmp_path: Path, downloaded_body: bytes, **settings) -> bytes:
+    """Body the spider gets for the events listing, through the HTTP cache middleware"""
+
+    crawler = get_crawler(StatsSpider, {**CACHE_SETTINGS, "HTTPCACHE_DIR": str(tmp_path), **settings})
+    spider = StatsSpider.from_crawler(crawler)
+    middleware = HttpCacheMiddleware.from_crawler(crawler)
+    middleware.spider_opened(spider)
+    request = next(iter(spider.start_requests()))
+
+    cached = middleware.process_request(request, spider)
+    if cached is not None:
+        return cached.body
+    downloaded = HtmlResponse(url=request.url, body=downloaded_body, headers={"Content-Type": "text/html"})
+    return middleware.process_response(request, downloaded, spider).body
+
+
+def test_listing_is_refreshed_and_replayed(tmp_path: Path) -> None:
+    """Testing that crawls get the newly downloaded listing, and replays the last one cached"""
+
+    assert crawl_listing(tmp_path, b"old listing") == b"old listing"
+    assert crawl_listing(tmp_path, b"new listing") == b"new listing"
+    assert crawl_listing(tmp_path, b"unused", HTTPCACHE_REPLAY=True) == b"new listing"
+
+    with pytest.raises(IgnoreRequest):
+        crawl_listing(tmp_path / "empty", b"unused", HTTPCACHE_REPLAY=True)